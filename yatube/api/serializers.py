@@ -0,0 +1,74 @@
+"""
+Компактная сериализация для API.
+
+Строки выбираются через values() без создания объектов моделей,
+а клиент может сузить набор полей параметром ?fields=a,b,c.
+"""
+from django.core.files.storage import default_storage
+
+# Поле ответа -> путь для values()
+POST_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated': 'updated',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+COMMENT_FIELDS = {
+    'id': 'pk',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'pub_date': 'pub_date',
+}
+GROUP_FIELDS = {
+    'title': 'title',
+    'slug': 'slug',
+    'description': 'description',
+    'posts_count': 'posts_count',
+}
+AUTHOR_FIELDS = {
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'posts_count': 'stats__posts_count',
+    'followers_count': 'stats__followers_count',
+    'following_count': 'stats__following_count',
+}
+# Служебные поля, по которым строятся курсор и валидаторы кэша
+POST_KEY = ('pk', 'pub_date', 'updated', 'comments_count')
+COMMENT_KEY = ('pk', 'pub_date')
+
+
+class FieldsError(ValueError):
+    """В ?fields= указаны неизвестные поля."""
+
+
+def requested_fields(request, fields):
+    """Поля ответа из параметра ?fields= (по умолчанию - все)."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(fields)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = sorted(set(names) - set(fields))
+    if unknown:
+        raise FieldsError(f'Неизвестные поля: {", ".join(unknown)}')
+    return names
+
+
+def select(queryset, fields, names, key=()):
+    """values() только по запрошенным полям и служебным полям key."""
+    paths = [fields[name] for name in names]
+    return queryset.values(*dict.fromkeys(paths + list(key)))
+
+
+def serialize(row, fields, names):
+    data = {name: row[fields[name]] for name in names}
+    if 'image' in data:
+        data['image'] = (
+            default_storage.url(data['image']) if data['image'] else None
+        )
+    return data
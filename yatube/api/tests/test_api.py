@@ -0,0 +1,159 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiReadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor1')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый пост {i}', author=cls.user, group=cls.group)
+            for i in range(settings.NUMBER_POSTS_PAGE + 3)
+        )
+        cls.post = Post.objects.first()
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_cursor_pagination(self):
+        """Списки постов листаются по курсору."""
+        response = self.client.get(reverse('api:index'))
+        first_page = response.json()
+        self.assertEqual(
+            len(first_page['results']), settings.NUMBER_POSTS_PAGE
+        )
+        second_page = self.client.get(first_page['next']).json()
+        self.assertEqual(len(second_page['results']), 3)
+        self.assertIsNone(second_page['next'])
+        ids = [post['id'] for post in first_page['results']]
+        ids += [post['id'] for post in second_page['results']]
+        self.assertEqual(
+            ids, list(Post.objects.values_list('pk', flat=True))
+        )
+
+    def test_sparse_fields(self):
+        """Параметр fields сужает набор полей."""
+        url = reverse('api:post_detail', args=[self.post.pk])
+        response = self.client.get(url, {'fields': 'id,author'})
+        self.assertEqual(
+            response.json(), {'id': self.post.pk, 'author': 'TestAuthor1'}
+        )
+        response = self.client.get(url, {'fields': 'password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_group_and_profile(self):
+        """Страницы группы и автора содержат сведения о владельце."""
+        group = self.client.get(
+            reverse('api:group_list', args=['test-slug'])
+        ).json()
+        self.assertEqual(group['group']['title'], 'Тестовая группа')
+        author = self.client.get(
+            reverse('api:profile', args=['TestAuthor1'])
+        ).json()
+        self.assertEqual(author['author']['username'], 'TestAuthor1')
+        self.assertEqual(
+            len(author['results']), settings.NUMBER_POSTS_PAGE
+        )
+
+    def test_not_modified(self):
+        """Неизмененный пост отдается с кодом 304, изменение меняет ETag."""
+        url = reverse('api:post_detail', args=[self.post.pk])
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['comments_count'], 1)
+
+    def test_related_changes_modify_etag(self):
+        """Переименование автора или группы меняет ETag ответов."""
+        urls = [
+            reverse('api:index'),
+            reverse('api:post_detail', args=[self.post.pk]),
+            reverse('api:group_list', args=[self.group.slug]),
+        ]
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        self.user.username = 'RenamedAuthor'
+        self.user.save()
+        self.group.title = 'Новое название'
+        self.group.save()
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['group']['title'], 'Новое название')
+        self.assertEqual(
+            response.json()['results'][0]['author'], 'RenamedAuthor'
+        )
+
+
+class ApiWriteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor1')
+        cls.other = User.objects.create_user(username='TestAuthor2')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_login_required(self):
+        """Запись без авторизации отклоняется с кодом 401."""
+        response = Client().post(
+            reverse('api:post_create'), {'text': 'Новый пост'}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_create_and_edit_post(self):
+        """Автор создает и изменяет пост, чужой пост изменить нельзя."""
+        response = self.client.post(
+            reverse('api:post_create'), {'text': 'Новый пост'}
+        )
+        self.assertEqual(response.status_code, 201)
+        post_id = response.json()['id']
+        response = self.client.post(
+            reverse('api:post_edit', args=[post_id]), {'text': 'Измененный'}
+        )
+        self.assertEqual(response.json()['text'], 'Измененный')
+        other_client = Client()
+        other_client.force_login(self.other)
+        response = other_client.post(
+            reverse('api:post_edit', args=[post_id]), {'text': 'Чужой'}
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_comment_and_follow(self):
+        """Комментарии и подписки доступны через API."""
+        self.client.post(
+            reverse('api:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'}
+        )
+        comments = self.client.get(
+            reverse('api:comments', args=[self.post.pk])
+        ).json()
+        self.assertEqual(comments['results'][0]['text'], 'Комментарий')
+        self.client.post(reverse('api:profile_follow', args=['TestAuthor2']))
+        self.assertTrue(
+            Follow.objects.filter(user=self.user, author=self.other).exists()
+        )
+        Post.objects.create(text='Пост автора', author=self.other)
+        feed = self.client.get(reverse('api:follow_index'))
+        self.assertEqual(feed.json()['results'][0]['text'], 'Пост автора')
+        self.assertIn('Cookie', feed['Vary'])
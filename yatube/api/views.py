@@ -0,0 +1,316 @@
+"""
+JSON API, повторяющее маршруты posts.urls.
+
+Списки отдаются страницами по курсору (?cursor=), ответы GET несут
+строгий ETag и Last-Modified, и при совпадении валидаторов клиент
+получает 304 без сериализации. Запись требует сессии и CSRF-токена,
+как и HTML-формы.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_GET, require_POST
+
+from core.sqlite import write_transaction
+from posts.cache import posts_changed_at
+from posts.feed import feed_posts
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Follow, Group, Post, User
+from posts.thumbnails import schedule_thumbnail
+from posts.utils import (CURSOR_NEXT, CURSOR_PREVIOUS, decode_cursor,
+                         encode_key, keyset_filter)
+
+from .serializers import (AUTHOR_FIELDS, COMMENT_FIELDS, COMMENT_KEY,
+                          GROUP_FIELDS, POST_FIELDS, POST_KEY, FieldsError,
+                          requested_fields, select, serialize)
+
+
+class CursorError(ValueError):
+    """Поврежденный курсор."""
+
+
+def error(status, detail, **extra):
+    return JsonResponse({'detail': detail, **extra}, status=status)
+
+
+def api_view(view):
+    """Ошибки параметров запроса превращаются в ответ 400."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except (FieldsError, CursorError) as exc:
+            return error(400, str(exc))
+    return wrapper
+
+
+def api_login_required(view):
+    """Как login_required, но без перенаправления на страницу входа."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error(401, 'Требуется авторизация')
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def rows_page(request, rows, direction=CURSOR_NEXT):
+    """
+    Строки страницы после курсора ?cursor= и адрес следующей страницы.
+    CURSOR_NEXT - от новых к старым, CURSOR_PREVIOUS - от старых к новым.
+    """
+    cursor = request.GET.get('cursor')
+    if cursor:
+        decoded = decode_cursor(cursor)
+        if decoded is None or decoded[0] != direction:
+            raise CursorError('Неверный курсор')
+        _, pub_date, pk, _ = decoded
+        rows = keyset_filter(rows, direction, pub_date, pk)
+    elif direction == CURSOR_NEXT:
+        rows = rows.order_by('-pub_date', '-pk')
+    else:
+        rows = rows.order_by('pub_date', 'pk')
+    per_page = settings.NUMBER_POSTS_PAGE
+    rows = list(rows[:per_page + 1])
+    next_url = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        query = request.GET.copy()
+        query['cursor'] = encode_key(
+            direction, rows[-1]['pub_date'], rows[-1]['pk'], 1
+        )
+        next_url = f'{request.path}?{query.urlencode()}'
+    return rows, next_url
+
+
+def conditional_json(request, validators, last_modified, build,
+                     per_user=False):
+    """
+    JSON-ответ со строгим ETag, вычисленным из validators - всех
+    строк, из которых строится тело. Если валидаторы клиента совпали,
+    возвращается 304, и тело (функция build) не строится.
+    Last-Modified не раньше отметки posts_changed_at: строки не хранят
+    дату изменения автора или группы, а отметку сдвигает и их запись.
+    """
+    etag = quote_etag(hashlib.md5(
+        repr((request.GET.get('fields'), validators)).encode()
+    ).hexdigest())
+    changed_at = datetime.fromtimestamp(posts_changed_at(), timezone.utc)
+    last_modified = max(last_modified or changed_at, changed_at)
+    timestamp = int(last_modified.timestamp())
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp
+    )
+    if response is None:
+        response = JsonResponse(build())
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(timestamp)
+    if per_user:
+        patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def post_list_response(request, posts, extra=None, per_user=False):
+    """Страница постов с необязательными сведениями extra о владельце."""
+    names = requested_fields(request, POST_FIELDS)
+    rows, next_url = rows_page(
+        request, select(posts, POST_FIELDS, names, POST_KEY)
+    )
+    validators = (extra, [tuple(row.values()) for row in rows], next_url)
+    last_modified = max((row['updated'] for row in rows), default=None)
+
+    def build():
+        data = dict(extra or {})
+        data['results'] = [
+            serialize(row, POST_FIELDS, names) for row in rows
+        ]
+        data['next'] = next_url
+        return data
+
+    return conditional_json(
+        request, validators, last_modified, build, per_user=per_user
+    )
+
+
+def post_row(post_id, names=None):
+    names = names or list(POST_FIELDS)
+    return select(
+        Post.objects.filter(pk=post_id), POST_FIELDS, names, POST_KEY
+    ).first()
+
+
+@require_GET
+@api_view
+def index(request):
+    return post_list_response(request, Post.objects.all())
+
+
+@require_GET
+@api_view
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).values(
+        'pk', *GROUP_FIELDS.values()
+    ).first()
+    if group is None:
+        return error(404, 'Группа не найдена')
+    return post_list_response(
+        request,
+        Post.objects.filter(group_id=group['pk']),
+        extra={'group': serialize(group, GROUP_FIELDS, GROUP_FIELDS)}
+    )
+
+
+@require_GET
+@api_view
+def profile(request, username):
+    author = User.objects.filter(username=username).values(
+        'pk', *AUTHOR_FIELDS.values()
+    ).first()
+    if author is None:
+        return error(404, 'Пользователь не найден')
+    return post_list_response(
+        request,
+        Post.objects.filter(author_id=author['pk']),
+        extra={'author': serialize(author, AUTHOR_FIELDS, AUTHOR_FIELDS)}
+    )
+
+
+@require_GET
+@api_view
+def post_detail(request, post_id):
+    names = requested_fields(request, POST_FIELDS)
+    row = post_row(post_id, names)
+    if row is None:
+        return error(404, 'Пост не найден')
+    return conditional_json(
+        request,
+        tuple(row.values()),
+        row['updated'],
+        lambda: serialize(row, POST_FIELDS, names)
+    )
+
+
+@require_GET
+@api_view
+def comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return error(404, 'Пост не найден')
+    names = requested_fields(request, COMMENT_FIELDS)
+    rows, next_url = rows_page(
+        request,
+        select(
+            Comment.objects.filter(post_id=post_id),
+            COMMENT_FIELDS, names, COMMENT_KEY
+        ),
+        direction=CURSOR_PREVIOUS
+    )
+    return conditional_json(
+        request,
+        ([tuple(row.values()) for row in rows], next_url),
+        max((row['pub_date'] for row in rows), default=None),
+        lambda: {
+            'results': [
+                serialize(row, COMMENT_FIELDS, names) for row in rows
+            ],
+            'next': next_url,
+        }
+    )
+
+
+@require_GET
+@api_login_required
+@api_view
+def follow_index(request):
+    return post_list_response(
+        request, feed_posts(request.user), extra=None, per_user=True
+    )
+
+
+@require_POST
+@api_login_required
+def post_create(request):
+    form = PostForm(request.POST, files=request.FILES or None)
+    if not form.is_valid():
+        return error(400, 'Неверные данные', errors=form.errors)
+    post = form.save(commit=False)
+    post.author = request.user
+    with write_transaction():
+        post.save()
+        schedule_thumbnail(post)
+    return JsonResponse(
+        serialize(post_row(post.pk), POST_FIELDS, POST_FIELDS), status=201
+    )
+
+
+@require_POST
+@api_login_required
+def post_edit(request, post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return error(404, 'Пост не найден')
+    if post.author_id != request.user.pk:
+        return error(403, 'Изменять пост может только автор')
+    form = PostForm(request.POST, files=request.FILES or None, instance=post)
+    if not form.is_valid():
+        return error(400, 'Неверные данные', errors=form.errors)
+    with write_transaction():
+        post = form.save()
+        schedule_thumbnail(post)
+    return JsonResponse(serialize(post_row(post.pk), POST_FIELDS, POST_FIELDS))
+
+
+@require_POST
+@api_login_required
+def add_comment(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return error(404, 'Пост не найден')
+    form = CommentForm(request.POST)
+    if not form.is_valid():
+        return error(400, 'Неверные данные', errors=form.errors)
+    comment = form.save(commit=False)
+    comment.author = request.user
+    comment.post_id = post_id
+    with write_transaction():
+        comment.save()
+    row = Comment.objects.filter(pk=comment.pk).values(
+        *COMMENT_FIELDS.values()
+    ).get()
+    return JsonResponse(
+        serialize(row, COMMENT_FIELDS, COMMENT_FIELDS), status=201
+    )
+
+
+def _follow_author(request, username):
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        return None, error(404, 'Пользователь не найден')
+    if author == request.user:
+        return None, error(400, 'Нельзя подписаться на себя')
+    return author, None
+
+
+@require_POST
+@api_login_required
+def profile_follow(request, username):
+    author, response = _follow_author(request, username)
+    if response is not None:
+        return response
+    with write_transaction():
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return JsonResponse({'following': True})
+
+
+@require_POST
+@api_login_required
+def profile_unfollow(request, username):
+    author, response = _follow_author(request, username)
+    if response is not None:
+        return response
+    with write_transaction():
+        Follow.objects.filter(user=request.user, author=author).delete()
+    return JsonResponse({'following': False})
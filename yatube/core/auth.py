@@ -0,0 +1,64 @@
+"""
+Пользователь запроса из кэша.
+
+django.contrib.auth читает пользователя из базы на каждом запросе
+с сессией. Здесь он берется из кэша по id из сессии, а из базы
+загружается только при промахе. Сигналы модели пользователя удаляют
+запись из кэша при любом сохранении и удалении, поэтому смена пароля,
+блокировка и правка профиля видны со следующего запроса.
+"""
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user_model, load_backend)
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.crypto import constant_time_compare
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def _load_user(user_id, backend_path):
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = load_backend(backend_path).get_user(user_id)
+        if user is not None:
+            # add(), а не set(): запись не сбрасывает L1 других
+            # процессов (core.backends.TieredCache)
+            cache.add(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+def get_user(request):
+    """То же, что django.contrib.auth.get_user(), с кэшем пользователей."""
+    try:
+        user_id = get_user_model()._meta.pk.to_python(
+            request.session[SESSION_KEY]
+        )
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    user = _load_user(user_id, backend_path)
+    if user is None:
+        return AnonymousUser()
+    # Сессия действительна, пока не сменился пароль
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not (session_hash and constant_time_compare(
+            session_hash, user.get_session_auth_hash())):
+        request.session.flush()
+        return AnonymousUser()
+    return user
+
+
+def forget_user(user_id):
+    """Удаляет пользователя из кэша сейчас и после фиксации транзакции."""
+    def delete():
+        cache.delete(user_cache_key(user_id))
+
+    delete()
+    transaction.on_commit(delete)
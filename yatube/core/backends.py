@@ -0,0 +1,392 @@
+"""
+Бэкенды шаблонов и кэша, отчитывающиеся в учет запроса (core.perf).
+"""
+import base64
+import itertools
+import pickle
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends import db, locmem
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.db import DatabaseError, connections, router, transaction
+from django.template.backends import django as django_backend
+from django.utils import timezone
+
+from . import perf
+
+_MISSING = object()
+# Номер последней записи в L2 (TieredCache) и журнал записанных ключей
+GENERATION_KEY = 'tiered:generation'
+JOURNAL_KEY = 'tiered:written:{}'
+# Сколько секунд хранится запись журнала и сколько записей процесс
+# дочитывает из журнала, прежде чем очистить L1 целиком
+JOURNAL_TIMEOUT = 60
+JOURNAL_MAX = 100
+
+
+def _initial_generation():
+    # Поколение, созданное после вытеснения ключа, не совпадет
+    # с прежним ни в одном процессе
+    return int(time.time() * 1000)
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        with perf.timing('template'):
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """DjangoTemplates, учитывающий время рендеринга шаблонов."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return Template(template.template, self)
+
+
+class DatabaseCache(db.DatabaseCache):
+    """
+    Кэш в таблице базы данных - общий L2 для TieredCache. В отличие
+    от базового класса:
+
+    - add() и incr() атомарны между процессами: add() опирается
+      на первичный ключ таблицы, incr() обновляет строку, только если
+      значение не изменилось с момента чтения. На них держатся
+      блокировка пересчета страниц, версии ключей (core.cache)
+      и поколение TieredCache;
+    - запись не считает строки таблицы: просроченные и лишние записи
+      удаляются раз в OPTIONS['CULL_EVERY'] записей процесса.
+
+    Таблицу создает команда createcachetable в базе
+    settings.CACHE_DATABASE (core.db.ReplicaRouter), поэтому запись
+    в кэш не участвует в транзакциях приложения.
+    """
+
+    def __init__(self, table, params):
+        super().__init__(table, params)
+        self._cull_every = params.get('OPTIONS', {}).get('CULL_EVERY', 100)
+        self._writes = itertools.count(1)
+
+    def _connection(self):
+        return connections[router.db_for_write(self.cache_model_class)]
+
+    def _sql(self, connection, sql):
+        quote_name = connection.ops.quote_name
+        return sql.format(
+            table=quote_name(self._table),
+            key=quote_name('cache_key'),
+            value=quote_name('value'),
+            expires=quote_name('expires'),
+        )
+
+    @staticmethod
+    def _datetime(connection, value):
+        return connection.ops.adapt_datetimefield_value(
+            value.replace(microsecond=0)
+        )
+
+    def _now(self, connection):
+        now = datetime.utcnow() if settings.USE_TZ else datetime.now()
+        return self._datetime(connection, now)
+
+    def _expires(self, connection, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            expires = datetime.max
+        elif settings.USE_TZ:
+            expires = datetime.utcfromtimestamp(timeout)
+        else:
+            expires = datetime.fromtimestamp(timeout)
+        return self._datetime(connection, expires)
+
+    def _encode(self, value):
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        return base64.b64encode(pickled).decode('latin1')
+
+    def _written(self, connection):
+        if next(self._writes) % self._cull_every:
+            return
+        with connection.cursor() as cursor:
+            self._cull(connection.alias, cursor, timezone.now())
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        update = self._sql(
+            connection,
+            'UPDATE {table} SET {value} = %s, {expires} = %s '
+            'WHERE {key} = %s'
+        )
+        params = [
+            self._encode(value), self._expires(connection, timeout), key
+        ]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(update, params)
+                if not cursor.rowcount and not self._insert(
+                        connection, cursor, key, params):
+                    # Ключ успел добавить другой процесс
+                    cursor.execute(update, params)
+        except DatabaseError:
+            # Как и в базовом классе, неудачная запись в кэш
+            # не прерывает запрос
+            return
+        self._written(connection)
+
+    def _insert(self, connection, cursor, key, params):
+        """Добавляет строку; False, если ключ уже есть в таблице."""
+        try:
+            with transaction.atomic(using=connection.alias):
+                cursor.execute(self._sql(
+                    connection,
+                    'INSERT INTO {table} ({value}, {expires}, {key}) '
+                    'VALUES (%s, %s, %s)'
+                ), params)
+        except DatabaseError:
+            return False
+        return True
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        params = [
+            self._encode(value), self._expires(connection, timeout), key
+        ]
+        try:
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    # Просроченная запись не мешает добавлению
+                    cursor.execute(self._sql(
+                        connection,
+                        'DELETE FROM {table} '
+                        'WHERE {key} = %s AND {expires} < %s'
+                    ), [key, self._now(connection)])
+                    added = self._insert(connection, cursor, key, params)
+        except DatabaseError:
+            return False
+        if added:
+            self._written(connection)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        select = self._sql(
+            connection,
+            'SELECT {value} FROM {table} WHERE {key} = %s AND {expires} > %s'
+        )
+        update = self._sql(
+            connection,
+            'UPDATE {table} SET {value} = %s WHERE {key} = %s AND {value} = %s'
+        )
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute(select, [key, self._now(connection)])
+                row = cursor.fetchone()
+                if row is None:
+                    raise ValueError("Key '%s' not found" % key)
+                current = connection.ops.process_clob(row[0])
+                value = pickle.loads(base64.b64decode(current.encode()))
+                value += delta
+                # Строка изменится, только если ее никто не обновил
+                # после чтения; иначе чтение повторяется
+                cursor.execute(update, [self._encode(value), key, current])
+                if cursor.rowcount:
+                    return value
+
+
+# Счетчики попаданий по уровням: имя L1 -> Counter (на процесс)
+_tier_stats = defaultdict(Counter)
+
+
+class TieredCache(BaseCache):
+    """
+    Двухуровневый кэш: LRU в памяти процесса (L1) с коротким временем
+    жизни перед общим для всех процессов кэшем L2 - другим алиасом
+    CACHES (OPTIONS['L2']): таблицей базы данных (DatabaseCache)
+    или Redis.
+
+    Каждая запись идет в L2, получает там номер (поколение) и попадает
+    в журнал под этим номером. Перед первым чтением в каждом запросе
+    процесс сверяет поколение с тем, до которого он дочитал журнал,
+    и убирает из L1 только ключи, записанные с тех пор другими
+    процессами. L1 очищается целиком, лишь если журнал отстал больше
+    чем на JOURNAL_MAX записей или его запись уже вытеснена. Вне
+    запросов (команды, фоновые потоки) устаревание ограничено
+    L1_TIMEOUT. add() поколение не меняет: ключа не было в L2, а значит,
+    и в L1 других процессов он мог остаться лишь на L1_TIMEOUT.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l2_alias = options.get('L2', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.l1_name = f'tiered:{location}'
+        self.l1 = locmem.LocMemCache(self.l1_name, {
+            'TIMEOUT': self.l1_timeout,
+            'OPTIONS': {'MAX_ENTRIES': options.get('L1_MAX_ENTRIES', 1000)},
+        })
+        self.stats = _tier_stats[self.l1_name]
+        self._validated = False
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    def _l1_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.l1_timeout
+        return min(timeout, self.l1_timeout)
+
+    def _l2_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _set_generation(self, generation):
+        self.l1.clear()
+        self.l1.set(GENERATION_KEY, generation, None)
+
+    def _catch_up(self, generation):
+        """Убирает из L1 ключи, записанные в L2 после прошлой сверки."""
+        known = self.l1.get(GENERATION_KEY)
+        if known == generation:
+            return
+        if known is None or not 0 < generation - known <= JOURNAL_MAX:
+            self._set_generation(generation)
+            return
+        journal = self.l2.get_many([
+            JOURNAL_KEY.format(number)
+            for number in range(known + 1, generation + 1)
+        ])
+        if len(journal) < generation - known:
+            # Запись журнала вытеснена или еще не сделана
+            self._set_generation(generation)
+            return
+        for key, version in journal.values():
+            self.l1.delete(key, version)
+        self.l1.set(GENERATION_KEY, generation, None)
+
+    def _validate(self):
+        if self._validated:
+            return
+        self._validated = True
+        generation = self.l2.get(GENERATION_KEY)
+        if generation is None:
+            self.l2.add(GENERATION_KEY, _initial_generation(), None)
+            generation = self.l2.get(GENERATION_KEY)
+        self._catch_up(generation)
+
+    def _written(self, key, version):
+        """Записывает ключ в журнал L2 и убирает его из L1."""
+        self.l1.delete(key, version)
+        known = self.l1.get(GENERATION_KEY)
+        try:
+            generation = self.l2.incr(GENERATION_KEY)
+        except ValueError:
+            generation = _initial_generation()
+            self.l2.set(GENERATION_KEY, generation, None)
+        else:
+            self.l2.set(
+                JOURNAL_KEY.format(generation), (key, version),
+                JOURNAL_TIMEOUT
+            )
+        if known is not None and generation == known + 1:
+            # С прошлой сверки других записей не было, L1 актуален
+            self.l1.set(GENERATION_KEY, generation, None)
+        else:
+            self._catch_up(generation)
+
+    def get(self, key, default=None, version=None):
+        self._validate()
+        value = self.l1.get(key, _MISSING, version)
+        if value is not _MISSING:
+            self.stats['l1_hits'] += 1
+            perf.count_cache(1, 0)
+            return value
+        value = self.l2.get(key, _MISSING, version)
+        if value is _MISSING:
+            self.stats['misses'] += 1
+            perf.count_cache(0, 1)
+            return default
+        self.stats['l2_hits'] += 1
+        perf.count_cache(1, 0)
+        self.l1.set(key, value, self.l1_timeout, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._validate()
+        keys = list(keys)
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.l1.get(key, _MISSING, version)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        self.stats['l1_hits'] += len(found)
+        if missing:
+            values = self.l2.get_many(missing, version)
+            for key, value in values.items():
+                self.l1.set(key, value, self.l1_timeout, version)
+            found.update(values)
+            self.stats['l2_hits'] += len(values)
+            self.stats['misses'] += len(missing) - len(values)
+        perf.count_cache(len(found), len(keys) - len(found))
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, self._l2_timeout(timeout), version)
+        self._written(key, version)
+        l1_timeout = self._l1_timeout(timeout)
+        if l1_timeout > 0:
+            self.l1.set(key, value, l1_timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l1.delete(key, version)
+        return self.l2.add(key, value, self._l2_timeout(timeout), version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, self._l2_timeout(timeout), version)
+
+    def delete(self, key, version=None):
+        self.l2.delete(key, version)
+        self._written(key, version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        value = self.l2.incr(key, delta, version)
+        self._written(key, version)
+        return value
+
+    def clear(self):
+        self.l2.clear()
+        self.l1.clear()
+
+    def close(self, **kwargs):
+        # Вызывается по окончании запроса: следующий запрос сверит
+        # поколение заново
+        self._validated = False
+
+    def hit_rates(self):
+        """Доля чтений, обслуженных L1 и L2, в этом процессе."""
+        total = sum(self.stats.values())
+        return {
+            'reads': total,
+            'l1': self.stats['l1_hits'] / total if total else 0,
+            'l2': self.stats['l2_hits'] / total if total else 0,
+        }
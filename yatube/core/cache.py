@@ -0,0 +1,121 @@
+import hashlib
+import re
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+
+def _initial_version():
+    # Версия, созданная после вытеснения ключа из кэша, всегда больше
+    # прежней, поэтому устаревшие фрагменты не оживают.
+    return int(time.time() * 1000)
+
+
+def get_versions(*keys):
+    """Возвращает текущие версии для ключей, создавая недостающие."""
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), None)
+            versions[key] = cache.get(key, _initial_version())
+    return [versions[key] for key in keys]
+
+
+def bump_version(key):
+    """Увеличивает версию ключа, делая устаревшими зависящие от нее записи."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+
+
+# Маркер места для пользовательского фрагмента в закэшированной странице
+USER_FRAGMENT_MARKER = '<!--user_fragment:{}-->'
+USER_FRAGMENT_RE = re.compile(r'<!--user_fragment:([\w/.-]+)-->')
+
+
+def invalidate_page_cache(key_prefix):
+    """Делает устаревшими все закэшированные страницы с этим префиксом."""
+    bump_version(f'page_cache:{key_prefix}')
+
+
+def _punch_user_fragments(request, content):
+    """Подставляет в страницу фрагменты, зависящие от пользователя."""
+    return USER_FRAGMENT_RE.sub(
+        lambda match: render_to_string(match.group(1), request=request),
+        content
+    )
+
+
+def _render_for_cache(view, request, *args, **kwargs):
+    request.page_cache_punch = True
+    try:
+        return view(request, *args, **kwargs)
+    finally:
+        request.page_cache_punch = False
+
+
+def versioned_cache_page(timeout, key_prefix, stale_timeout=60,
+                         lock_timeout=10, lock_wait=2):
+    """
+    Кэширует страницу, общую для всех пользователей.
+
+    Ключ включает поколение key_prefix, которое сбрасывается
+    через invalidate_page_cache при записи. Фрагменты, зависящие от
+    пользователя (тег user_fragment), подставляются в готовую страницу
+    на каждом запросе.
+
+    Защита от лавины запросов: страницу пересчитывает только тот,
+    кто взял блокировку. Остальные в течение stale_timeout отдают
+    устаревшую копию, а при ее отсутствии ждут до lock_wait секунд.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            generation, = get_versions(f'page_cache:{key_prefix}')
+            path_hash = hashlib.md5(
+                request.get_full_path().encode()
+            ).hexdigest()
+            key = f'page_cache:{key_prefix}:{generation}:{path_hash}'
+            lock_key = f'{key}:lock'
+            response = None
+            entry = cache.get(key)
+            deadline = time.monotonic() + lock_wait
+            while entry is None or entry['expires'] < time.time():
+                locked = cache.add(lock_key, 1, lock_timeout)
+                if not locked and entry is not None:
+                    # Пересчитывает другой запрос, отдаем устаревшую копию
+                    break
+                if locked or time.monotonic() > deadline:
+                    try:
+                        response = _render_for_cache(
+                            view, request, *args, **kwargs
+                        )
+                    finally:
+                        if locked:
+                            cache.delete(lock_key)
+                    if response.status_code != 200 or response.streaming:
+                        return response
+                    entry = {
+                        'content': response.content.decode(response.charset),
+                        'content_type': response['Content-Type'],
+                        'expires': time.time() + timeout,
+                    }
+                    cache.set(key, entry, timeout + stale_timeout)
+                    break
+                time.sleep(0.05)
+                entry = cache.get(key)
+            content = _punch_user_fragments(request, entry['content'])
+            if response is None:
+                return HttpResponse(
+                    content, content_type=entry['content_type']
+                )
+            response.content = content
+            return response
+        return wrapper
+    return decorator
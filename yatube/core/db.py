@@ -0,0 +1,79 @@
+"""
+Распределение чтений по репликам.
+
+Записи всегда идут в основную базу (default). Чтения уходят на случайную
+реплику из settings.DATABASE_REPLICAS, если текущий контекст не закреплен
+за основной базой. Закрепление снимает только ReplicaPinMiddleware
+для безопасных запросов сессий, которые ничего не записывали, поэтому
+команды, фоновые потоки и запросы на запись читают из основной базы.
+Таблица кэша (core.backends.DatabaseCache) живет в отдельной базе
+settings.CACHE_DATABASE.
+"""
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Сессия, в которой была запись, читает из основной базы
+PIN_SESSION_KEY = 'db_pinned_at'
+# Приложения, чтения которых всегда идут в основную базу
+PRIMARY_APPS = {'sessions'}
+# Метка, под которой DatabaseCache сообщает роутеру о своей таблице
+CACHE_APP = 'django_cache'
+
+_use_primary = contextvars.ContextVar('use_primary', default=True)
+
+
+@contextmanager
+def reading_from(primary):
+    """Направляет чтения в основную базу (primary=True) или в реплики."""
+    token = _use_primary.set(primary)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+def session_pinned(session):
+    """Писала ли сессия в базу достаточно недавно, чтобы не читать реплики."""
+    pinned_at = session.get(PIN_SESSION_KEY)
+    if pinned_at is None:
+        return False
+    pin_seconds = settings.REPLICA_PIN_SECONDS
+    return pin_seconds is None or time.time() - pinned_at < pin_seconds
+
+
+def pin_session(session):
+    session[PIN_SESSION_KEY] = time.time()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == CACHE_APP:
+            return settings.CACHE_DATABASE
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or _use_primary.get()
+            or model._meta.app_label in PRIMARY_APPS
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == CACHE_APP:
+            return settings.CACHE_DATABASE
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Все базы проекта - копии основной
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # В базе кэша нет таблиц приложений, таблица кэша - только в ней
+        if app_label == CACHE_APP or db == settings.CACHE_DATABASE:
+            return app_label == CACHE_APP and db == settings.CACHE_DATABASE
+        return None
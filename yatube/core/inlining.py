@@ -0,0 +1,73 @@
+"""
+Подстановка {% include %} в текст шаблонов при развертывании.
+
+{% include 'имя' %} с постоянным именем заменяется текстом
+подключаемого шаблона, а {% include 'имя' with a=b %} - тем же
+текстом внутри {% with a=b %}. Страница тогда разбирается и рисуется
+как один шаблон, без поиска и отдельного рендеринга подключений.
+
+Подключения с only, с именем из переменной и шаблоны с {% extends %}
+или {% block %} (внутри include они ведут себя иначе, чем в тексте
+страницы) остаются как есть.
+"""
+import re
+
+from django.template import TemplateDoesNotExist
+
+INCLUDE_RE = re.compile(
+    r'{%\s*include\s+(?P<quote>["\'])(?P<name>[^"\']+)(?P=quote)'
+    r'(?P<args>[^%]*?)\s*%}'
+)
+VERBATIM_RE = re.compile(r'{%\s*verbatim\b')
+NOT_INLINABLE_RE = re.compile(r'{%\s*(?:extends|block|verbatim)\b')
+
+
+class TemplateInliner:
+    """Подставляет подключения, читая шаблоны через engine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._sources = {}
+
+    def source(self, name):
+        """Текст шаблона или None, если его нельзя подставить."""
+        if name not in self._sources:
+            try:
+                source = self.engine.get_template(name).source
+            except TemplateDoesNotExist:
+                source = None
+            if source is not None and NOT_INLINABLE_RE.search(source):
+                source = None
+            self._sources[name] = source
+        return self._sources[name]
+
+    def inline(self, source, stack=()):
+        """
+        Текст шаблона source с подставленными подключениями
+        и число подстановок. stack - имена шаблона source и шаблонов,
+        в которые он подключен (защита от циклов).
+        """
+        count = 0
+
+        def replace(match):
+            nonlocal count
+            name = match.group('name')
+            args = match.group('args').split()
+            included = self.source(name)
+            if included is None or name in stack:
+                return match.group(0)
+            if args and (args[0] != 'with' or 'only' in args):
+                return match.group(0)
+            text, nested = self.inline(included, stack + (name,))
+            count += nested + 1
+            if args:
+                return '{%% with %s %%}%s{%% endwith %%}' % (
+                    ' '.join(args[1:]), text
+                )
+            return text
+
+        if VERBATIM_RE.search(source):
+            # Подключение внутри {% verbatim %} выводится как текст
+            return source, 0
+        text = INCLUDE_RE.sub(replace, source)
+        return text, count
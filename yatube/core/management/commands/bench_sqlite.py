@@ -0,0 +1,133 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connections
+from django.test.utils import override_settings
+
+from core.sqlite import write_transaction
+from posts.management.commands.loadtest import percentile
+from posts.models import Comment, Post, User
+
+BENCH_TEXT = 'bench_sqlite'
+
+# Профиль SQLite по умолчанию для сравнения
+DEFAULT_PROFILE = {
+    'pragmas': {'journal_mode': 'delete', 'synchronous': 'full'},
+    'serialize_writes': False,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет пропускную способность чтений во время параллельных '
+        'записей комментариев: со стандартными настройками SQLite '
+        'и с профилем SQLITE_PRAGMAS и очередью на запись. Созданные '
+        'комментарии удаляются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=5)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Команда предназначена для SQLite')
+        post_ids = list(
+            Post.objects.values_list('pk', flat=True)[:100]
+        )
+        if not post_ids:
+            raise CommandError('Нет постов: запустите generate_data')
+        self.author, _ = User.objects.get_or_create(username=BENCH_TEXT)
+        self.post_ids = post_ids
+        profiles = {
+            'default': DEFAULT_PROFILE,
+            'tuned': {
+                'pragmas': settings.SQLITE_PRAGMAS,
+                'serialize_writes': True,
+            },
+        }
+        self.stdout.write(
+            f'{"профиль":>8} {"чтений/с":>10} {"p95 чтения, мс":>15} '
+            f'{"записей/с":>10} {"блокировок":>11}'
+        )
+        try:
+            for name, profile in profiles.items():
+                with override_settings(
+                    SQLITE_PRAGMAS=profile['pragmas'],
+                    SQLITE_SERIALIZE_WRITES=profile['serialize_writes']
+                ):
+                    result = self.run(options)
+                self.stdout.write(
+                    f'{name:>8} {result["reads"]:>10.1f} '
+                    f'{result["read_p95"]:>15.2f} '
+                    f'{result["writes"]:>10.1f} {result["locked"]:>11}'
+                )
+        finally:
+            Comment.objects.filter(text=BENCH_TEXT).delete()
+
+    def run(self, options):
+        # Новые подключения получат прагмы профиля
+        connections.close_all()
+        duration = options['duration']
+        self.deadline = time.monotonic() + duration
+        self.read_times = []
+        self.counts = {'writes': 0, 'locked': 0}
+        self.lock = threading.Lock()
+        threads = [
+            threading.Thread(target=self.read_loop)
+            for _ in range(options['readers'])
+        ] + [
+            threading.Thread(target=self.write_loop, args=(number,))
+            for number in range(options['writers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        read_times = self.read_times
+        return {
+            'reads': len(read_times) / duration,
+            'read_p95': (
+                percentile(read_times, 95) * 1000 if read_times else 0
+            ),
+            'writes': self.counts['writes'] / duration,
+            'locked': self.counts['locked'],
+        }
+
+    def read_loop(self):
+        close_old_connections()
+        times = []
+        locked = 0
+        while time.monotonic() < self.deadline:
+            started = time.perf_counter()
+            try:
+                list(Post.objects.for_feed()[:settings.NUMBER_POSTS_PAGE])
+            except OperationalError:
+                locked += 1
+                continue
+            times.append(time.perf_counter() - started)
+        with self.lock:
+            self.read_times.extend(times)
+            self.counts['locked'] += locked
+        connections.close_all()
+
+    def write_loop(self, number):
+        close_old_connections()
+        writes = locked = 0
+        while time.monotonic() < self.deadline:
+            post_id = self.post_ids[(number + writes) % len(self.post_ids)]
+            try:
+                with write_transaction():
+                    Comment.objects.create(
+                        post_id=post_id, author=self.author, text=BENCH_TEXT
+                    )
+                writes += 1
+            except OperationalError:
+                locked += 1
+        with self.lock:
+            self.counts['writes'] += writes
+            self.counts['locked'] += locked
+        connections.close_all()
@@ -0,0 +1,65 @@
+import os
+import shutil
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.backends.django import DjangoTemplates
+
+from core.inlining import TemplateInliner
+
+
+class Command(BaseCommand):
+    help = (
+        'Подставляет подключаемые шаблоны (include) в шаблоны проекта '
+        'и сохраняет результат в TEMPLATES_INLINED_DIR (используется при '
+        'TEMPLATE_INLINE). Запускается при каждом развертывании.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=settings.TEMPLATES_INLINED_DIR,
+            help='Каталог для подготовленных шаблонов'
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        source_dirs = [
+            path for path in settings.TEMPLATES[0]['DIRS']
+            if os.path.abspath(path) != os.path.abspath(output)
+        ]
+        # Исходники читаются мимо каталога с результатом прошлого запуска
+        engine = DjangoTemplates({
+            'NAME': 'inline_templates',
+            'DIRS': source_dirs,
+            'APP_DIRS': True,
+            'OPTIONS': {},
+        }).engine
+        inliner = TemplateInliner(engine)
+        shutil.rmtree(output, ignore_errors=True)
+        written = 0
+        for name in self.template_names(source_dirs):
+            source = engine.get_template(name).source
+            text, count = inliner.inline(source, (name,))
+            if not count:
+                continue
+            # Ошибка в подставленном тексте обнаружится здесь, а не
+            # при первом запросе
+            engine.from_string(text)
+            path = os.path.join(output, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(text)
+            written += 1
+            self.stdout.write(f'{name}: подключений подставлено {count}')
+        self.stdout.write(f'Подготовлено шаблонов: {written} в {output}')
+
+    @staticmethod
+    def template_names(dirs):
+        names = set()
+        for directory in dirs:
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    if filename.endswith('.html'):
+                        path = os.path.join(root, filename)
+                        names.add(os.path.relpath(path, directory))
+        return sorted(names)
@@ -0,0 +1,40 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет просроченные сессии из базы пачками, чтобы не держать '
+        'блокировку записи долго. Запускается по расписанию (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=1000)
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help='Пауза между пачками, сек: между ними проходят '
+                 'записи сайта'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                keys = list(
+                    Session.objects.filter(expire_date__lt=now).values_list(
+                        'session_key', flat=True
+                    )[:options['batch']]
+                )
+                if not keys:
+                    break
+                Session.objects.filter(session_key__in=keys).delete()
+            deleted += len(keys)
+            if len(keys) < options['batch']:
+                break
+            time.sleep(options['pause'])
+        self.stdout.write(f'Удалено сессий: {deleted}')
@@ -0,0 +1,91 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+logger = logging.getLogger('core.tasks')
+
+
+def _init_process():
+    # Процессы запускаются через spawn, и им нужен свой Django
+    django.setup()
+
+
+def _execute(task_id):
+    # Импорт не на уровне модуля: процесс импортирует этот модуль при
+    # получении функции, до django.setup()
+    from core import tasks
+
+    close_old_connections()
+    try:
+        return tasks.execute(task_id)
+    except Exception:
+        # Сбой самой очереди (например, базы) не останавливает команду:
+        # задачу заберут снова по истечении аренды
+        logger.exception('Задача %s не выполнена', task_id)
+        return False
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди core.Task.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.TASKS_WORKERS,
+            help='Количество потоков или процессов'
+        )
+        parser.add_argument(
+            '--pool', choices=('thread', 'process'), default='thread'
+        )
+        parser.add_argument(
+            '--poll', type=float, default=1,
+            help='Пауза между проверками пустой очереди, сек'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти'
+        )
+
+    def handle(self, *args, **options):
+        from core import tasks
+
+        workers = options['workers']
+        if options['pool'] == 'process':
+            # Не fork: процессы создаются при первом submit, уже после
+            # tasks.claim(), и унаследовали бы открытое подключение SQLite
+            pool = ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_process
+            )
+        else:
+            pool = ThreadPoolExecutor(workers, thread_name_prefix='tasks')
+        done = failed = 0
+        running = set()
+        with pool:
+            while True:
+                task_ids = tasks.claim(workers - len(running))
+                running.update(pool.submit(_execute, pk) for pk in task_ids)
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+                finished, running = wait(
+                    running, timeout=options['poll'],
+                    return_when=FIRST_COMPLETED
+                )
+                for future in finished:
+                    result = future.result()
+                    if result:
+                        done += 1
+                    elif result is not None:
+                        failed += 1
+        self.stdout.write(f'Выполнено: {done}, с ошибкой: {failed}')
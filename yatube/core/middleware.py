@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import random
+import threading
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import cache
+from django.db import connections
+from django.utils.functional import SimpleLazyObject
+
+from . import auth, db, perf
+
+logger = logging.getLogger('core.perf')
+
+# Самые медленные запросы копит каждый процесс и публикует в кэше под
+# своим номером; номера выдает атомарный счетчик PROCESSES_KEY
+PROCESSES_KEY = 'perf:processes'
+SLOWEST_KEY = 'perf:slowest:{}'
+# Сколько последних номеров процессов читает страница замеров
+MAX_PROCESSES = 100
+
+# Замеры процесса: имя view -> самые медленные запросы по убыванию
+_slowest = {}
+_slowest_lock = threading.Lock()
+# (pid, номер процесса): после fork процесс получает новый номер
+_process = None
+
+
+def slowest_requests():
+    """Самые медленные запросы по именам view: {view: [замер, ...]}."""
+    processes = cache.get(PROCESSES_KEY) or 0
+    snapshots = cache.get_many([
+        SLOWEST_KEY.format(number)
+        for number in range(max(processes - MAX_PROCESSES, 0) + 1,
+                            processes + 1)
+    ])
+    merged = {}
+    for snapshot in snapshots.values():
+        for view, samples in snapshot.items():
+            merged.setdefault(view, []).extend(samples)
+    return {
+        view: sorted(
+            samples, key=lambda sample: sample['total_ms'], reverse=True
+        )[:settings.PERF_SLOWEST_PER_VIEW]
+        for view, samples in sorted(merged.items())
+    }
+
+
+def _process_number():
+    global _process
+    pid = os.getpid()
+    if _process is not None and _process[0] != pid:
+        # Процесс, созданный fork, копит свои замеры под своим номером
+        _slowest.clear()
+        _process = None
+    # Номер теряется при очистке кэша, тогда процесс получает новый
+    if _process is None or (cache.get(PROCESSES_KEY) or 0) < _process[1]:
+        try:
+            number = cache.incr(PROCESSES_KEY)
+        except ValueError:
+            cache.add(PROCESSES_KEY, 0, None)
+            number = cache.incr(PROCESSES_KEY)
+        _process = (pid, number)
+    return _process[1]
+
+
+def _sample(view_name, record):
+    """Запоминает запрос, если он среди PERF_SLOWEST_PER_VIEW медленных."""
+    limit = settings.PERF_SLOWEST_PER_VIEW
+    with _slowest_lock:
+        key = SLOWEST_KEY.format(_process_number())
+        samples = _slowest.setdefault(view_name, [])
+        if len(samples) >= limit and (
+                samples[-1]['total_ms'] >= record['total_ms']):
+            return
+        samples.append(record)
+        samples.sort(key=lambda sample: sample['total_ms'], reverse=True)
+        del samples[limit:]
+        # Ключ процесса пишет только он сам, под блокировкой
+        cache.set(
+            key,
+            {view: list(samples) for view, samples in _slowest.items()},
+            None
+        )
+
+
+class PerformanceMiddleware:
+    """
+    Замеряет запрос: общее время, запросы к базе, рендеринг шаблонов,
+    миниатюры и кэш. Результат уходит в заголовок Server-Timing
+    и строкой JSON в логгер core.perf (уровень INFO). Доля запросов
+    PERF_SAMPLE_RATE сравнивается с самыми медленными запросами своего
+    view, которые показывает страница core:perf.
+
+    Запросы к базе, выполняемые при чтении потокового ответа,
+    в замер не попадают.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = perf.RequestTimings()
+        with ExitStack() as stack:
+            stack.enter_context(perf.recording(timings))
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(timings.execute_wrapper)
+                )
+            response = self.get_response(request)
+        response['Server-Timing'] = timings.server_timing()
+        match = request.resolver_match
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            **timings.as_dict(),
+        }
+        logger.info(json.dumps(record, ensure_ascii=False))
+        if match and random.random() < settings.PERF_SAMPLE_RATE:
+            _sample(match.view_name, record)
+        return response
+
+
+class ReplicaPinMiddleware:
+    """
+    Безопасные запросы читают из реплик, пока сессия ничего
+    не записывала. Запрос на запись закрепляет сессию за основной
+    базой на REPLICA_PIN_SECONDS, чтобы пользователь сразу видел свои
+    изменения, а затем сессия снова читает из реплик. Сессии анонимов
+    не закрепляются: иначе каждый анонимный POST создавал бы сессию.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            response = self.get_response(request)
+            # После ответа: вход в систему закрепляет только что
+            # созданную сессию, выход - не закрепляет
+            if SESSION_KEY in request.session:
+                db.pin_session(request.session)
+            return response
+        with db.reading_from(db.session_pinned(request.session)):
+            return self.get_response(request)
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware, берущий пользователя из кэша (core.auth):
+    запрос с сессией не читает таблицу пользователей.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+
+        def get_user():
+            if not hasattr(request, '_cached_user'):
+                request._cached_user = auth.get_user(request)
+            return request._cached_user
+
+        request.user = SimpleLazyObject(get_user)
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -10,3 +11,54 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Task(CreatedModel):
+    """Отложенный вызов функции, зарегистрированной через core.tasks.task."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(max_length=200, verbose_name='Функция')
+    payload = models.TextField(
+        default='{}', verbose_name='Аргументы (JSON)'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        verbose_name='Состояние'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0, verbose_name='Попыток'
+    )
+    max_attempts = models.PositiveIntegerField(
+        default=5, verbose_name='Максимум попыток'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now, verbose_name='Выполнить не раньше'
+    )
+    # Срок, после которого задачу упавшего исполнителя можно забрать
+    locked_until = models.DateTimeField(
+        null=True, blank=True, verbose_name='Занята до'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+
+    class Meta:
+        ordering = ['run_at', 'pk']
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            # Выборка готовых к выполнению задач
+            models.Index(
+                fields=['status', 'run_at'], name='task_status_run_at_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
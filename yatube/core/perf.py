@@ -0,0 +1,117 @@
+"""
+Учет времени обработки запроса.
+
+PerformanceMiddleware создает на каждый запрос RequestTimings и делает
+его текущим. Остальной код дописывает в текущий учет свои замеры:
+запросы к базе (через execute_wrapper), рендеринг шаблонов
+(core.backends.DjangoTemplates), поиск миниатюр (timing('thumbnail'))
+и обращения к кэшу (core.backends.TieredCache). Вне запроса замеры
+ничего не стоят.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        # Имя замера -> [секунды, количество]
+        self.spans = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._depth = {}
+
+    def add(self, name, seconds, count=1):
+        span = self.spans.setdefault(name, [0.0, 0])
+        span[0] += seconds
+        span[1] += count
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """Обертка для connection.execute_wrapper: время запросов к базе."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add('db', time.perf_counter() - started)
+
+    def as_dict(self):
+        data = {
+            'total_ms': round(self.elapsed() * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+        for name, (seconds, count) in self.spans.items():
+            data[f'{name}_ms'] = round(seconds * 1000, 2)
+            data[f'{name}_count'] = count
+        return data
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing."""
+        metrics = [f'total;dur={self.elapsed() * 1000:.1f}']
+        for name, (seconds, count) in self.spans.items():
+            metrics.append(
+                f'{name};dur={seconds * 1000:.1f};desc="{count}"'
+            )
+        metrics.append(
+            f'cache;desc="hits={self.cache_hits} '
+            f'misses={self.cache_misses}"'
+        )
+        return ', '.join(metrics)
+
+
+def current():
+    """Учет текущего запроса или None."""
+    return _current.get()
+
+
+@contextmanager
+def recording(timings):
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timing(name):
+    """
+    Добавляет время блока к замеру name текущего запроса.
+    Вложенные блоки с тем же именем не учитываются дважды.
+    """
+    timings = _current.get()
+    if timings is None or timings._depth.get(name):
+        yield
+        return
+    timings._depth[name] = 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._depth[name] = 0
+        timings.add(name, time.perf_counter() - started)
+
+
+def timed(name):
+    """Декоратор: время вызова функции добавляется к замеру name."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timing(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count_cache(hits, misses):
+    timings = _current.get()
+    if timings is not None:
+        timings.cache_hits += hits
+        timings.cache_misses += misses
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import auth, sqlite
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Применяет прагмы SQLITE_PRAGMAS к новому подключению и ставит
+    запросы на запись в очередь (SQLITE_SERIALIZE_WRITES).
+    """
+    if connection.vendor != 'sqlite':
+        return
+    if settings.SQLITE_PRAGMAS:
+        sqlite.apply_pragmas(connection)
+    if sqlite.serialize_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sqlite.serialize_writes)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_cached_user(sender, instance, **kwargs):
+    auth.forget_user(instance.pk)
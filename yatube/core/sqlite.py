@@ -0,0 +1,126 @@
+"""
+Настройка SQLite для работы под нагрузкой.
+
+Каждое новое подключение получает прагмы из settings.SQLITE_PRAGMAS
+(журнал WAL, synchronous=NORMAL, mmap, размер кэша страниц и ожидание
+блокировки). В режиме WAL чтения не ждут записей, но писатель в базе
+по-прежнему один: записи внутри процесса выстраиваются в очередь
+своей базы (write_queue), а между процессами их разводит busy_timeout.
+Очередь держится только на время записи: транзакции write_transaction
+или отдельного запроса на запись вне транзакции (serialize_writes),
+а не всего HTTP-запроса.
+"""
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+# Запросы, которым нужна блокировка записи SQLite
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def apply_pragmas(connection, pragmas=None):
+    """Выполняет прагмы для подключения SQLite."""
+    if pragmas is None:
+        pragmas = settings.SQLITE_PRAGMAS
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+class WriteQueue:
+    """
+    Очередь на запись: потоки процесса получают доступ по одному
+    в порядке прихода. Поток, уже стоящий в начале очереди, может
+    войти повторно.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self._owner = None
+        self._depth = 0
+
+    @contextmanager
+    def turn(self):
+        me = threading.get_ident()
+        with self._condition:
+            if self._owner == me:
+                self._depth += 1
+            else:
+                ticket = self._next_ticket
+                self._next_ticket += 1
+                while ticket != self._serving:
+                    self._condition.wait()
+                self._owner = me
+                self._depth = 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._depth -= 1
+                if not self._depth:
+                    self._owner = None
+                    self._serving += 1
+                    self._condition.notify_all()
+
+    @property
+    def waiting(self):
+        """Сколько потоков ждет очереди (не считая пишущего)."""
+        with self._condition:
+            return self._next_ticket - self._serving - bool(self._owner)
+
+
+_write_queues = {}
+
+
+def write_queue(using=None):
+    """Очередь на запись базы using (по умолчанию основной)."""
+    return _write_queues.setdefault(using or DEFAULT_DB_ALIAS, WriteQueue())
+
+
+@contextmanager
+def serialized_write(using=None):
+    """Выполняет блок в очереди на запись, если она включена."""
+    if not settings.SQLITE_SERIALIZE_WRITES:
+        yield
+        return
+    with write_queue(using).turn():
+        yield
+
+
+@contextmanager
+def write_transaction(using=None):
+    """Транзакция, занимающая очередь на запись на время своей работы."""
+    with serialized_write(using), transaction.atomic(using=using):
+        yield
+
+
+def serialize_writes(execute, sql, params, many, context):
+    """
+    Обертка выполнения запросов (connection.execute_wrappers): запрос
+    на запись вне транзакции ждет очереди только на время своего
+    выполнения. Внутри транзакции очередь не занимается: транзакция,
+    уже записавшая строки, держит блокировку SQLite, и ожидание ею
+    очереди могло бы замкнуться на ожидании этой блокировки.
+    """
+    connection = context['connection']
+    if (
+        connection.in_atomic_block
+        or not sql.lstrip().upper().startswith(WRITE_STATEMENTS)
+    ):
+        return execute(sql, params, many, context)
+    with serialized_write(connection.alias):
+        return execute(sql, params, many, context)
+
+
+def serialized(func):
+    """Декоратор: функция выполняется в очереди на запись."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with serialized_write():
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,170 @@
+"""
+Раздача статики из WSGI-приложения.
+
+StaticFilesApplication оборачивает приложение Django (yatube/wsgi.py)
+и отвечает на GET и HEAD под STATIC_URL, не доходя до Django. Файлы
+STATIC_ROOT перечисляются один раз при запуске процесса, поэтому
+запрос статики не обращается к диску за проверками, а отдать можно
+только собранный collectstatic файл.
+
+- Сжатая копия (.br, .gz из core.storage) выбирается по
+  Accept-Encoding с учетом q; с ответом уходит Vary: Accept-Encoding.
+- Файлы с хэшем в имени (значения манифеста staticfiles.json) не
+  меняются: Cache-Control: public, max-age=год, immutable. Остальные
+  кэшируются на STATIC_MAX_AGE.
+- Тело ответа - открытый файл в wsgi.file_wrapper: сервер (gunicorn,
+  uWSGI) передает его в сокет через sendfile без копирования
+  в память процесса.
+"""
+import json
+import mimetypes
+import os
+from email.utils import formatdate
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+
+BLOCK_SIZE = 64 * 1024
+# Порядок предпочтения при равных q: brotli сжимает лучше gzip
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+MANIFEST_NAME = 'staticfiles.json'
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с их q: {'gzip': 1.0, ...}."""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header, available):
+    """Кодировка из available с наибольшим q или None (без сжатия)."""
+    accepted = accepted_encodings(header)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = accepted.get(coding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def if_none_match(header):
+    """ETag из If-None-Match без признака слабого сравнения W/."""
+    return {
+        tag.strip()[2:] if tag.strip().startswith('W/') else tag.strip()
+        for tag in header.split(',')
+    }
+
+
+class StaticFile:
+    """Файл STATIC_ROOT и его сжатые копии с готовыми заголовками."""
+
+    def __init__(self, path, immutable):
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in (
+                'application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        if immutable:
+            cache_control = 'public, max-age={}, immutable'.format(
+                settings.STATIC_IMMUTABLE_MAX_AGE
+            )
+        else:
+            cache_control = f'public, max-age={settings.STATIC_MAX_AGE}'
+        self.headers = [
+            ('Content-Type', content_type),
+            ('Cache-Control', cache_control),
+        ]
+        self.variants = {None: self._variant(path)}
+        for coding, suffix in ENCODINGS:
+            if os.path.isfile(path + suffix):
+                self.variants[coding] = self._variant(path + suffix)
+        if len(self.variants) > 1:
+            self.headers.append(('Vary', 'Accept-Encoding'))
+
+    @staticmethod
+    def _variant(path):
+        stat = os.stat(path)
+        return path, [
+            ('Content-Length', str(stat.st_size)),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+            ('ETag', '"{:x}-{:x}"'.format(
+                int(stat.st_mtime), stat.st_size
+            )),
+        ]
+
+    def select(self, environ):
+        coding = choose_encoding(
+            environ.get('HTTP_ACCEPT_ENCODING', ''),
+            [coding for coding in self.variants if coding]
+        )
+        path, headers = self.variants[coding]
+        headers = self.headers + headers
+        if coding:
+            headers = headers + [('Content-Encoding', coding)]
+        return path, headers
+
+
+def scan(root):
+    """Файлы root по путям URL: {'css/site.3f2a.css': StaticFile}."""
+    files = {}
+    if not root or not os.path.isdir(root):
+        return files
+    hashed = set()
+    try:
+        with open(os.path.join(root, MANIFEST_NAME)) as manifest:
+            hashed = set(json.load(manifest).get('paths', {}).values())
+    except (OSError, ValueError):
+        pass
+    suffixes = tuple(suffix for _, suffix in ENCODINGS)
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            url = os.path.relpath(path, root).replace(os.sep, '/')
+            if url == MANIFEST_NAME or url.endswith(suffixes):
+                continue
+            files[url] = StaticFile(path, url in hashed)
+    return files
+
+
+class StaticFilesApplication:
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.prefix = prefix or settings.STATIC_URL
+        self.files = scan(root or settings.STATIC_ROOT)
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        method = environ.get('REQUEST_METHOD')
+        if method in ('GET', 'HEAD') and path.startswith(self.prefix):
+            static_file = self.files.get(path[len(self.prefix):])
+            if static_file is not None:
+                return self.serve(static_file, environ, start_response)
+        return self.application(environ, start_response)
+
+    def serve(self, static_file, environ, start_response):
+        path, headers = static_file.select(environ)
+        etag = dict(headers)['ETag']
+        if etag in if_none_match(environ.get('HTTP_IF_NONE_MATCH', '')):
+            start_response('304 Not Modified', [
+                header for header in headers
+                if header[0] != 'Content-Length'
+            ])
+            return []
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(open(path, 'rb'), BLOCK_SIZE)
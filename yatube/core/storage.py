@@ -0,0 +1,76 @@
+"""
+Хранилище статики для боевого окружения.
+
+collectstatic записывает файлы под именами с хэшем содержимого
+(css/bootstrap.min.3f2a….css) и манифест staticfiles.json, по которому
+{% static %} находит хэшированное имя. Рядом с каждым сжимаемым файлом
+кладутся его сжатые копии: .gz и, если установлен пакет brotli, .br.
+Сжатие выполняется один раз при развертывании с наибольшей степенью,
+а core.static отдает готовый вариант без сжатия на лету.
+"""
+import gzip
+from io import BytesIO
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Форматы, которые уже сжаты: повторное сжатие их не уменьшает
+SKIP_EXTENSIONS = {
+    'jpg', 'jpeg', 'png', 'gif', 'webp', 'ico', 'woff', 'woff2',
+    'zip', 'gz', 'br', 'mp4', 'webm', 'mp3',
+}
+# Сжатая копия, которая меньше исходного файла менее чем на 5%,
+# не записывается
+MIN_RATIO = 0.95
+
+
+def gzip_compress(data):
+    buffer = BytesIO()
+    # mtime=0: одинаковые файлы дают одинаковые байты при каждой сборке
+    with gzip.GzipFile(
+            fileobj=buffer, mode='wb', compresslevel=9, mtime=0) as file:
+        file.write(data)
+    return buffer.getvalue()
+
+
+def brotli_compress(data):
+    return brotli.compress(data, quality=11)
+
+
+def compressors():
+    """Кодировки и функции сжатия: {'.gz': gzip_compress, ...}."""
+    available = {'.gz': gzip_compress}
+    if brotli is not None:
+        available['.br'] = brotli_compress
+    return available
+
+
+def is_compressible(name):
+    return name.rsplit('.', 1)[-1].lower() not in SKIP_EXTENSIONS
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if is_compressible(name):
+                yield from self._compress(name)
+
+    def _compress(self, name):
+        with self.open(name) as file:
+            data = file.read()
+        for suffix, compress in compressors().items():
+            compressed = compress(data)
+            if len(compressed) >= len(data) * MIN_RATIO:
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+            yield name, name + suffix, True
@@ -0,0 +1,44 @@
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+# Место в странице, куда подставляется поток строк
+STREAM_SLOT_MARKER = '<!--stream_slot-->'
+
+
+def stream_template(request, template_name, context, rows, chunk_template,
+                    chunk_size, chunk_name='object_list'):
+    """
+    Отдает страницу частями: сначала все до переменной stream_slot
+    шаблона template_name, затем строки queryset rows, прочитанные
+    через iterator() и отрисованные шаблоном chunk_template по
+    chunk_size штук (список строк доступен в нем как chunk_name),
+    и, наконец, остаток страницы.
+
+    Первые байты уходят клиенту до чтения строк, а в памяти
+    одновременно находится не больше chunk_size объектов.
+    """
+    page = render_to_string(
+        template_name,
+        {**context, 'stream_slot': mark_safe(STREAM_SLOT_MARKER)},
+        request
+    )
+    head, tail = page.split(STREAM_SLOT_MARKER, 1)
+    chunk_template = get_template(chunk_template)
+
+    def render_chunk(chunk):
+        return chunk_template.render({chunk_name: chunk}, request)
+
+    def content():
+        yield head
+        chunk = []
+        for row in rows.iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield render_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield render_chunk(chunk)
+        yield tail
+
+    return StreamingHttpResponse(content())
@@ -0,0 +1,132 @@
+"""
+Очередь фоновых задач в таблице core.Task.
+
+Функция, помеченная @task, получает метод enqueue(*args, **kwargs):
+после фиксации текущей транзакции в очередь добавляется вызов
+с этими аргументами (они должны сериализоваться в JSON). Задачи
+выполняет команда run_tasks; выполненная задача удаляется, а упавшая
+повторяется с растущей паузой, пока не кончатся попытки. Задача,
+исполнитель которой не уложился в TASKS_LEASE_SECONDS, выполняется
+повторно, поэтому задачи должны быть идемпотентными. Задача
+с unique=True не ставится, пока в очереди ждет такой же вызов.
+
+При TASKS_EAGER (режим отладки и тесты) функция вызывается сразу,
+без очереди.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(max_attempts=5, retry_delay=10, unique=False):
+    """
+    Регистрирует функцию как задачу. Пауза перед n-й повторной
+    попыткой - retry_delay * 2 ** (n - 1) секунд.
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__name__}'
+        func.task_name = name
+        func.max_attempts = max_attempts
+        func.retry_delay = retry_delay
+        func.unique = unique
+        func.enqueue = lambda *args, **kwargs: enqueue(func, *args, **kwargs)
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(func, *args, **kwargs):
+    """Ставит вызов func(*args, **kwargs) в очередь после фиксации."""
+    if settings.TASKS_EAGER:
+        func(*args, **kwargs)
+        return
+    payload = json.dumps({'args': args, 'kwargs': kwargs})
+    transaction.on_commit(lambda: _insert(func, payload))
+
+
+def _insert(func, payload):
+    if func.unique and Task.objects.filter(
+            name=func.task_name, payload=payload, status=Task.QUEUED
+    ).exists():
+        return
+    Task.objects.create(
+        name=func.task_name,
+        payload=payload,
+        max_attempts=func.max_attempts
+    )
+
+
+def _claimable(now):
+    # Задачи в очереди и задачи исполнителей, не уложившихся в срок
+    return Q(status=Task.QUEUED, run_at__lte=now) | Q(
+        status=Task.RUNNING, locked_until__lt=now
+    )
+
+
+def claim(limit):
+    """Забирает до limit готовых задач и возвращает их идентификаторы."""
+    now = timezone.now()
+    candidates = Task.objects.filter(_claimable(now)).order_by(
+        'run_at', 'pk'
+    ).values_list('pk', flat=True)[:limit]
+    claimed = []
+    lease = now + timedelta(seconds=settings.TASKS_LEASE_SECONDS)
+    for task_id in candidates:
+        # Задачу мог забрать другой исполнитель: условие повторяется
+        updated = Task.objects.filter(_claimable(now), pk=task_id).update(
+            status=Task.RUNNING,
+            locked_until=lease,
+            attempts=F('attempts') + 1
+        )
+        if updated:
+            claimed.append(task_id)
+    return claimed
+
+
+def execute(task_id):
+    """
+    Выполняет забранную задачу и записывает результат. Возвращает None,
+    если задачи уже нет: ее выполнил исполнитель, забравший ее после
+    истечения аренды.
+    """
+    task = Task.objects.filter(pk=task_id).first()
+    if task is None:
+        return None
+    func = _registry.get(task.name)
+    try:
+        if func is None:
+            raise LookupError(f'Задача {task.name} не зарегистрирована')
+        payload = json.loads(task.payload)
+        func(*payload['args'], **payload['kwargs'])
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Задача %s (%s) упала', task.name, task.pk)
+        if task.attempts < task.max_attempts:
+            retry_delay = getattr(func, 'retry_delay', 10)
+            Task.objects.filter(pk=task.pk).update(
+                status=Task.QUEUED,
+                run_at=timezone.now() + timedelta(
+                    seconds=retry_delay * 2 ** (task.attempts - 1)
+                ),
+                locked_until=None,
+                last_error=error
+            )
+        else:
+            Task.objects.filter(pk=task.pk).update(
+                status=Task.FAILED, locked_until=None, last_error=error
+            )
+        return False
+    Task.objects.filter(pk=task.pk).delete()
+    return True
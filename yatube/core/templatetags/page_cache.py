@@ -0,0 +1,21 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..cache import USER_FRAGMENT_MARKER
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def user_fragment(context, template_name):
+    """
+    Подключает шаблон, зависящий от пользователя.
+    При рендере страницы для общего кэша вместо шаблона выводится
+    маркер, который заменяется при отдаче страницы.
+    """
+    request = context.get('request')
+    if getattr(request, 'page_cache_punch', False):
+        return mark_safe(USER_FRAGMENT_MARKER.format(template_name))
+    fragment = context.template.engine.get_template(template_name)
+    with context.push():
+        return fragment.render(context)
@@ -0,0 +1,166 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connections
+from django.test import (SimpleTestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+
+from ..backends import TieredCache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Общий кэш процессов заменен кэшем в памяти
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tiered-tests',
+    },
+}
+
+
+@override_settings(CACHES=CACHES)
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        # Два экземпляра с разными L1 изображают два процесса
+        self.first = TieredCache('first', {'OPTIONS': {'L2': 'shared'}})
+        self.second = TieredCache('second', {'OPTIONS': {'L2': 'shared'}})
+        for cache in (self.first, self.second):
+            cache.clear()
+            cache.stats.clear()
+
+    def end_request(self):
+        self.first.close()
+        self.second.close()
+
+    def test_reads_from_l1(self):
+        """Повторное чтение обслуживает L1."""
+        self.first.set('key', 'value')
+        self.end_request()
+        self.assertEqual(self.second.get('key'), 'value')
+        self.assertEqual(self.second.get('key'), 'value')
+        self.assertEqual(self.second.stats['l2_hits'], 1)
+        self.assertEqual(self.second.stats['l1_hits'], 1)
+
+    def test_invalidation_across_processes(self):
+        """Запись в одном процессе видна другому со следующего запроса."""
+        self.first.set('version', 1)
+        self.end_request()
+        self.assertEqual(self.second.get('version'), 1)
+        self.first.incr('version')
+        self.end_request()
+        self.assertEqual(self.second.get('version'), 2)
+        self.first.delete('version')
+        self.end_request()
+        self.assertIsNone(self.second.get('version'))
+
+    def test_only_written_keys_leave_l1(self):
+        """Запись другого процесса убирает из L1 только свой ключ."""
+        self.first.set_many({'a': 1, 'b': 2})
+        self.end_request()
+        self.second.get_many(['a', 'b'])
+        self.first.set('a', 3)
+        self.end_request()
+        self.assertEqual(self.second.get('a'), 3)
+        self.assertEqual(self.second.get('b'), 2)
+        self.assertEqual(self.second.stats['l2_hits'], 3)
+        self.assertEqual(self.second.stats['l1_hits'], 1)
+
+    def test_own_writes_keep_l1(self):
+        """Собственные записи не сбрасывают L1 процесса."""
+        self.first.set('a', 1)
+        self.first.get('a')
+        self.first.set('b', 2)
+        self.assertEqual(self.first.get('a'), 1)
+        self.assertEqual(self.first.stats['l1_hits'], 2)
+
+    def test_get_many_and_hit_rates(self):
+        """get_many дочитывает из L2 только недостающие ключи."""
+        self.first.set_many({'a': 1, 'b': 2})
+        self.end_request()
+        self.second.get('a')
+        self.assertEqual(
+            self.second.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2}
+        )
+        self.assertEqual(
+            self.second.hit_rates(), {'reads': 4, 'l1': 0.25, 'l2': 0.5}
+        )
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # L2 боевого окружения
+    'shared': settings.SHARED_CACHE,
+})
+class DatabaseL2Tests(TransactionTestCase):
+    databases = {settings.CACHE_DATABASE}
+
+    def setUp(self):
+        call_command('createcachetable', verbosity=0,
+                     database=settings.CACHE_DATABASE)
+        self.l2 = caches['shared']
+        self.l2.clear()
+        self.first = TieredCache('db-first', {'OPTIONS': {'L2': 'shared'}})
+        self.second = TieredCache('db-second', {'OPTIONS': {'L2': 'shared'}})
+        for cache in (self.first, self.second):
+            cache.l1.clear()
+            cache.stats.clear()
+
+    def end_request(self):
+        self.first.close()
+        self.second.close()
+
+    def test_add_is_exclusive(self):
+        """Блокировку берет один процесс, просроченную - снова можно взять."""
+        self.assertTrue(self.first.add('lock', 1, 10))
+        self.assertFalse(self.second.add('lock', 2, 10))
+        self.assertEqual(self.second.get('lock'), 1)
+        self.l2.set('expired', 1, -1)
+        self.assertTrue(self.l2.add('expired', 2, 10))
+        self.assertEqual(self.l2.get('expired'), 2)
+
+    def test_concurrent_incr(self):
+        """Увеличения из разных потоков не теряются."""
+        self.l2.set('version', 0, None)
+
+        def worker():
+            for _ in range(20):
+                caches['shared'].incr('version')
+            connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.l2.get('version'), 80)
+        with self.assertRaises(ValueError):
+            self.l2.incr('missing')
+
+    def test_invalidation_across_processes(self):
+        """Записи одного процесса видны другому со следующего запроса."""
+        self.first.set_many({'a': 1, 'b': 2})
+        self.end_request()
+        self.assertEqual(self.second.get_many(['a', 'b']), {'a': 1, 'b': 2})
+        self.first.incr('a')
+        self.end_request()
+        self.assertEqual(self.second.get('a'), 2)
+        self.assertEqual(self.second.get('b'), 2)
+        self.assertEqual(self.second.stats['l1_hits'], 1)
+        self.first.delete('b')
+        self.end_request()
+        self.assertIsNone(self.second.get('b'))
+
+    def test_write_does_not_count_rows(self):
+        """Запись не пересчитывает строки таблицы."""
+        connection = connections[settings.CACHE_DATABASE]
+        with CaptureQueriesContext(connection) as queries:
+            self.l2.set('key', 'value')
+            self.l2.set('key', 'other')
+        self.assertNotIn('COUNT', ' '.join(q['sql'] for q in queries))
+        self.assertEqual(self.l2.get('key'), 'other')
@@ -0,0 +1,78 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..db import ReplicaRouter, reading_from
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TestCase):
+    """
+    Основная база и реплика - два разных файла SQLite, и записи
+    основной базы на реплику не попадают. По отсутствию данных видно,
+    откуда читала страница.
+    """
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor1')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+        cls.url = reverse('posts:post_detail', kwargs={'post_id': cls.post.pk})
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_router(self):
+        """Чтения идут в реплику только вне закрепления за основной базой."""
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_write(Post), 'default')
+        self.assertEqual(router.db_for_read(Post), 'default')
+        with reading_from(primary=False):
+            self.assertEqual(router.db_for_read(Post), 'replica')
+
+    def test_reads_from_replica(self):
+        """Сессия без записей читает из реплики."""
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_read_after_write(self):
+        """После записи сессия читает из основной базы."""
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'}
+        )
+        self.assertContains(self.client.get(self.url), 'Комментарий')
+        self.assertEqual(Client().get(self.url).status_code, 404)
+
+    def test_login_pins_session(self):
+        """После входа в систему сессия читает из основной базы."""
+        User.objects.create_user(username='TestAuthor2', password='pass-1234')
+        client = Client()
+        client.post(
+            reverse('users:login'),
+            {'username': 'TestAuthor2', 'password': 'pass-1234'}
+        )
+        self.assertEqual(client.get(self.url).status_code, 200)
+
+    @override_settings(REPLICA_PIN_SECONDS=5)
+    def test_pin_expires(self):
+        """Через REPLICA_PIN_SECONDS сессия снова читает из реплики."""
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'}
+        )
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with mock.patch('core.db.time') as clock:
+            clock.time.return_value = time.time() + 6
+            self.assertEqual(self.client.get(self.url).status_code, 404)
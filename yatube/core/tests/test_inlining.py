@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.template import Context, Engine
+from django.test import SimpleTestCase
+
+from ..inlining import TemplateInliner
+
+TEMPLATES = {
+    'page.html': '<p>{% include "item.html" %}</p>',
+    'with.html': '{% include "item.html" with name="Мир" %}',
+    'only.html': '{% include "item.html" with name="Мир" only %}',
+    'nested.html': '{% include "page.html" %}!',
+    'item.html': 'Привет, {{ name }}',
+    'child.html': '{% extends "page.html" %}{% block a %}{% endblock %}',
+    'uses_child.html': '{% include "child.html" %}',
+    'loop.html': '{% include "loop.html" %}',
+}
+
+
+class TemplateInlinerTests(SimpleTestCase):
+    def setUp(self):
+        self.engine = Engine(loaders=[
+            ('django.template.loaders.locmem.Loader', TEMPLATES),
+        ])
+        self.inliner = TemplateInliner(self.engine)
+
+    def inline(self, name):
+        return self.inliner.inline(TEMPLATES[name], (name,))
+
+    def assertSameOutput(self, name, text):
+        context = {'name': 'Яндекс'}
+        self.assertEqual(
+            self.engine.from_string(text).render(Context(context)),
+            self.engine.get_template(name).render(Context(context)),
+        )
+
+    def test_include_replaced(self):
+        """Подключение заменяется текстом шаблона."""
+        text, count = self.inline('page.html')
+        self.assertEqual(text, '<p>Привет, {{ name }}</p>')
+        self.assertEqual(count, 1)
+        self.assertSameOutput('page.html', text)
+
+    def test_include_with_arguments(self):
+        """Аргументы подключения переходят в {% with %}."""
+        text, count = self.inline('with.html')
+        self.assertEqual(count, 1)
+        self.assertIn('{% with name="Мир" %}', text)
+        self.assertSameOutput('with.html', text)
+
+    def test_nested_includes(self):
+        """Вложенные подключения подставляются целиком."""
+        text, count = self.inline('nested.html')
+        self.assertEqual(text, '<p>Привет, {{ name }}</p>!')
+        self.assertEqual(count, 2)
+
+    def test_not_inlinable_kept(self):
+        """only, шаблоны с наследованием и циклы остаются подключениями."""
+        for name in ('only.html', 'uses_child.html', 'loop.html'):
+            with self.subTest(name=name):
+                self.assertEqual(self.inline(name), (TEMPLATES[name], 0))
+
+
+class InlineTemplatesCommandTests(SimpleTestCase):
+    def setUp(self):
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output, ignore_errors=True)
+
+    def test_project_templates_prepared(self):
+        """В каталог пишутся только шаблоны с подставленными include."""
+        call_command('inline_templates', output=self.output, stdout=StringIO())
+        path = os.path.join(self.output, 'posts', 'index.html')
+        with open(path, encoding='utf-8') as file:
+            text = file.read()
+        self.assertNotIn('{% include', text)
+        self.assertIn('{% load pagination %}', text)
+        self.assertFalse(os.path.exists(
+            os.path.join(self.output, 'posts', 'includes', 'post_card.html')
+        ))
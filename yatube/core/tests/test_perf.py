@@ -0,0 +1,94 @@
+import logging
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import middleware
+from ..middleware import slowest_requests
+
+User = get_user_model()
+
+
+class PerformanceMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor1')
+        Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        middleware._slowest.clear()
+        self.client = Client()
+
+    def test_server_timing(self):
+        """Ответ содержит замеры базы, шаблонов и кэша."""
+        with self.assertLogs('core.perf', 'INFO') as logs:
+            response = self.client.get(reverse('posts:index'))
+        server_timing = response['Server-Timing']
+        for metric in ('total;dur=', 'db;dur=', 'template;dur=', 'cache;'):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, server_timing)
+        self.assertIn('"view": "posts:index"', logs.output[0])
+
+    def test_record_reaches_configured_handler(self):
+        """Запись замеров доходит до обработчика из LOGGING."""
+        perf_logger = logging.getLogger('core.perf')
+        self.assertTrue(perf_logger.isEnabledFor(logging.INFO))
+        self.assertTrue(perf_logger.handlers)
+        handler = perf_logger.handlers[0]
+        with mock.patch.object(handler, 'emit') as emit:
+            self.client.get(reverse('posts:index'))
+        record = emit.call_args[0][0]
+        self.assertIn('"view": "posts:index"', record.getMessage())
+
+    @override_settings(PERF_SAMPLE_RATE=1, PERF_SLOWEST_PER_VIEW=2)
+    def test_slowest_requests(self):
+        """Для каждого view хранятся самые медленные запросы."""
+        for _ in range(3):
+            self.client.get(reverse('posts:index'))
+        slowest = slowest_requests()
+        self.assertEqual(len(slowest['posts:index']), 2)
+        totals = [sample['total_ms'] for sample in slowest['posts:index']]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+
+    @override_settings(PERF_SLOWEST_PER_VIEW=2)
+    def test_samples_from_threads_and_processes(self):
+        """Замеры потоков не теряются, замеры процессов объединяются."""
+        threads = [
+            threading.Thread(
+                target=middleware._sample,
+                args=(f'view{number}', {'total_ms': number})
+            )
+            for number in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Замеры другого процесса под следующим номером
+        other = cache.incr(middleware.PROCESSES_KEY)
+        cache.set(middleware.SLOWEST_KEY.format(other), {
+            'view0': [{'total_ms': 10}, {'total_ms': 5}],
+        })
+        slowest = slowest_requests()
+        self.assertEqual(len(slowest), 8)
+        self.assertEqual(
+            slowest['view0'], [{'total_ms': 10}, {'total_ms': 5}]
+        )
+        self.assertEqual(slowest['view7'], [{'total_ms': 7}])
+
+    def test_dashboard_for_staff_only(self):
+        """Страница замеров доступна только персоналу."""
+        url = reverse('core:perf')
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,139 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connections
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class CachedSessionTests(TestCase):
+    # Общий кэш в боевом окружении лежит в базе 'cache': запросы к ней
+    # тоже считаются
+    databases = {'default', 'cache'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='TestUser', password='secret-password'
+        )
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.url = reverse('about:author')
+        self.client = Client()
+
+    def queries(self, client):
+        with CaptureQueriesContext(connections['default']) as queries, \
+                CaptureQueriesContext(connections['cache']) as cache_queries:
+            response = client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in [*queries, *cache_queries]]
+
+    def test_anonymous_request(self):
+        """Анонимный запрос не обращается к базе."""
+        self.assertEqual(self.queries(self.client), [])
+
+    def test_authenticated_request(self):
+        """Сессия и пользователь читаются из кэша."""
+        self.client.force_login(self.user)
+        first = self.queries(self.client)
+        self.assertFalse(any('django_session' in sql for sql in first))
+        self.assertEqual(len(first), 1)
+        self.assertEqual(self.queries(self.client), [])
+
+    def test_session_survives_cache_loss(self):
+        """Сессия, вытесненная из кэша, читается из базы."""
+        self.client.force_login(self.user)
+        caches['shared'].clear()
+        response = self.client.get(self.url)
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+    def test_user_save_invalidates(self):
+        """Сохранение пользователя сбрасывает его копию в кэше."""
+        self.client.force_login(self.user)
+        self.client.get(self.url)
+        User.objects.filter(pk=self.user.pk).update(first_name='Лев')
+        # update() сигналов не посылает: в кэше прежняя копия
+        self.assertEqual(
+            self.client.get(self.url).wsgi_request.user.first_name, ''
+        )
+        user = User.objects.get(pk=self.user.pk)
+        user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.wsgi_request.user.first_name, 'Лев')
+
+    def test_password_change_logs_out(self):
+        user = User.objects.create_user(
+            username='TestUser2', password='secret-password'
+        )
+        self.client.force_login(user)
+        self.client.get(self.url)
+        user.set_password('new-secret-password')
+        user.save()
+        response = self.client.get(self.url)
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+
+@override_settings(CACHES={
+    'default': settings.CACHES['default'],
+    # L2 боевого окружения
+    'shared': settings.SHARED_CACHE,
+})
+class DatabaseCachedSessionTests(TransactionTestCase):
+    databases = {'default', settings.CACHE_DATABASE}
+
+    def setUp(self):
+        call_command('createcachetable', verbosity=0,
+                     database=settings.CACHE_DATABASE)
+        caches['shared'].clear()
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='TestUser', password='secret-password'
+        )
+        self.client = Client()
+
+    def test_session_read_from_cache_database(self):
+        """Сессия и пользователь читаются из базы кэша, а не из основной."""
+        self.client.force_login(self.user)
+        self.client.get(reverse('about:author'))
+        cache_db = connections[settings.CACHE_DATABASE]
+        with CaptureQueriesContext(connections['default']) as queries, \
+                CaptureQueriesContext(cache_db) as cache_queries:
+            response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.wsgi_request.user, self.user)
+        self.assertEqual(len(queries), 0)
+        self.assertTrue(cache_queries)
+        for query in cache_queries:
+            self.assertIn('yatube_cache', query['sql'])
+
+
+class PurgeSessionsTests(TestCase):
+    def test_expired_sessions_deleted(self):
+        now = timezone.now()
+        for number in range(5):
+            Session.objects.create(
+                session_key=f'expired{number}', session_data='',
+                expire_date=now - timedelta(days=1)
+            )
+        Session.objects.create(
+            session_key='active', session_data='',
+            expire_date=now + timedelta(days=1)
+        )
+        out = StringIO()
+        call_command('purge_sessions', batch=2, pause=0, stdout=out)
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['active']
+        )
+        self.assertIn('Удалено сессий: 5', out.getvalue())
@@ -0,0 +1,98 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from ..sqlite import WriteQueue, serialize_writes, write_queue
+
+
+class SqlitePragmaTests(TestCase):
+    def test_pragmas_applied(self):
+        """Новое подключение получает прагмы профиля."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            # 1 - NORMAL
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+
+class WriteQueueTests(SimpleTestCase):
+    def test_writes_serialized_in_order(self):
+        """Записи выполняются по одному в порядке прихода."""
+        queue = WriteQueue()
+        order = []
+        active = []
+        overlaps = []
+
+        def write(number):
+            with queue.turn():
+                active.append(number)
+                overlaps.append(len(active))
+                time.sleep(0.01)
+                order.append(number)
+                active.remove(number)
+
+        threads = []
+        with queue.turn():
+            for number in range(5):
+                thread = threading.Thread(target=write, args=(number,))
+                thread.start()
+                threads.append(thread)
+                while queue.waiting < number + 1:
+                    time.sleep(0.001)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, list(range(5)))
+        self.assertEqual(max(overlaps), 1)
+
+    def test_reentrant(self):
+        """Поток, уже получивший очередь, входит в нее повторно."""
+        queue = WriteQueue()
+        with queue.turn():
+            with queue.turn():
+                self.assertEqual(queue.waiting, 0)
+
+
+class SerializeWritesTests(SimpleTestCase):
+    def setUp(self):
+        self.executed = []
+
+    def execute(self, sql, params, many, context):
+        self.executed.append(sql)
+
+    def run_query(self, sql, in_atomic_block=False):
+        context = {'connection': SimpleNamespace(
+            alias='default', in_atomic_block=in_atomic_block
+        )}
+        serialize_writes(self.execute, sql, None, False, context)
+
+    def test_write_waits_for_queue(self):
+        """Запрос на запись вне транзакции ждет очереди."""
+        queue = write_queue()
+        with queue.turn():
+            thread = threading.Thread(
+                target=self.run_query, args=('UPDATE posts_post SET x = 1',)
+            )
+            thread.start()
+            while not queue.waiting:
+                time.sleep(0.001)
+            self.assertEqual(self.executed, [])
+        thread.join()
+        self.assertEqual(self.executed, ['UPDATE posts_post SET x = 1'])
+
+    def test_reads_and_transactions_pass(self):
+        """Чтения и запросы внутри транзакции очередь не занимают."""
+        queue = write_queue()
+        with queue.turn():
+            thread = threading.Thread(target=lambda: (
+                self.run_query('SELECT 1'),
+                self.run_query('INSERT INTO t VALUES (1)', True),
+            ))
+            thread.start()
+            thread.join()
+        self.assertEqual(
+            self.executed, ['SELECT 1', 'INSERT INTO t VALUES (1)']
+        )
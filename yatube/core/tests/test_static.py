@@ -0,0 +1,168 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .. import storage
+from ..static import StaticFilesApplication, choose_encoding
+
+CSS = (
+    '.logo { background: url("../img/logo.png"); }\n'
+    + '.row { margin: 0 auto; padding: 0; }\n' * 200
+)
+PNG = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 4
+
+
+def django_app(environ, start_response):
+    start_response('404 Not Found', [('Content-Type', 'text/plain')])
+    return [b'django']
+
+
+class StaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        for name, content in (('css/site.css', CSS.encode()),
+                              ('img/logo.png', PNG)):
+            path = os.path.join(cls.source, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(content)
+        cls.settings = override_settings(
+            STATIC_ROOT=cls.root,
+            STATICFILES_DIRS=[cls.source],
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'
+            ),
+        )
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        cls.css = staticfiles_storage.stored_name('css/site.css')
+        cls.png = staticfiles_storage.stored_name('img/logo.png')
+        with open(os.path.join(cls.root, cls.css), 'rb') as file:
+            cls.css_content = file.read()
+        cls.app = StaticFilesApplication(django_app)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def request(self, path, method='get', **headers):
+        environ = getattr(RequestFactory(), method)(path, **headers).environ
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        body = b''.join(self.app(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def test_hashed_names_and_compressed_copies(self):
+        self.assertRegex(self.css, r'^css/site\.[0-9a-f]{12}\.css$')
+        path = os.path.join(self.root, self.css)
+        with open(path + '.gz', 'rb') as file:
+            self.assertEqual(gzip.decompress(file.read()), self.css_content)
+        self.assertEqual(
+            os.path.exists(path + '.br'), storage.brotli is not None
+        )
+        # Ссылка внутри CSS тоже ведет на имя с хэшем
+        self.assertIn(self.png.split('/')[-1].encode(), self.css_content)
+        # Уже сжатые форматы не сжимаются повторно
+        self.assertFalse(
+            os.path.exists(os.path.join(self.root, self.png + '.gz'))
+        )
+
+    def test_choose_encoding(self):
+        cases = (
+            ('gzip, deflate, br', ['br', 'gzip'], 'br'),
+            ('gzip', ['br', 'gzip'], 'gzip'),
+            ('br;q=0.5, gzip', ['br', 'gzip'], 'gzip'),
+            ('gzip;q=0, *', ['gzip'], None),
+            ('*', ['br', 'gzip'], 'br'),
+            ('', ['br', 'gzip'], None),
+            ('identity', ['gzip'], None),
+        )
+        for header, available, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(choose_encoding(header, available), expected)
+
+    def test_gzip_served(self):
+        status, headers, body = self.request(
+            '/static/' + self.css, HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(headers['Content-Type'], 'text/css; charset=utf-8')
+        self.assertEqual(int(headers['Content-Length']), len(body))
+        self.assertIn('immutable', headers['Cache-Control'])
+        self.assertEqual(gzip.decompress(body), self.css_content)
+
+    def test_identity_served(self):
+        status, headers, body = self.request('/static/' + self.css)
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(body, self.css_content)
+
+    def test_unhashed_name_not_immutable(self):
+        status, headers, body = self.request('/static/img/logo.png')
+        self.assertEqual(status, '200 OK')
+        self.assertNotIn('immutable', headers['Cache-Control'])
+        self.assertNotIn('Vary', headers)
+        self.assertEqual(body, PNG)
+
+    def test_not_modified(self):
+        _, headers, _ = self.request('/static/' + self.png)
+        status, _, body = self.request(
+            '/static/' + self.png, HTTP_IF_NONE_MATCH=headers['ETag']
+        )
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+
+    def test_head(self):
+        status, headers, body = self.request('/static/' + self.png, 'head')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(int(headers['Content-Length']), len(PNG))
+        self.assertEqual(body, b'')
+
+    def test_passed_to_django(self):
+        """Прочие запросы, в том числе к несобранным файлам, идут в Django."""
+        for path, method in (('/static/css/missing.css', 'get'),
+                             ('/static/staticfiles.json', 'get'),
+                             ('/static/../../etc/passwd', 'get'),
+                             ('/static/' + self.css, 'post'),
+                             ('/', 'get')):
+            with self.subTest(path=path, method=method):
+                _, _, body = self.request(path, method)
+                self.assertEqual(body, b'django')
+
+    def test_file_wrapper_used(self):
+        """Файл передается серверу целиком, для sendfile."""
+        wrapped = []
+
+        def file_wrapper(file, block_size):
+            wrapped.append(file.name)
+            file.close()
+            return []
+
+        environ = RequestFactory().get('/static/' + self.png).environ
+        environ['wsgi.file_wrapper'] = file_wrapper
+        self.app(environ, lambda status, headers: None)
+        self.assertEqual(wrapped, [os.path.join(self.root, self.png)])
+
+    @unittest.skipIf(storage.brotli is None, 'brotli не установлен')
+    def test_brotli_preferred(self):
+        _, headers, _ = self.request(
+            '/static/' + self.css, HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertEqual(headers['Content-Encoding'], 'br')
@@ -0,0 +1,103 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DatabaseError, transaction
+from django.test import TransactionTestCase, override_settings
+
+from ..models import Task
+from ..tasks import claim, execute, task
+
+calls = []
+
+
+@task()
+def record(value):
+    calls.append(value)
+
+
+@task(unique=True)
+def record_once(value):
+    calls.append(value)
+
+
+@task(max_attempts=2, retry_delay=0)
+def explode():
+    raise RuntimeError('Ошибка задачи')
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_tasks(self):
+        call_command('run_tasks', once=True, workers=2, stdout=StringIO())
+
+    def test_enqueue_on_commit(self):
+        """Задача попадает в очередь только после фиксации транзакции."""
+        with transaction.atomic():
+            record.enqueue('значение')
+            self.assertFalse(Task.objects.exists())
+        self.assertEqual(Task.objects.get().name, record.task_name)
+        self.run_tasks()
+        self.assertEqual(calls, ['значение'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_rollback_drops_task(self):
+        """Откат транзакции отменяет постановку задачи."""
+        with transaction.atomic():
+            record.enqueue('значение')
+            transaction.set_rollback(True)
+        self.assertFalse(Task.objects.exists())
+
+    def test_retries_then_fails(self):
+        """Упавшая задача повторяется, пока не кончатся попытки."""
+        explode.enqueue()
+        # Повтор без паузы выполняется тем же запуском команды
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.run_tasks()
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(task.attempts, 2)
+        self.assertIn('Ошибка задачи', task.last_error)
+
+    def test_claim_once(self):
+        """Задачу забирает только один исполнитель."""
+        record.enqueue(1)
+        self.assertEqual(len(claim(10)), 1)
+        self.assertEqual(claim(10), [])
+
+    def test_missing_task_skipped(self):
+        """Задачу, удаленную после выдачи, исполнитель пропускает."""
+        record.enqueue(1)
+        task_id, = claim(10)
+        Task.objects.all().delete()
+        self.assertIsNone(execute(task_id))
+        self.assertEqual(calls, [])
+
+    def test_queue_error_does_not_stop_worker(self):
+        """Сбой выполнения задачи не останавливает run_tasks."""
+        record.enqueue(1)
+        stdout = StringIO()
+        with mock.patch('core.tasks.execute', side_effect=DatabaseError), \
+                self.assertLogs('core.tasks', 'ERROR'):
+            call_command('run_tasks', once=True, stdout=stdout)
+        self.assertIn('с ошибкой: 1', stdout.getvalue())
+
+    def test_unique_task_queued_once(self):
+        """Такой же вызов unique-задачи, ждущий в очереди, не дублируется."""
+        record_once.enqueue(1)
+        record_once.enqueue(1)
+        record_once.enqueue(2)
+        self.assertEqual(Task.objects.count(), 2)
+        record.enqueue(1)
+        record.enqueue(1)
+        self.assertEqual(Task.objects.count(), 4)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager(self):
+        """В режиме TASKS_EAGER задача выполняется сразу."""
+        record.enqueue('сразу')
+        self.assertEqual(calls, ['сразу'])
+        self.assertFalse(Task.objects.exists())
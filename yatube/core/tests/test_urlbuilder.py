@@ -0,0 +1,64 @@
+from django.template import Context, Template
+from django.test import SimpleTestCase
+from django.urls import NoReverseMatch, reverse, set_script_prefix
+
+from ..urlbuilder import build_url
+
+ROUTES = [
+    ('posts:index', ()),
+    ('posts:profile', ('leo',)),
+    ('posts:profile', ('Лев Толстой',)),
+    ('posts:profile', ('a%b?c',)),
+    ('posts:post_detail', (15,)),
+    ('posts:post_edit', ('15',)),
+    ('posts:group_list', ('cats',)),
+    ('api:post_detail', (15,)),
+    ('admin:index', ()),
+]
+
+
+class BuildUrlTests(SimpleTestCase):
+    def test_same_as_reverse(self):
+        """Адрес совпадает с адресом reverse()."""
+        for viewname, args in ROUTES:
+            with self.subTest(viewname=viewname, args=args):
+                self.assertEqual(
+                    build_url(viewname, *args), reverse(viewname, args=args)
+                )
+
+    def test_keyword_arguments(self):
+        self.assertEqual(
+            build_url('posts:post_detail', post_id=15),
+            reverse('posts:post_detail', kwargs={'post_id': 15})
+        )
+
+    def test_invalid_arguments(self):
+        """Неподходящие аргументы дают NoReverseMatch, как в reverse()."""
+        calls = [
+            ('posts:post_detail', ('abc',), {}),
+            ('posts:post_detail', (), {}),
+            ('posts:post_detail', (1, 2), {}),
+            ('posts:post_detail', (), {'slug': 'cats'}),
+            ('posts:profile', ('a/b',), {}),
+            ('posts:missing', (), {}),
+        ]
+        for viewname, args, kwargs in calls:
+            with self.subTest(viewname=viewname, args=args, kwargs=kwargs):
+                with self.assertRaises(NoReverseMatch):
+                    build_url(viewname, *args, **kwargs)
+
+    def test_script_prefix(self):
+        """Учитывается префикс, под которым подключено приложение."""
+        set_script_prefix('/yatube/')
+        self.addCleanup(set_script_prefix, '/')
+        self.assertEqual(
+            build_url('posts:post_detail', 15), '/yatube/posts/15/'
+        )
+
+    def test_template_tag(self):
+        template = Template(
+            "{% load links %}{% url_for 'posts:profile' username %}"
+        )
+        self.assertEqual(
+            template.render(Context({'username': 'leo'})), '/profile/leo/'
+        )
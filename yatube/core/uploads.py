@@ -0,0 +1,64 @@
+"""
+Прием загружаемых файлов.
+
+Сайт принимает только картинки, поэтому обработчик загрузки проверяет
+сигнатуру файла по первым байтам и размер по ходу приема, еще до того,
+как файл попадет к форме. Файл всегда пишется во временный файл
+на диске, а не в память процесса.
+"""
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+
+# Первые байты файлов поддерживаемых форматов
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+)
+
+
+def sniff_image(header):
+    """Формат картинки по первым байтам файла или None."""
+    for signature, image_format in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'WEBP'
+    return None
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """
+    Пишет загрузку во временный файл и перестает писать, как только
+    размер превысит FILE_UPLOAD_MAX_BYTES или первые байты окажутся
+    не картинкой. Остаток такой загрузки пропускается, а файл получает
+    атрибут upload_error с причиной, по которой форма его отклонит.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.upload_error = None
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.upload_error:
+            return None
+        if start == 0 and sniff_image(raw_data) is None:
+            self.upload_error = (
+                'Загрузите картинку в формате JPEG, PNG, GIF или WebP.'
+            )
+            return None
+        self.received += len(raw_data)
+        if self.received > settings.FILE_UPLOAD_MAX_BYTES:
+            self.upload_error = 'Размер файла не должен превышать {}.'.format(
+                filesizeformat(settings.FILE_UPLOAD_MAX_BYTES)
+            )
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.upload_error = self.upload_error
+        return file
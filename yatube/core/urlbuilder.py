@@ -0,0 +1,116 @@
+"""
+Построение адресов без reverse().
+
+reverse() на каждом вызове проходит пространства имен, перебирает
+варианты шаблона адреса и сверяет результат с регулярным выражением.
+Здесь шаблон адреса для имени разбирается один раз на URLconf (при
+первом обращении), а адрес собирается подстановкой значений в строку
+формата. Значения проверяются регулярными выражениями конвертеров
+path(), поэтому неподходящие аргументы, как и в reverse(), дают
+NoReverseMatch.
+
+Имена, которые так собрать нельзя (несколько шаблонов с одним именем,
+re_path(), вложенные пространства имен), передаются в reverse().
+"""
+import re
+from urllib.parse import quote
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import (NoReverseMatch, get_resolver, get_script_prefix,
+                         get_urlconf, reverse)
+from django.urls.resolvers import get_ns_resolver
+from django.utils.http import RFC3986_SUBDELIMS
+
+SAFE = RFC3986_SUBDELIMS + '/~:@'
+
+# (URLconf, имя) -> Route или None, если имя собирает reverse()
+_routes = {}
+
+
+class Route:
+    """Разобранный шаблон адреса: строка формата и конвертеры."""
+
+    def __init__(self, viewname, result, params, converters):
+        self.viewname = viewname
+        self.format = result
+        self.params = params
+        self.converters = [
+            (param, converters[param],
+             re.compile(converters[param].regex).fullmatch)
+            for param in params
+        ]
+
+    def build(self, args, kwargs):
+        if args:
+            if kwargs or len(args) != len(self.params):
+                raise self.no_match(args, kwargs)
+            kwargs = dict(zip(self.params, args))
+        elif len(kwargs) != len(self.params):
+            raise self.no_match(args, kwargs)
+        values = {}
+        for param, converter, match in self.converters:
+            try:
+                text = str(converter.to_url(kwargs[param]))
+            except KeyError:
+                raise self.no_match(args, kwargs) from None
+            if not match(text):
+                raise self.no_match(args, kwargs)
+            if not (text.isascii() and text.isalnum()):
+                text = quote(text, safe=SAFE)
+            values[param] = text
+        return get_script_prefix() + self.format % values
+
+    def no_match(self, args, kwargs):
+        return NoReverseMatch(
+            f"Reverse for '{self.viewname}' with arguments '{args}' "
+            f"and keyword arguments '{kwargs}' not found."
+        )
+
+
+def _compile(viewname, urlconf):
+    resolver = get_resolver(urlconf)
+    *namespaces, name = viewname.split(':')
+    if len(namespaces) > 1:
+        return None
+    if namespaces:
+        try:
+            ns_pattern, resolver = resolver.namespace_dict[namespaces[0]]
+        except KeyError:
+            return None
+        if ns_pattern:
+            resolver = get_ns_resolver(
+                ns_pattern, resolver,
+                tuple(resolver.pattern.converters.items())
+            )
+    possibilities = resolver.reverse_dict.getlist(name)
+    if len(possibilities) != 1:
+        return None
+    possibility, pattern, defaults, converters = possibilities[0]
+    if len(possibility) != 1 or defaults:
+        return None
+    result, params = possibility[0]
+    if any(param not in converters for param in params):
+        return None
+    return Route(viewname, result, params, converters)
+
+
+def build_url(viewname, *args, **kwargs):
+    """
+    То же, что reverse(viewname, args=args, kwargs=kwargs),
+    для имени вида 'пространство:имя' или 'имя'.
+    """
+    key = (get_urlconf(), viewname)
+    try:
+        route = _routes[key]
+    except KeyError:
+        route = _routes[key] = _compile(viewname, key[0])
+    if route is None:
+        return reverse(viewname, args=args or None, kwargs=kwargs or None)
+    return route.build(args, kwargs)
+
+
+@receiver(setting_changed)
+def reset_routes(*, setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        _routes.clear()
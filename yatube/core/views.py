@@ -1,5 +1,10 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import caches
 from django.shortcuts import render
 
+from .middleware import slowest_requests
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +20,17 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@staff_member_required
+def perf_dashboard(request):
+    """Самые медленные запросы по каждому view и попадания в кэш."""
+    cache_tiers = {
+        alias: caches[alias].hit_rates()
+        for alias in settings.CACHES
+        if hasattr(caches[alias], 'hit_rates')
+    }
+    return render(request, 'core/perf.html', {
+        'slowest': slowest_requests(),
+        'cache_tiers': cache_tiers,
+    })
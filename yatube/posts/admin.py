@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Comment, Group, Post
+from .search import ranked_posts
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,6 +11,14 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по тексту идет через поисковый индекс, а не LIKE."""
+        if not search_term:
+            return queryset, False
+        return queryset.filter(
+            pk__in=ranked_posts(search_term).values('post')
+        ), False
+
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('pk', 'post', 'author', 'text')
@@ -0,0 +1,90 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from core.cache import bump_version, get_versions, invalidate_page_cache
+
+# Время последнего изменения данных, видимых на страницах постов
+POSTS_CHANGED_KEY = 'posts:changed_at'
+# Префикс закэшированной главной страницы (versioned_cache_page)
+INDEX_PAGE = 'index_page'
+
+
+def post_version_key(post_id):
+    return f'version:post:{post_id}'
+
+
+def user_version_key(user_id):
+    return f'version:user:{user_id}'
+
+
+def group_version_key(group_id):
+    return f'version:group:{group_id}'
+
+
+def card_versions(post):
+    """Версии поста, автора и группы, от которых зависит карточка поста."""
+    return get_versions(
+        post_version_key(post.pk),
+        user_version_key(post.author_id),
+        group_version_key(post.group_id),
+    )
+
+
+def touch_posts():
+    """Отмечает изменение постов, комментариев, подписок, авторов или групп."""
+    def touch():
+        cache.set(POSTS_CHANGED_KEY, time.time(), None)
+
+    # После фиксации - чтобы ответ, собранный другим запросом до фиксации,
+    # не получил Last-Modified позже отметки и не остался в кэше клиента
+    touch()
+    transaction.on_commit(touch)
+
+
+def posts_changed_at():
+    """
+    Время последнего изменения (timestamp). Если ключ вытеснен из кэша,
+    изменение считается только что произошедшим.
+    """
+    changed_at = cache.get(POSTS_CHANGED_KEY)
+    if changed_at is None:
+        cache.add(POSTS_CHANGED_KEY, time.time(), None)
+        changed_at = cache.get(POSTS_CHANGED_KEY, time.time())
+    return changed_at
+
+
+def _bump_versions(*keys):
+    """Сбрасывает версии сейчас и еще раз после фиксации транзакции."""
+    def bump():
+        for key in keys:
+            bump_version(key)
+
+    # Сразу - чтобы изменение видел сам пишущий запрос; после фиксации -
+    # чтобы сбросить карточки, которые другие запросы успели собрать из
+    # базы до фиксации
+    bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_post(post_id):
+    _bump_versions(post_version_key(post_id))
+    touch_posts()
+
+
+def invalidate_user(user_id):
+    _bump_versions(user_version_key(user_id))
+    touch_posts()
+
+
+def invalidate_group(group_id):
+    _bump_versions(group_version_key(group_id))
+    touch_posts()
+
+
+def invalidate_index():
+    # Как и в _bump_versions: еще раз после фиксации, чтобы сбросить
+    # страницу, собранную другим запросом до фиксации
+    invalidate_page_cache(INDEX_PAGE)
+    transaction.on_commit(lambda: invalidate_page_cache(INDEX_PAGE))
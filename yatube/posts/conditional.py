@@ -0,0 +1,108 @@
+"""
+Условные GET-запросы для страниц постов.
+
+Валидаторы страницы строятся из одной строки, выбранной по индексу
+(дата последнего поста группы или автора, дата изменения поста),
+и отметки posts_changed_at, которую сигналы обновляют при любом
+изменении данных, видимых на страницах. Повторный визит стоит одного
+запроса и ответа 304 без рендеринга шаблона.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.db.models import OuterRef, Subquery
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .cache import posts_changed_at
+from .models import Group, Post, User
+
+
+def _latest_pub_date(**filters):
+    return Subquery(
+        Post.objects.filter(**filters).order_by(
+            '-pub_date', '-pk'
+        ).values('pub_date')[:1]
+    )
+
+
+def index_state(request):
+    return Post.objects.order_by('-pub_date', '-pk').values_list(
+        'pub_date', 'pk'
+    ).first() or (None, None)
+
+
+def group_state(request, slug):
+    return Group.objects.filter(slug=slug).annotate(
+        last_pub_date=_latest_pub_date(group=OuterRef('pk'))
+    ).values_list('last_pub_date', 'pk', 'posts_count').first()
+
+
+def profile_state(request, username):
+    return User.objects.filter(username=username).annotate(
+        last_pub_date=_latest_pub_date(author=OuterRef('pk'))
+    ).values_list('last_pub_date', 'pk').first()
+
+
+def post_state(request, post_id):
+    return Post.objects.filter(pk=post_id).values_list(
+        'updated', 'pk', 'comments_count'
+    ).first()
+
+
+def page_validators(request, state):
+    """
+    (ETag, Last-Modified) страницы по строке state, первым полем
+    которой идет дата. Страница содержит шапку пользователя, поэтому
+    ETag зависит от него, а сам ETag слабый: токен CSRF в формах
+    меняется от рендеринга к рендерингу.
+    """
+    changed_at = posts_changed_at()
+    last_modified = datetime.fromtimestamp(changed_at, timezone.utc)
+    if state[0] is not None:
+        last_modified = max(last_modified, state[0])
+    etag = hashlib.md5(repr((
+        request.user.pk, request.get_full_path(), changed_at, state
+    )).encode()).hexdigest()
+    return f'W/"{etag}"', last_modified
+
+
+def conditional_page(get_state):
+    """
+    Отвечает 304, если страница не менялась с прошлого визита.
+    get_state(request, *args, **kwargs) возвращает строку состояния
+    страницы или None, если объекта нет (тогда отработает 404 view).
+    """
+    def validators(request, *args, **kwargs):
+        if not hasattr(request, 'page_validators'):
+            state = get_state(request, *args, **kwargs)
+            request.page_validators = (
+                None if state is None else page_validators(request, state)
+            )
+        return request.page_validators or (None, None)
+
+    def etag(request, *args, **kwargs):
+        return validators(request, *args, **kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return validators(request, *args, **kwargs)[1]
+
+    def decorator(view):
+        conditional_view = condition(
+            etag_func=etag, last_modified_func=last_modified
+        )(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                # Браузер и CDN хранят страницу, но проверяют ее
+                # актуальность на каждом запросе
+                patch_vary_headers(response, ('Cookie',))
+                patch_cache_control(response, max_age=0, must_revalidate=True)
+                if request.user.is_authenticated:
+                    patch_cache_control(response, private=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,93 @@
+"""
+Денормализованные счетчики постов, комментариев и подписок.
+
+Счетчики изменяются выражениями F() в той же транзакции, что и запись,
+поэтому параллельные запросы не теряют обновлений. Полный пересчет
+выполняет reconcile (команда reconcile_counters).
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+def _add(queryset, field, delta):
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gt': 0})
+    queryset.update(**{field: F(field) + delta})
+
+
+def _add_author(user_id, field, delta):
+    if delta > 0:
+        AuthorStats.objects.get_or_create(user_id=user_id)
+    _add(AuthorStats.objects.filter(pk=user_id), field, delta)
+
+
+def post_added(post):
+    _add_author(post.author_id, 'posts_count', 1)
+    if post.group_id:
+        _add(Group.objects.filter(pk=post.group_id), 'posts_count', 1)
+
+
+def post_removed(post):
+    _add_author(post.author_id, 'posts_count', -1)
+    if post.group_id:
+        _add(Group.objects.filter(pk=post.group_id), 'posts_count', -1)
+
+
+def post_group_changed(old_group_id, new_group_id):
+    if old_group_id:
+        _add(Group.objects.filter(pk=old_group_id), 'posts_count', -1)
+    if new_group_id:
+        _add(Group.objects.filter(pk=new_group_id), 'posts_count', 1)
+
+
+def comment_added(comment):
+    _add(Post.objects.filter(pk=comment.post_id), 'comments_count', 1)
+
+
+def comment_removed(comment):
+    _add(Post.objects.filter(pk=comment.post_id), 'comments_count', -1)
+
+
+def follow_added(follow):
+    _add_author(follow.user_id, 'following_count', 1)
+    _add_author(follow.author_id, 'followers_count', 1)
+
+
+def follow_removed(follow):
+    _add_author(follow.user_id, 'following_count', -1)
+    _add_author(follow.author_id, 'followers_count', -1)
+
+
+def _count(queryset, field):
+    """Подзапрос COUNT(*) по внешнему ключу field."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+                field
+            ).annotate(total=Count('pk')).values('total')
+        ),
+        0
+    )
+
+
+def reconcile():
+    """Пересчитывает все счетчики по данным таблиц."""
+    AuthorStats.objects.bulk_create(
+        (
+            AuthorStats(user_id=user_id)
+            for user_id in User.objects.filter(
+                stats__isnull=True
+            ).values_list('pk', flat=True).iterator()
+        )
+    )
+    AuthorStats.objects.update(
+        posts_count=_count(Post.objects.all(), 'author'),
+        followers_count=_count(Follow.objects.all(), 'author'),
+        following_count=_count(Follow.objects.all(), 'user'),
+    )
+    Group.objects.update(posts_count=_count(Post.objects.all(), 'group'))
+    Post.objects.update(
+        comments_count=_count(Comment.objects.all(), 'post')
+    )
@@ -0,0 +1,290 @@
+"""
+Лента подписок с разверткой при записи (fan-out-on-write).
+
+Новый пост сразу раскладывается по лентам подписчиков автора
+(таблица FeedEntry), поэтому чтение ленты не соединяет Follow и Post.
+Когда у автора становится больше FEED_FANOUT_MAX_FOLLOWERS подписчиков,
+развертка выключается (AuthorStats.feed_fanout): его посты подмешиваются
+при чтении. Когда подписчиков снова не больше порога, посты автора
+раскладываются по лентам заново, и только после этого развертка
+включается.
+
+Страница ленты выбирается по ключу (pub_date, id): записи FeedEntry
+читаются по индексу (user, -pub_date, -post) без сортировки, посты
+авторов без развертки - в том же диапазоне ключей. Ключи сливаются,
+и посты страницы загружаются по id.
+"""
+import copy
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import AuthorStats, FeedEntry, Follow, Post
+from .utils import CURSOR_NEXT, CURSOR_PREVIOUS, keyset_filter
+
+
+def is_fanout_author(author_id):
+    """Раскладываются ли посты автора по лентам подписчиков."""
+    fanout = AuthorStats.objects.filter(
+        pk=author_id
+    ).values_list('feed_fanout', flat=True).first()
+    return fanout is not False
+
+
+def fanout_post(post):
+    """Добавляет новый пост в ленты подписчиков автора."""
+    if not is_fanout_author(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                post_id=post.pk,
+                author_id=post.author_id,
+                pub_date=post.pub_date
+            )
+            for user_id in followers.iterator()
+        ),
+        ignore_conflicts=True
+    )
+
+
+def backfill_feed(user_id, author_id):
+    """Добавляет посты автора в ленту нового подписчика."""
+    if not is_fanout_author(author_id):
+        return
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'pub_date')
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                pub_date=pub_date
+            )
+            for post_id, pub_date in posts.iterator()
+        ),
+        ignore_conflicts=True
+    )
+
+
+def prune_feed(user_id, author_id):
+    """Убирает посты автора из ленты отписавшегося пользователя."""
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild_feed(user_id):
+    """Пересобирает ленту пользователя по его подпискам."""
+    with transaction.atomic():
+        FeedEntry.objects.filter(user_id=user_id).delete()
+        author_ids = Follow.objects.filter(
+            user_id=user_id
+        ).values_list('author_id', flat=True)
+        for author_id in author_ids:
+            backfill_feed(user_id, author_id)
+
+
+def _insert_entries(follows):
+    """
+    Добавляет в ленты подписчиков из follows все посты их авторов
+    одним запросом INSERT ... SELECT; записи, которые уже есть,
+    пропускаются.
+    """
+    # Строки не проходят через Python: на миллионах записей
+    # bulk_create тратит основное время на создание объектов
+    entries = follows.filter(author__posts__isnull=False).order_by(
+    ).values_list(
+        'user_id', 'author_id', 'author__posts__pk', 'author__posts__pub_date'
+    )
+    sql, params = entries.query.sql_with_params()
+    quote = connection.ops.quote_name
+    table = quote(FeedEntry._meta.db_table)
+    columns = ', '.join(
+        quote(FeedEntry._meta.get_field(name).column)
+        for name in ('user', 'author', 'post', 'pub_date')
+    )
+    insert = connection.ops.insert_statement(ignore_conflicts=True)
+    suffix = connection.ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)
+    with connection.cursor() as cursor:
+        cursor.execute(f'{insert} {table} ({columns}) {sql}{suffix}', params)
+
+
+def rebuild_all_feeds():
+    """
+    Пересобирает ленты всех пользователей и флаги развертки
+    по текущему числу подписчиков.
+    """
+    limit = settings.FEED_FANOUT_MAX_FOLLOWERS
+    with transaction.atomic():
+        AuthorStats.objects.filter(followers_count__lte=limit).update(
+            feed_fanout=True
+        )
+        AuthorStats.objects.filter(followers_count__gt=limit).update(
+            feed_fanout=False
+        )
+        FeedEntry.objects.all().delete()
+        _insert_entries(Follow.objects.filter(author__stats__feed_fanout=True))
+
+
+def update_fanout(author_id):
+    """
+    Сверяет флаг развертки автора с числом подписчиков после подписки
+    или отписки. Выключает развертку сразу; если ее нужно включить,
+    возвращает True - посты автора нужно разложить по лентам
+    (refill_author). Вызывается в транзакции, изменившей счетчик.
+    """
+    stats = AuthorStats.objects.filter(pk=author_id).values_list(
+        'followers_count', 'feed_fanout'
+    ).first()
+    if stats is None:
+        return False
+    followers, fanout = stats
+    above = followers > settings.FEED_FANOUT_MAX_FOLLOWERS
+    if fanout and above:
+        AuthorStats.objects.filter(pk=author_id).update(feed_fanout=False)
+    return not fanout and not above
+
+
+def refill_author(author_id):
+    """
+    Раскладывает по лентам подписчиков посты автора, опубликованные
+    без развертки, и включает развертку.
+    """
+    with transaction.atomic():
+        stats = AuthorStats.objects.select_for_update().filter(
+            pk=author_id, feed_fanout=False
+        ).values_list('followers_count', flat=True).first()
+        # Автор мог снова набрать подписчиков, пока задача ждала
+        if stats is None or stats > settings.FEED_FANOUT_MAX_FOLLOWERS:
+            return
+        _insert_entries(Follow.objects.filter(author_id=author_id))
+        AuthorStats.objects.filter(pk=author_id).update(feed_fanout=True)
+
+
+class FeedPosts:
+    """
+    Посты ленты подписок пользователя для CursorPaginator и страниц API.
+
+    Поддерживает то, что нужно пагинаторам: count(), срезы, values()
+    и order_by() по ключу ленты, keyset() - выборку после ключа
+    (pub_date, pk). Посты выбираются запросом queryset.
+    """
+
+    def __init__(self, user_id, queryset=None):
+        self.user_id = user_id
+        if queryset is None:
+            queryset = Post.objects.for_feed()
+        self.queryset = queryset
+        self.direction = CURSOR_NEXT
+        self.key = None
+        self._authors = None
+
+    def _clone(self, **changes):
+        clone = copy.copy(self)
+        clone.__dict__.update(changes)
+        return clone
+
+    def values(self, *fields):
+        return self._clone(queryset=self.queryset.values(*fields))
+
+    def order_by(self, *fields):
+        """Порядок от новых к старым ('-pub_date', '-pk') или обратный."""
+        if fields == ('-pub_date', '-pk'):
+            return self._clone(direction=CURSOR_NEXT, key=None)
+        if fields == ('pub_date', 'pk'):
+            return self._clone(direction=CURSOR_PREVIOUS, key=None)
+        raise ValueError(f'Лента упорядочивается только по ключу: {fields}')
+
+    def keyset(self, direction, pub_date, pk):
+        return self._clone(direction=direction, key=(pub_date, pk))
+
+    @property
+    def authors(self):
+        """
+        Число постов авторов подписок и id авторов без развертки -
+        один запрос к счетчикам.
+        """
+        if self._authors is None:
+            total, on_demand = 0, []
+            rows = AuthorStats.objects.filter(
+                user__following__user_id=self.user_id
+            ).values_list('user_id', 'posts_count', 'feed_fanout')
+            for author_id, posts_count, fanout in rows:
+                total += posts_count
+                if not fanout:
+                    on_demand.append(author_id)
+            self._authors = total, on_demand
+        return self._authors
+
+    def count(self):
+        return self.authors[0]
+
+    def _after_key(self, queryset, fields):
+        if self.key is not None:
+            return keyset_filter(
+                queryset, self.direction, *self.key, fields=fields
+            )
+        date_field, pk_field = fields
+        if self.direction == CURSOR_NEXT:
+            return queryset.order_by(f'-{date_field}', f'-{pk_field}')
+        return queryset.order_by(date_field, pk_field)
+
+    def _entries(self):
+        """
+        Посты из FeedEntry. Ключ и порядок берутся из полей записи
+        ленты, чтобы страница читалась по индексу
+        (user, -pub_date, -post) без сортировки.
+        """
+        entries = self.queryset.filter(
+            feed_entries__user_id=self.user_id
+        ).annotate(
+            entry_date=F('feed_entries__pub_date'),
+            entry_post=F('feed_entries__post_id')
+        )
+        return self._after_key(entries, ('entry_date', 'entry_post'))
+
+    def _rows(self, start, stop):
+        _, on_demand = self.authors
+        if not on_demand:
+            return list(self._entries()[start:stop])
+        rows = list(self._entries()[:stop])
+        newest_first = self.direction == CURSOR_NEXT
+        posts = self._after_key(
+            self.queryset.filter(author_id__in=on_demand), ('pub_date', 'pk')
+        )
+        if stop is not None and len(rows) == stop:
+            # Дальше границы страницы из FeedEntry посты не нужны
+            bound = 'pub_date__gte' if newest_first else 'pub_date__lte'
+            posts = posts.filter(**{bound: _key(rows[-1])[0]})
+        # Пока посты автора раскладываются заново, один пост может
+        # найтись в обоих запросах
+        merged = {_key(row): row for row in rows}
+        merged.update((_key(row), row) for row in posts[:stop])
+        keys = sorted(merged, reverse=newest_first)[start:stop]
+        return [merged[key] for key in keys]
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step:
+            raise TypeError('Лента поддерживает только срезы без шага')
+        return self._rows(index.start or 0, index.stop)
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+def _key(row):
+    """Ключ (pub_date, pk) поста или строки values()."""
+    if isinstance(row, dict):
+        return row['pub_date'], row['pk']
+    return row.pub_date, row.pk
+
+
+def feed_posts(user, queryset=None):
+    """Посты ленты подписок пользователя (FeedPosts)."""
+    return FeedPosts(user.pk, queryset)
@@ -1,6 +1,9 @@
 from django import forms
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import UploadedFile
 
 
+from . import uploads
 from .models import Comment, Post
 
 
@@ -9,6 +12,39 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def _upload_error(self):
+        upload = self.files.get(self.add_prefix('image'))
+        return getattr(upload, 'upload_error', None)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Загрузку, отклоненную при приеме (core.uploads), ImageField
+        # мог не принять как картинку; пользователю нужна настоящая причина
+        upload_error = self._upload_error()
+        if upload_error and 'image' in self.errors:
+            self.errors.pop('image')
+            self.add_error('image', upload_error)
+        return cleaned_data
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if not isinstance(image, UploadedFile):
+            return image
+        upload_error = self._upload_error()
+        if upload_error:
+            raise forms.ValidationError(upload_error)
+        return uploads.reencode(image)
+
+    def save(self, commit=True):
+        post = super().save(commit=False)
+        image = self.cleaned_data.get('image')
+        if isinstance(image, ContentFile):
+            post.image = uploads.store(image)
+        if commit:
+            post.save()
+            self._save_m2m()
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
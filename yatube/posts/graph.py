@@ -0,0 +1,110 @@
+"""
+Граф подписок.
+
+Для каждого пользователя хранятся два отсортированных массива целых
+чисел (array('q')): id авторов, на которых он подписан, и id его
+подписчиков. Массив загружается из базы одним запросом по индексу
+при первом обращении и кладется в кэш (L1 процесса и общий L2), после
+чего проверка подписки - двоичный поиск, а количество - длина массива.
+
+Ключ массива содержит его версию (version:follow:<вид>:<id>). Сигналы
+Follow увеличивают версии подписок подписчика и подписчиков автора,
+и следующее обращение загружает массив заново.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.cache import bump_version, get_versions
+
+from .models import Follow
+
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+
+
+def follow_version_key(kind, user_id):
+    return f'version:follow:{kind}:{user_id}'
+
+
+def _load(kind, user_id):
+    if kind == FOLLOWING:
+        ids = Follow.objects.filter(user_id=user_id).values_list(
+            'author_id', flat=True
+        )
+    else:
+        ids = Follow.objects.filter(author_id=user_id).values_list(
+            'user_id', flat=True
+        )
+    return array('q', sorted(ids))
+
+
+def _adjacency(kind, user_id):
+    version, = get_versions(follow_version_key(kind, user_id))
+    key = f'follow_graph:{kind}:{user_id}:{version}'
+    ids = cache.get(key)
+    if ids is None:
+        ids = _load(kind, user_id)
+        # Ключ с версией заполняется один раз: add() не заставляет
+        # другие процессы сбрасывать L1, в отличие от set()
+        cache.add(key, ids, settings.FOLLOW_GRAPH_CACHE_TIMEOUT)
+    return ids
+
+
+def _contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def following_ids(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id."""
+    return _adjacency(FOLLOWING, user_id)
+
+
+def follower_ids(author_id):
+    """Отсортированный массив id подписчиков автора."""
+    return _adjacency(FOLLOWERS, author_id)
+
+
+def is_following(user_id, author_id):
+    if user_id is None:
+        return False
+    return _contains(following_ids(user_id), author_id)
+
+
+def following_among(user_id, author_ids):
+    """
+    Те из author_ids, на кого подписан user_id, - одна выборка
+    массива на всю страницу авторов.
+    """
+    if user_id is None:
+        return set()
+    ids = following_ids(user_id)
+    return {
+        author_id for author_id in set(author_ids)
+        if _contains(ids, author_id)
+    }
+
+
+def following_count(user_id):
+    return len(following_ids(user_id))
+
+
+def followers_count(author_id):
+    return len(follower_ids(author_id))
+
+
+def follow_changed(user_id, author_id):
+    """Сбрасывает массивы подписок подписчика и подписчиков автора."""
+    def bump():
+        bump_version(follow_version_key(FOLLOWING, user_id))
+        bump_version(follow_version_key(FOLLOWERS, author_id))
+
+    # Сразу - чтобы изменение видел сам пишущий запрос; после
+    # фиксации - чтобы сбросить массивы, которые другие запросы успели
+    # загрузить из базы до фиксации
+    bump()
+    transaction.on_commit(bump)
@@ -0,0 +1,74 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post, User
+from posts.utils import CURSOR_NEXT, CursorPaginator, encode_cursor
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время выборки страниц через OFFSET и по курсору. '
+        'Тестовые посты создаются в транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=200000)
+        parser.add_argument(
+            '--pages', type=int, nargs='+', default=[1, 100, 10000]
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        per_page = settings.NUMBER_POSTS_PAGE
+        pages = [
+            page for page in options['pages']
+            if (page - 1) * per_page < options['posts']
+        ]
+        with transaction.atomic():
+            self.populate(options['posts'])
+            paginator = CursorPaginator(Post.objects.all(), per_page)
+            self.stdout.write(f'{"страница":>10} {"OFFSET, мс":>12} '
+                              f'{"курсор, мс":>12}')
+            for number in pages:
+                offset = self.measure(
+                    options['repeat'], lambda: list(paginator.page(number))
+                )
+                cursor = self.cursor_for(number, per_page)
+                keyset = self.measure(
+                    options['repeat'],
+                    lambda: list(paginator.cursor_page(cursor))
+                )
+                self.stdout.write(
+                    f'{number:>10} {offset:>12.3f} {keyset:>12.3f}'
+                )
+            transaction.set_rollback(True)
+
+    def populate(self, count):
+        author, _ = User.objects.get_or_create(username='bench_pagination')
+        batch = 5000
+        for start in range(0, count, batch):
+            Post.objects.bulk_create(
+                Post(text=f'Пост {number}', author=author)
+                for number in range(start, min(start + batch, count))
+            )
+
+    @staticmethod
+    def cursor_for(number, per_page):
+        """Курсор, ведущий на страницу number (сама выборка не замеряется)."""
+        if number == 1:
+            return ''
+        boundary = Post.objects.all()[(number - 1) * per_page - 1]
+        return encode_cursor(CURSOR_NEXT, boundary, number)
+
+    @staticmethod
+    def measure(repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,84 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import transaction
+
+from posts.models import Post, User
+from posts.search import rebuild_index, search_page
+
+WORDS = (
+    'кот', 'собака', 'город', 'река', 'лес', 'дом', 'машина', 'книга',
+    'музыка', 'футбол', 'погода', 'работа', 'отпуск', 'море', 'горы',
+    'программа', 'компьютер', 'новость', 'праздник', 'дорога',
+)
+# Частоты слов распределены по закону Ципфа: несколько слов встречаются
+# почти в каждом посте, большинство - редко
+VOCABULARY = WORDS + tuple(f'слово{number}' for number in range(20000))
+WEIGHTS = tuple(1 / rank for rank in range(1, len(VOCABULARY) + 1))
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск по индексу с выборкой text__icontains. '
+        'Тестовые посты создаются в транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument(
+            '--queries', nargs='+',
+            default=['кот', 'праздника', 'слово500', 'горы слово50']
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.populate(options['posts'])
+            rebuild_index()
+            self.stdout.write(f'{"запрос":>20} {"icontains, мс":>14} '
+                              f'{"индекс, мс":>12}')
+            for query in options['queries']:
+                scan = self.measure(
+                    options['repeat'], lambda: list(self.scan_page(query))
+                )
+                indexed = self.measure(
+                    options['repeat'],
+                    lambda: list(search_page(query, 1, 10))
+                )
+                self.stdout.write(
+                    f'{query:>20} {scan:>14.3f} {indexed:>12.3f}'
+                )
+            transaction.set_rollback(True)
+
+    def populate(self, count):
+        author, _ = User.objects.get_or_create(username='bench_search')
+        rng = random.Random(0)
+        batch = 5000
+        for start in range(0, count, batch):
+            Post.objects.bulk_create(
+                Post(
+                    text=' '.join(rng.choices(VOCABULARY, WEIGHTS, k=12)),
+                    author=author
+                )
+                for _ in range(start, min(start + batch, count))
+            )
+
+    @staticmethod
+    def scan_page(query):
+        """Прежний поиск: LIKE по каждому слову и подсчет для пагинатора."""
+        posts = Post.objects.for_feed()
+        for word in query.split():
+            posts = posts.filter(text__icontains=word)
+        return Paginator(posts, 10).get_page(1)
+
+    @staticmethod
+    def measure(repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
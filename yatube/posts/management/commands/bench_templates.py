@@ -0,0 +1,139 @@
+import statistics
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.test import RequestFactory
+
+from core.backends import DjangoTemplates
+from posts.forms import CommentForm, PostForm
+from posts.models import AuthorStats, Comment, Group, Post, User
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+CACHED_LOADERS = [('django.template.loaders.cached.Loader', LOADERS)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет время рендеринга шаблонов posts/*.html (мкс) со 10 '
+        'и 100 постами (комментариями) на странице в профилях шаблонов: '
+        'чтение с диска, cached loader и cached loader с подставленными '
+        'include. Карточки постов берутся из кэша, как в работе сайта. '
+        'Тестовые данные создаются в транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, nargs='+', default=[10, 100])
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as inlined_dir:
+            call_command(
+                'inline_templates', output=inlined_dir, stdout=StringIO()
+            )
+            profiles = {
+                'диск': self.engine([], LOADERS),
+                'cached': self.engine([], CACHED_LOADERS),
+                'cached+inline': self.engine([inlined_dir], CACHED_LOADERS),
+            }
+            self.stdout.write(
+                f'{"шаблон":<24} {"постов":>7}'
+                + ''.join(f' {name + ", мкс":>18}' for name in profiles)
+            )
+            with transaction.atomic():
+                for count in options['posts']:
+                    contexts = self.contexts(count)
+                    for name, context in sorted(contexts.items()):
+                        timings = [
+                            self.measure(
+                                engine, name, context, options['repeat']
+                            )
+                            for engine in profiles.values()
+                        ]
+                        self.stdout.write(
+                            f'{name:<24} {count:>7}'
+                            + ''.join(f' {us:>18.1f}' for us in timings)
+                        )
+                transaction.set_rollback(True)
+
+    @staticmethod
+    def engine(dirs, loaders):
+        params = settings.TEMPLATES[0]
+        return DjangoTemplates({
+            'NAME': 'bench_templates',
+            'DIRS': dirs + [
+                path for path in params['DIRS']
+                if path != settings.TEMPLATES_INLINED_DIR
+            ],
+            'APP_DIRS': False,
+            'OPTIONS': {**params['OPTIONS'], 'loaders': loaders},
+        })
+
+    def contexts(self, count):
+        """Контексты шаблонов posts/*.html, как их собирают view."""
+        author, _ = User.objects.get_or_create(username='bench_templates')
+        group, _ = Group.objects.get_or_create(
+            slug='bench-templates', defaults={'title': 'Бенчмарк'}
+        )
+        Post.objects.filter(author=author).delete()
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=author, group=group)
+            for number in range(count)
+        )
+        post = Post.objects.for_detail().filter(author=author).first()
+        Comment.objects.bulk_create(
+            Comment(text=f'Комментарий {number}', author=author, post=post)
+            for number in range(count)
+        )
+        posts = list(Post.objects.for_feed().filter(author=author))
+        page_obj = Paginator(posts, count).page(1)
+        author_stats = AuthorStats.for_user(author)
+        detail = {
+            'post': post,
+            'author_stats': author_stats,
+            'form': CommentForm(),
+            'comments': list(post.comments.for_thread()),
+            'next_comments': None,
+        }
+        self.request = RequestFactory().get('/')
+        self.request.user = author
+        return {
+            'posts/index.html': {'page_obj': page_obj},
+            'posts/follow.html': {'page_obj': page_obj},
+            'posts/group_list.html': {'group': group, 'page_obj': page_obj},
+            'posts/profile.html': {
+                'author': author,
+                'author_stats': author_stats,
+                'page_obj': page_obj,
+                'following': False,
+            },
+            'posts/search.html': {
+                'query': 'Пост',
+                'page_obj': page_obj,
+                'page_query': 'q=Пост&',
+            },
+            'posts/post_detail.html': detail,
+            'posts/comments.html': detail,
+            'posts/create_post.html': {'form': PostForm()},
+        }
+
+    def measure(self, engine, name, context, repeat):
+        """Медиана времени get_template() и render(), мкс."""
+        def render():
+            engine.get_template(name).render(context, self.request)
+
+        render()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            render()
+            timings.append((time.perf_counter() - start) * 1000000)
+        return statistics.median(timings)
@@ -0,0 +1,55 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from core.urlbuilder import build_url
+
+# Имя адреса и аргументы, как их передают шаблоны
+ROUTES = [
+    ('posts:index', ()),
+    ('posts:profile', ('leo',)),
+    ('posts:post_detail', (1024,)),
+    ('posts:post_edit', (1024,)),
+    ('posts:group_list', ('cats',)),
+    ('posts:profile_follow', ('leo',)),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время построения адресов пространства posts '
+        'через reverse() и core.urlbuilder.build_url(), мкс на вызов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"адрес":<22} {"reverse, мкс":>14} {"build_url, мкс":>16} '
+            f'{"ускорение":>10}'
+        )
+        for viewname, route_args in ROUTES:
+            url = reverse(viewname, args=route_args)
+            if build_url(viewname, *route_args) != url:
+                raise AssertionError(f'{viewname}: адреса не совпадают')
+            slow = self.measure(
+                lambda: reverse(viewname, args=route_args), options
+            )
+            fast = self.measure(
+                lambda: build_url(viewname, *route_args), options
+            )
+            self.stdout.write(
+                f'{viewname:<22} {slow:>14.2f} {fast:>16.2f} '
+                f'{slow / fast:>9.1f}x'
+            )
+
+    @staticmethod
+    def measure(func, options):
+        """Лучшее из repeat время одного вызова, мкс."""
+        number = options['number']
+        return min(
+            timeit.repeat(func, number=number, repeat=options['repeat'])
+        ) / number * 1000000
@@ -0,0 +1,216 @@
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from posts.counters import reconcile
+from posts.feed import rebuild_all_feeds
+from posts.models import Comment, Follow, Group, Post, User
+from posts.search import rebuild_index
+
+WORDS = (
+    'кот', 'собака', 'город', 'река', 'лес', 'дом', 'машина', 'книга',
+    'музыка', 'футбол', 'погода', 'работа', 'отпуск', 'море', 'горы',
+    'программа', 'компьютер', 'новость', 'праздник', 'дорога', 'утро',
+    'вечер', 'друг', 'семья', 'кофе', 'поезд', 'фильм', 'концерт',
+)
+
+
+def zipf_weights(count, skew):
+    """Накопленные веса распределения Ципфа для count элементов."""
+    return list(itertools.accumulate(
+        1 / rank ** skew for rank in range(1, count + 1)
+    ))
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает пользователей, группы, посты, комментарии и подписки '
+        'для нагрузочного тестирования. Популярность авторов и постов '
+        'распределена по закону Ципфа.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument('--follows', type=int, default=100000)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель распределения Ципфа'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней распределяются даты постов'
+        )
+        parser.add_argument('--batch', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--prefix', default='load',
+            help='Префикс имен создаваемых пользователей и групп'
+        )
+        parser.add_argument(
+            '--skip-feeds', action='store_true',
+            help='Не собирать ленты подписок'
+        )
+        parser.add_argument(
+            '--skip-search', action='store_true',
+            help='Не строить поисковый индекс'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch = options['batch']
+        self.skew = options['skew']
+        prefix = options['prefix']
+        user_ids = self.create_users(prefix, options['users'])
+        group_ids = self.create_groups(prefix, options['groups'])
+        post_ids = self.create_posts(
+            user_ids, group_ids, options['posts']
+        )
+        self.spread_dates(post_ids, options['days'])
+        self.create_comments(user_ids, post_ids, options['comments'])
+        self.create_follows(user_ids, options['follows'])
+        # bulk_create не вызывает сигналы, поэтому денормализованные
+        # данные пересчитываются целиком
+        self.stdout.write('Пересчет счетчиков...')
+        reconcile()
+        if not options['skip_feeds']:
+            self.stdout.write('Сборка лент подписок...')
+            rebuild_all_feeds()
+        if not options['skip_search']:
+            self.stdout.write('Построение поискового индекса...')
+            with transaction.atomic():
+                rebuild_index()
+        self.stdout.write('Готово')
+
+    def insert(self, model, objects, **kwargs):
+        """Сохраняет объекты пачками по --batch штук."""
+        objects = iter(objects)
+        created = 0
+        while True:
+            chunk = list(itertools.islice(objects, self.batch))
+            if not chunk:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, **kwargs)
+            created += len(chunk)
+            self.stdout.write(f'{model.__name__}: {created}')
+
+    def pick(self, items, weights):
+        return self.rng.choices(items, cum_weights=weights)[0]
+
+    def create_users(self, prefix, count):
+        last = User.objects.filter(username__startswith=f'{prefix}_').count()
+        password = make_password(None)
+        self.insert(User, (
+            User(
+                username=f'{prefix}_{number}',
+                first_name='Пользователь',
+                last_name=str(number),
+                password=password
+            )
+            for number in range(last, last + count)
+        ))
+        user_ids = list(User.objects.filter(
+            username__startswith=f'{prefix}_'
+        ).values_list('pk', flat=True))
+        # Популярность авторов не зависит от порядка создания
+        self.rng.shuffle(user_ids)
+        return user_ids
+
+    def create_groups(self, prefix, count):
+        last = Group.objects.filter(slug__startswith=f'{prefix}-').count()
+        self.insert(Group, (
+            Group(
+                title=f'Группа {number}',
+                slug=f'{prefix}-{number}',
+                description=f'Описание группы {number}'
+            )
+            for number in range(last, last + count)
+        ))
+        return list(Group.objects.filter(
+            slug__startswith=f'{prefix}-'
+        ).values_list('pk', flat=True))
+
+    def create_posts(self, user_ids, group_ids, count):
+        last_pk = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        author_weights = zipf_weights(len(user_ids), self.skew)
+        group_weights = zipf_weights(len(group_ids), self.skew)
+
+        def posts():
+            for _ in range(count):
+                group_id = None
+                if group_ids and self.rng.random() < 0.5:
+                    group_id = self.pick(group_ids, group_weights)
+                yield Post(
+                    text=' '.join(self.rng.choices(
+                        WORDS, k=self.rng.randint(5, 40)
+                    )),
+                    author_id=self.pick(user_ids, author_weights),
+                    group_id=group_id
+                )
+
+        self.insert(Post, posts())
+        return list(Post.objects.filter(
+            pk__gt=last_pk
+        ).order_by('pk').values_list('pk', flat=True))
+
+    def spread_dates(self, post_ids, days):
+        """
+        Разносит даты постов по последним days дням в порядке создания.
+        bulk_create ставит всем постам текущее время (auto_now_add),
+        а с одинаковыми датами порядок лент и курсоры вырождаются
+        в сортировку по pk.
+        """
+        if not post_ids:
+            return
+        step = timedelta(days=days) / len(post_ids)
+        start = timezone.now() - timedelta(days=days)
+        for offset in range(0, len(post_ids), self.batch):
+            chunk = post_ids[offset:offset + self.batch]
+            with transaction.atomic():
+                Post.objects.bulk_update([
+                    Post(
+                        pk=pk,
+                        pub_date=start + step * (
+                            offset + number + self.rng.random()
+                        )
+                    )
+                    for number, pk in enumerate(chunk)
+                ], ['pub_date'])
+            self.stdout.write(f'Даты постов: {offset + len(chunk)}')
+
+    def create_comments(self, user_ids, post_ids, count):
+        if not post_ids:
+            return
+        # Самые обсуждаемые посты - самые свежие
+        post_weights = zipf_weights(len(post_ids), self.skew)
+        recent_first = post_ids[::-1]
+        self.insert(Comment, (
+            Comment(
+                text=' '.join(self.rng.choices(WORDS, k=5)),
+                post_id=self.pick(recent_first, post_weights),
+                author_id=self.rng.choice(user_ids)
+            )
+            for _ in range(count)
+        ))
+
+    def create_follows(self, user_ids, count):
+        author_weights = zipf_weights(len(user_ids), self.skew)
+
+        def follows():
+            for _ in range(count):
+                user_id = self.rng.choice(user_ids)
+                author_id = self.pick(user_ids, author_weights)
+                if user_id != author_id:
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        self.insert(Follow, follows(), ignore_conflicts=True)
@@ -0,0 +1,160 @@
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import AuthorStats, Follow, Group, Post, User
+
+VIEWS = ('index', 'group_list', 'profile', 'post_detail', 'follow_index')
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(int(round(percent / 100 * len(ordered))), 1)
+    return ordered[rank - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест страниц постов: параллельные запросы через '
+        'тестовый клиент Django, перцентили времени ответа и число '
+        'SQL-запросов на страницу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--views', nargs='+', choices=VIEWS, default=list(VIEWS)
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Количество запросов к каждой странице'
+        )
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--pages', type=int, default=5,
+            help='Страницы пагинатора, по которым распределяются запросы'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.pages = options['pages']
+        self.targets = self.collect_targets()
+        jobs = [
+            view for view in options['views']
+            for _ in range(options['requests'])
+        ]
+        self.rng.shuffle(jobs)
+        results = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+        jobs_iter = iter(jobs)
+
+        def worker(rng):
+            client = Client()
+            client.force_login(rng.choice(self.targets['readers']))
+            while True:
+                with lock:
+                    view = next(jobs_iter, None)
+                if view is None:
+                    break
+                url = self.url_for(view, rng)
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    if response.status_code != 200:
+                        errors[view] += 1
+                    results[view].append((elapsed, len(queries)))
+            close_old_connections()
+
+        # У каждого потока свой генератор: random.Random не рассчитан
+        # на общий доступ из потоков, а порядок их работы случаен
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=(random.Random(f'{options["seed"]}:{number}'),)
+            )
+            for number in range(options['concurrency'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        total = time.perf_counter() - started
+        self.report(options['views'], results, errors)
+        self.stdout.write(
+            f'Всего запросов: {len(jobs)} за {total:.1f} с '
+            f'({len(jobs) / total:.1f} запросов/с)'
+        )
+
+    def collect_targets(self):
+        """Случайные, но существующие объекты для адресов страниц."""
+        sample = 1000
+        posts = list(
+            Post.objects.order_by('-pk').values_list('pk', flat=True)[:sample]
+        )
+        authors = list(
+            AuthorStats.objects.filter(posts_count__gt=0).order_by(
+                '-posts_count'
+            ).values_list('user__username', flat=True)[:sample]
+        )
+        groups = list(
+            Group.objects.filter(posts_count__gt=0).values_list(
+                'slug', flat=True
+            )[:sample]
+        )
+        readers = list(
+            User.objects.filter(pk__in=Follow.objects.values('user'))[:sample]
+        )
+        if not posts or not readers:
+            raise CommandError(
+                'Нет постов или подписок: сначала выполните generate_data'
+            )
+        return {
+            'posts': posts,
+            'authors': authors,
+            'groups': groups,
+            'readers': readers,
+        }
+
+    def url_for(self, view, rng):
+        page = f'?page={rng.randint(1, self.pages)}'
+        if view == 'index':
+            return reverse('posts:index') + page
+        if view == 'follow_index':
+            return reverse('posts:follow_index') + page
+        if view == 'group_list':
+            slug = rng.choice(self.targets['groups'])
+            return reverse('posts:group_list', args=[slug]) + page
+        if view == 'profile':
+            username = rng.choice(self.targets['authors'])
+            return reverse('posts:profile', args=[username]) + page
+        post_id = rng.choice(self.targets['posts'])
+        return reverse('posts:post_detail', args=[post_id])
+
+    def report(self, views, results, errors):
+        self.stdout.write(
+            f'{"страница":>14} {"запросов":>9} {"ошибок":>7} '
+            f'{"p50, мс":>9} {"p95, мс":>9} {"p99, мс":>9} {"SQL":>6}'
+        )
+        for view in views:
+            timings = [elapsed for elapsed, _ in results[view]]
+            if not timings:
+                continue
+            queries = sum(count for _, count in results[view]) / len(timings)
+            self.stdout.write(
+                f'{view:>14} {len(timings):>9} {errors[view]:>7} '
+                f'{percentile(timings, 50):>9.1f} '
+                f'{percentile(timings, 95):>9.1f} '
+                f'{percentile(timings, 99):>9.1f} {queries:>6.1f}'
+            )
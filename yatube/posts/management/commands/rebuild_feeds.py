@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts.feed import rebuild_all_feeds, rebuild_feed
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Пользователи, чьи ленты пересобрать (по умолчанию - все)'
+        )
+
+    def handle(self, *args, **options):
+        if not options['usernames']:
+            rebuild_all_feeds()
+            self.stdout.write('Пересобраны все ленты')
+            return
+        users = User.objects.filter(username__in=options['usernames'])
+        rebuilt = 0
+        for user_id in users.values_list('pk', flat=True).iterator():
+            rebuild_feed(user_id)
+            rebuilt += 1
+        self.stdout.write(f'Пересобрано лент: {rebuilt}')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import PostTerm
+from posts.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс постов.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_index()
+        self.stdout.write(f'Записей в индексе: {PostTerm.objects.count()}')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики постов, комментариев и подписок.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            reconcile()
+        self.stdout.write('Счетчики пересчитаны')
@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnail
+
+
+def _warm(item):
+    post_id, image_name = item
+    close_old_connections()
+    try:
+        generate_thumbnail(post_id, image_name)
+    except Exception as error:
+        return f'{image_name}: {error}'
+    finally:
+        close_old_connections()
+    return None
+
+
+class Command(BaseCommand):
+    help = 'Создает недостающие миниатюры картинок постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.THUMBNAIL_WORKERS,
+            help='Количество потоков'
+        )
+
+    def handle(self, *args, **options):
+        items = Post.objects.exclude(image='').order_by().values_list(
+            'pk', 'image'
+        )
+        warmed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for error in pool.map(_warm, items):
+                if error:
+                    self.stderr.write(error)
+                else:
+                    warmed += 1
+        self.stdout.write(f'Обработано картинок: {warmed}')
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_index(apps, schema_editor):
+    from posts.search import terms
+
+    Post = apps.get_model('posts', 'Post')
+    PostTerm = apps.get_model('posts', 'PostTerm')
+    PostTerm.objects.bulk_create(
+        (
+            PostTerm(term=term, post_id=post_id, weight=weight)
+            for post_id, text in Post.objects.values_list('pk', 'text')
+            for term, weight in terms(text).items()
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_auto_20261018_2044'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Основа слова')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='Число вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='posts.Post', verbose_name='Пост')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='postterm',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_post_term'),
+        ),
+        migrations.RunPython(fill_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 2.2.16 on 2026-10-18 22:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_feeds(apps, schema_editor):
+    """
+    Раскладывает посты по лентам существующих подписок: до этой
+    миграции ленты заполнялись только командой rebuild_feeds.
+    """
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    FeedEntry = apps.get_model('posts', 'FeedEntry')
+    Follow = apps.get_model('posts', 'Follow')
+    AuthorStats.objects.filter(
+        followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).update(feed_fanout=False)
+    entries = Follow.objects.filter(
+        author__stats__feed_fanout=True, author__posts__isnull=False
+    ).order_by().values_list(
+        'user_id', 'author_id', 'author__posts__pk', 'author__posts__pub_date'
+    )
+    sql, params = entries.query.sql_with_params()
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    columns = ', '.join(
+        quote(FeedEntry._meta.get_field(name).column)
+        for name in ('user', 'author', 'post', 'pub_date')
+    )
+    insert = connection.ops.insert_statement(ignore_conflicts=True)
+    suffix = connection.ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{insert} {quote(FeedEntry._meta.db_table)} ({columns}) '
+            f'{sql}{suffix}',
+            params
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_post_updated'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='feedentry',
+            name='feed_user_pub_date_idx',
+        ),
+        migrations.AddField(
+            model_name='authorstats',
+            name='feed_fanout',
+            field=models.BooleanField(default=True, verbose_name='Развертка постов по лентам'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='feed_user_pub_date_idx'),
+        ),
+        migrations.RunPython(build_feeds, migrations.RunPython.noop),
+    ]
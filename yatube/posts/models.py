@@ -1,4 +1,5 @@
 from core.models import CreatedModel
+from core.urlbuilder import build_url
 
 
 from django.conf import settings
@@ -10,7 +11,43 @@ from django.db import models
 User = get_user_model()
 
 
-class Post(CreatedModel):
+class CountersMixin:
+    """
+    Счетчики модели (counter_fields) меняются только запросами
+    UPDATE ... SET n = n + 1 (posts.counters). Сохранение уже
+    существующего объекта их не записывает: загруженные вместе с ним
+    значения могли устареть, пока объект редактировали.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """
+        Посты для карточек лент: автор и группа загружаются тем же
+        запросом, лишние поля не выбираются.
+        """
+        return self.select_related('author', 'group').only(
+            'text', 'pub_date', 'image', 'author_id', 'group_id',
+            'author__username', 'author__first_name', 'author__last_name',
+            'group__slug',
+        )
+
+    def for_detail(self):
+        """Пост для страницы поста вместе с автором и группой."""
+        return self.select_related('author__stats', 'group')
+
+
+class Post(CountersMixin, CreatedModel):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Текст нового поста',
@@ -42,22 +79,73 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False
+    )
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
+
+    objects = PostQuerySet.as_manager()
+    counter_fields = ('comments_count',)
 
     def __str__(self):
         return self.text[:settings.NUMBER_SYMBOL_TEXT_POST]
 
+    def get_absolute_url(self):
+        return build_url('posts:post_detail', post_id=self.pk)
+
+    def get_edit_url(self):
+        return build_url('posts:post_edit', post_id=self.pk)
+
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-pk']
+        indexes = [
+            # Курсорная пагинация по ключу (pub_date, id)
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_id_idx'
+            ),
+            # Страницы автора и группы: фильтр и сортировка по индексу
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
 
 
-class Group(models.Model):
+class Group(CountersMixin, models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Количество постов',
+        default=0,
+        editable=False
+    )
+
+    counter_fields = ('posts_count',)
 
     def __str__(self):
         return self.title
 
+    def get_absolute_url(self):
+        return build_url('posts:group_list', slug=self.slug)
+
+
+class CommentQuerySet(models.QuerySet):
+    def for_thread(self):
+        """Комментарии поста вместе с авторами."""
+        return self.select_related('author').only(
+            'text', 'pub_date', 'post_id', 'author_id', 'author__username'
+        )
+
 
 class Comment(CreatedModel):
     post = models.ForeignKey(
@@ -83,6 +171,22 @@ class Comment(CreatedModel):
         ]
     )
 
+    objects = CommentQuerySet.as_manager()
+
+    def get_absolute_url(self):
+        return build_url(
+            'posts:post_detail', post_id=self.post_id
+        ) + '#comments'
+
+    class Meta:
+        ordering = ['pub_date', 'pk']
+        indexes = [
+            models.Index(
+                fields=['post', 'pub_date', 'id'],
+                name='comment_post_pub_date_idx'
+            ),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -103,3 +207,111 @@ class Follow(models.Model):
             models.UniqueConstraint(
                 fields=['user', 'author'], name='unique_follow')
         ]
+        indexes = [
+            # Обратный индекс для подписчиков автора
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            ),
+        ]
+
+
+class AuthorStats(models.Model):
+    """
+    Счетчики пользователя: посты, подписчики и подписки.
+    Обновляются при записи, чтобы не считать COUNT(*) на чтении.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Количество постов', default=0
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков', default=0
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name='Количество подписок', default=0
+    )
+    # Посты раскладываются по лентам подписчиков (posts.feed). Сбрасывается,
+    # когда подписчиков становится больше FEED_FANOUT_MAX_FOLLOWERS, и
+    # снова ставится, когда посты автора разложены по лентам заново
+    feed_fanout = models.BooleanField(
+        verbose_name='Развертка постов по лентам', default=True
+    )
+
+    @classmethod
+    def for_user(cls, user):
+        try:
+            return user.stats
+        except cls.DoesNotExist:
+            stats, _ = cls.objects.get_or_create(user=user)
+            return stats
+
+
+class FeedEntry(models.Model):
+    """
+    Материализованная лента подписок: пост автора в ленте подписчика.
+    Заполняется при публикации поста и при подписке на автора.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор поста'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата создания поста')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_feed_entry')
+        ]
+        indexes = [
+            # Страница ленты по ключу (pub_date, post) без сортировки
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='feed_user_pub_date_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'], name='feed_user_author_idx'
+            ),
+        ]
+
+
+class PostTerm(models.Model):
+    """
+    Запись инвертированного индекса полнотекстового поиска:
+    основа слова и число ее вхождений в текст поста.
+    """
+    term = models.CharField(verbose_name='Основа слова', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='terms',
+        verbose_name='Пост'
+    )
+    weight = models.PositiveIntegerField(
+        verbose_name='Число вхождений', default=1
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'post'], name='unique_post_term')
+        ]
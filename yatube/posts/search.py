@@ -0,0 +1,161 @@
+"""
+Полнотекстовый поиск по постам.
+
+Текст поста разбивается на слова, слова приводятся к основе стеммером
+Snowball для русского языка, а пары (основа, пост) с числом вхождений
+хранятся в таблице PostTerm - инвертированном индексе. Индекс
+обновляется сигналами при создании и изменении поста, записи удаленного
+поста удаляются каскадом. Результаты ранжируются по TF-IDF.
+"""
+import math
+import re
+from collections import Counter
+
+from django.core.paginator import Paginator
+from django.db.models import Case, Count, F, FloatField, Max, Sum, Value, When
+
+from .models import Post, PostTerm
+
+_WORD_RE = re.compile(r'\w+')
+
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'в', 'во', 'вот', 'все', 'да', 'для', 'до', 'же',
+    'за', 'и', 'из', 'или', 'к', 'как', 'ко', 'ли', 'на', 'над', 'не',
+    'но', 'о', 'об', 'от', 'по', 'под', 'при', 'с', 'со', 'то', 'у',
+    'что', 'это',
+))
+
+# Стеммер Snowball для русского языка. Все окончания ищутся в области RV -
+# части слова после первой гласной.
+_VOWELS = 'аеиоуыэюя'
+_RV_RE = re.compile(f'^(.*?[{_VOWELS}])(.*)$')
+_PERFECTIVE_GERUND_RE = re.compile(
+    r'(ив|ивши|ившись|ыв|ывши|ывшись|(?<=[ая])(в|вши|вшись))$'
+)
+_REFLEXIVE_RE = re.compile(r'(ся|сь)$')
+_ADJECTIVE_RE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею)$'
+)
+_PARTICIPLE_RE = re.compile(r'(ивш|ывш|ующ|(?<=[ая])(ем|нн|вш|ющ|щ))$')
+_VERB_RE = re.compile(
+    r'(ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|'
+    r'ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю|'
+    r'(?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно))$'
+)
+_NOUN_RE = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|'
+    r'ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+# Окончание ост(ь) должно лежать в области R2
+_DERIVATIONAL_RE = re.compile(
+    f'[^{_VOWELS}][{_VOWELS}]+[^{_VOWELS}].*?(ость?)$'
+)
+_SUPERLATIVE_RE = re.compile(r'(ейше|ейш)$')
+
+
+def stem(word):
+    """Возвращает основу русского слова по алгоритму Snowball."""
+    word = word.lower().replace('ё', 'е')
+    match = _RV_RE.match(word)
+    if match is None:
+        return word
+    start, rv = match.groups()
+    rv, found = _PERFECTIVE_GERUND_RE.subn('', rv, 1)
+    if not found:
+        rv = _REFLEXIVE_RE.sub('', rv, 1)
+        rv, found = _ADJECTIVE_RE.subn('', rv, 1)
+        if found:
+            rv = _PARTICIPLE_RE.sub('', rv, 1)
+        else:
+            rv, found = _VERB_RE.subn('', rv, 1)
+            if not found:
+                rv = _NOUN_RE.sub('', rv, 1)
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    derivational = _DERIVATIONAL_RE.search(rv)
+    if derivational:
+        rv = rv[:derivational.start(1)]
+    rv = _SUPERLATIVE_RE.sub('', rv, 1)
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    elif rv.endswith('ь'):
+        rv = rv[:-1]
+    return start + rv
+
+
+def terms(text):
+    """Основы значимых слов текста с числом их вхождений."""
+    max_length = PostTerm._meta.get_field('term').max_length
+    return Counter(
+        stem(word)[:max_length]
+        for word in _WORD_RE.findall(text.lower())
+        if word not in STOP_WORDS
+    )
+
+
+def index_post(post):
+    """Перестраивает записи индекса для поста."""
+    PostTerm.objects.filter(post=post).delete()
+    PostTerm.objects.bulk_create(
+        PostTerm(term=term, post=post, weight=weight)
+        for term, weight in terms(post.text).items()
+    )
+
+
+def rebuild_index(batch_size=1000):
+    """Перестраивает индекс всех постов."""
+    PostTerm.objects.all().delete()
+    entries = []
+    for post_id, text in Post.objects.order_by().values_list(
+            'pk', 'text').iterator():
+        entries.extend(
+            PostTerm(term=term, post_id=post_id, weight=weight)
+            for term, weight in terms(text).items()
+        )
+        if len(entries) >= batch_size:
+            PostTerm.objects.bulk_create(entries)
+            entries = []
+    PostTerm.objects.bulk_create(entries)
+
+
+def ranked_posts(query):
+    """
+    Идентификаторы постов, содержащих все слова запроса, по убыванию
+    релевантности: строки {'post': id, 'score': вес}.
+    """
+    query_terms = sorted(set(terms(query)))
+    if not query_terms:
+        return PostTerm.objects.none().values('post')
+    frequencies = dict(
+        PostTerm.objects.filter(term__in=query_terms).order_by().values(
+            'term').annotate(total=Count('pk')).values_list('term', 'total')
+    )
+    if len(frequencies) < len(query_terms):
+        return PostTerm.objects.none().values('post')
+    # Число постов оценивается по наибольшему id: это не требует COUNT(*)
+    total = Post.objects.aggregate(last=Max('pk'))['last'] or 1
+    idf = Case(
+        *(
+            When(term=term, then=Value(math.log(1 + total / frequency)))
+            for term, frequency in frequencies.items()
+        ),
+        output_field=FloatField()
+    )
+    return PostTerm.objects.filter(term__in=query_terms).values(
+        'post'
+    ).annotate(
+        matched=Count('pk'),
+        score=Sum(F('weight') * idf, output_field=FloatField()),
+    ).filter(matched=len(query_terms)).order_by('-score', '-post')
+
+
+def search_page(query, page_number, per_page):
+    """Страница результатов поиска с постами для карточек."""
+    page_obj = Paginator(ranked_posts(query), per_page).get_page(page_number)
+    post_ids = [row['post'] for row in page_obj.object_list]
+    posts = Post.objects.for_feed().in_bulk(post_ids)
+    page_obj.object_list = [
+        posts[post_id] for post_id in post_ids if post_id in posts
+    ]
+    return page_obj
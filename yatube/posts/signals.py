@@ -0,0 +1,150 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cache, counters, feed, graph, tasks
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    """Запоминает прежнюю группу поста для пересчета счетчиков групп."""
+    if not instance._state.adding:
+        instance._saved_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created:
+        counters.post_added(instance)
+        return
+    old_group_id = getattr(instance, '_saved_group_id', instance.group_id)
+    if old_group_id != instance.group_id:
+        counters.post_group_changed(old_group_id, instance.group_id)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    counters.post_removed(instance)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.comment_added(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    counters.comment_removed(instance)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.follow_added(instance)
+        switch_fanout(instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.follow_removed(instance)
+    switch_fanout(instance.author_id)
+
+
+def switch_fanout(author_id):
+    """Развертка постов автора после перехода через порог подписчиков."""
+    if feed.update_fanout(author_id):
+        tasks.refill_author_feeds.enqueue(author_id)
+
+
+@receiver(post_save, sender=Post)
+def fanout_new_post(sender, instance, created, **kwargs):
+    """Раскладывает новый пост по лентам подписчиков."""
+    if created:
+        tasks.fanout_post.enqueue(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_on_follow(sender, instance, created, **kwargs):
+    """Заполняет ленту постами автора при подписке."""
+    if created:
+        tasks.backfill_feed.enqueue(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+def notify_post_author(sender, instance, created, **kwargs):
+    if created:
+        tasks.notify_comment.enqueue(instance.pk)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_on_unfollow(sender, instance, **kwargs):
+    """Чистит ленту от постов автора при отписке."""
+    feed.prune_feed(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def index_post_text(sender, instance, **kwargs):
+    """Обновляет поисковый индекс поста."""
+    tasks.index_post.enqueue(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_card(sender, instance, **kwargs):
+    cache.invalidate_post(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_cards(sender, instance, **kwargs):
+    cache.invalidate_group(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=User)
+def invalidate_index_page(sender, instance, update_fields=None, **kwargs):
+    """
+    Новые и измененные посты, группы и авторы сразу видны на главной,
+    откуда бы ни пришла запись (представления, API, админка, команды).
+    Удаленный пост остается на закэшированной главной до истечения ее
+    кэша.
+    """
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    cache.invalidate_index()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_author_cards(sender, instance, update_fields=None, **kwargs):
+    # Вход пользователя сохраняет только last_login, которого нет
+    # на страницах
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    cache.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def update_follow_graph(sender, instance, **kwargs):
+    graph.follow_changed(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def touch_pages(sender, instance, **kwargs):
+    """Комментарии и подписки меняют счетчики на страницах."""
+    cache.touch_posts()
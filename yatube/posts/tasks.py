@@ -0,0 +1,62 @@
+"""
+Фоновые задачи, запускаемые сигналами записи постов, комментариев
+и подписок. Объект мог быть удален до выполнения задачи - тогда
+задача ничего не делает.
+"""
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.mail import send_mail
+
+from core.tasks import task
+
+from . import feed, search
+from .models import Comment, Follow, Post
+from .thumbnails import generate_thumbnail  # noqa: F401
+
+
+@task()
+def fanout_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        feed.fanout_post(post)
+
+
+@task()
+def backfill_feed(user_id, author_id):
+    # Пока задача ждала, пользователь мог отписаться
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        feed.backfill_feed(user_id, author_id)
+
+
+@task()
+def refill_author_feeds(author_id):
+    feed.refill_author(author_id)
+
+
+@task()
+def index_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        search.index_post(post)
+
+
+@task()
+def notify_comment(comment_id):
+    """Сообщает автору поста о новом комментарии."""
+    comment = Comment.objects.select_related(
+        'author', 'post__author'
+    ).filter(pk=comment_id).first()
+    if comment is None:
+        return
+    post_author = comment.post.author
+    if not post_author.email or post_author == comment.author:
+        return
+    # Письмо читают вне сайта: адрес нужен полный
+    url = urljoin(settings.SITE_URL, comment.post.get_absolute_url())
+    send_mail(
+        'Новый комментарий к вашему посту',
+        f'{comment.author.username} пишет:\n\n{comment.text}\n\n{url}',
+        None,
+        [post_author.email]
+    )
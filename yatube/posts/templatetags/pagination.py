@@ -0,0 +1,9 @@
+from django import template
+
+from ..utils import next_cursor, page_window, previous_cursor
+
+register = template.Library()
+
+register.filter('next_cursor', next_cursor)
+register.filter('previous_cursor', previous_cursor)
+register.simple_tag(page_window)
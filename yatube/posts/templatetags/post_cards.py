@@ -0,0 +1,44 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from ..cache import card_versions
+from ..thumbnails import post_thumbnail
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card(post, show_author=True):
+    """
+    Карточка поста для лент. Готовый HTML берется из кэша по ключу,
+    включающему версии поста, автора и группы.
+    """
+    versions = '.'.join(
+        str(version) for version in card_versions(post)
+    )
+    key = f'post_card:{post.pk}:{int(show_author)}:{versions}'
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string(
+            'posts/includes/post_card.html',
+            {'post': post, 'show_author': show_author}
+        )
+        cache.set(key, html, settings.POST_CARD_CACHE_TIMEOUT)
+    return mark_safe(html)
+
+
+@register.simple_tag
+def post_image_url(post):
+    """
+    Адрес картинки поста: готовая миниатюра, а пока ее нет -
+    исходная картинка.
+    """
+    if not post.image:
+        return ''
+    thumbnail = post_thumbnail(post)
+    if thumbnail is None:
+        return post.image.url
+    return thumbnail.url
@@ -0,0 +1,138 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from core.cache import get_versions
+
+from ..cache import INDEX_PAGE, post_version_key, posts_changed_at
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor1')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.user,
+            group=cls.group,
+        )
+        cls.url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_card_rendered_once(self):
+        """Неизмененная карточка берется из кэша."""
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, 'posts/includes/post_card.html')
+        response = self.client.get(self.url)
+        self.assertTemplateNotUsed(
+            response, 'posts/includes/post_card.html'
+        )
+        self.assertContains(response, 'Тестовый пост')
+
+    def test_card_invalidated_on_post_edit(self):
+        """Изменение поста сразу видно в карточке."""
+        self.client.get(self.url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Измененный пост'
+        post.save()
+        self.assertContains(self.client.get(self.url), 'Измененный пост')
+
+    def test_card_invalidated_on_author_edit(self):
+        """Изменение автора сразу видно в карточке."""
+        self.client.get(self.url)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Иван'
+        user.save()
+        self.assertContains(self.client.get(self.url), 'Иван')
+
+
+class CommitInvalidationTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='TestAuthor1')
+        self.post = Post.objects.create(text='Тестовый пост', author=self.user)
+
+    def test_post_version_bumped_after_commit(self):
+        """Версия поста сбрасывается еще раз после фиксации транзакции."""
+        with transaction.atomic():
+            self.post.text = 'Измененный пост'
+            self.post.save()
+            # Карточка, собранная другим запросом до фиксации
+            stale = get_versions(post_version_key(self.post.pk))
+        self.assertNotEqual(
+            get_versions(post_version_key(self.post.pk)), stale
+        )
+
+    def test_index_bumped_after_commit(self):
+        """Главная страница сбрасывается еще раз после фиксации."""
+        key = f'page_cache:{INDEX_PAGE}'
+        with transaction.atomic():
+            Post.objects.create(text='Новый пост', author=self.user)
+            stale = get_versions(key)
+        self.assertNotEqual(get_versions(key), stale)
+
+    def test_changed_at_touched_after_commit(self):
+        """Отметка изменения постов обновляется еще раз после фиксации."""
+        with transaction.atomic():
+            Post.objects.create(text='Новый пост', author=self.user)
+            stale = posts_changed_at()
+        self.assertGreater(posts_changed_at(), stale)
+
+
+class IndexPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor1')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_cached_page_has_user_header(self):
+        """Закэшированная страница показывает шапку текущего пользователя."""
+        self.guest_client.get(reverse('posts:index'))
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertTemplateNotUsed(response, 'posts/index.html')
+        self.assertContains(response, 'Пользователь: TestAuthor1')
+        self.assertNotContains(
+            self.guest_client.get(reverse('posts:index')),
+            'Пользователь: TestAuthor1'
+        )
+
+    def test_post_create_invalidates_index(self):
+        """Новый пост сразу виден на закэшированной главной."""
+        self.guest_client.get(reverse('posts:index'))
+        self.authorized_client.post(
+            reverse('posts:post_create'), data={'text': 'Свежий пост'}
+        )
+        self.assertContains(
+            self.guest_client.get(reverse('posts:index')), 'Свежий пост'
+        )
+
+    def test_model_writes_invalidate_index(self):
+        """Записи в обход представлений (админка, команды) видны на главной."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        post = Post.objects.create(text='Пост из админки', author=self.user)
+        self.assertContains(self.guest_client.get(url), 'Пост из админки')
+        post.text = 'Исправленный пост'
+        post.save()
+        self.assertContains(self.guest_client.get(url), 'Исправленный пост')
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(NUMBER_COMMENTS_PAGE=3, COMMENTS_STREAM_CHUNK=2)
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor1')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {i}')
+            for i in range(5)
+        )
+        cls.url = reverse('posts:post_detail', kwargs={'post_id': cls.post.pk})
+
+    def setUp(self):
+        self.client = Client()
+
+    def texts(self, comments):
+        return [comment.text for comment in comments]
+
+    def test_comment_pages(self):
+        """Комментарии выводятся порциями по курсору."""
+        response = self.client.get(self.url)
+        self.assertEqual(
+            self.texts(response.context['comments']),
+            ['Комментарий 0', 'Комментарий 1', 'Комментарий 2']
+        )
+        response = self.client.get(
+            self.url, {'comments': response.context['next_comments']}
+        )
+        self.assertEqual(
+            self.texts(response.context['comments']),
+            ['Комментарий 3', 'Комментарий 4']
+        )
+        self.assertIsNone(response.context['next_comments'])
+
+    def test_stream_all_comments(self):
+        """Вся ветка отдается потоком после страницы поста."""
+        response = self.client.get(self.url, {'comments': 'all'})
+        self.assertTrue(response.streaming)
+        chunks = [
+            chunk.decode() for chunk in response.streaming_content
+        ]
+        self.assertIn('Тестовый пост', chunks[0])
+        self.assertNotIn('Комментарий', chunks[0])
+        content = ''.join(chunks)
+        positions = [
+            content.index(f'Комментарий {i}') for i in range(5)
+        ]
+        self.assertEqual(positions, sorted(positions))
+        self.assertIn('</html>', chunks[-1])
+
+    @override_settings(SITE_URL='https://yatube.example')
+    def test_notification_has_absolute_url(self):
+        """Письмо автору поста ведет на пост по полному адресу."""
+        User.objects.filter(pk=self.user.pk).update(email='author@test.ru')
+        reader = User.objects.create_user(username='TestReader')
+        self.client.force_login(reader)
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Новый комментарий'}
+        )
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(
+            f'https://yatube.example/posts/{self.post.pk}/',
+            mail.outbox[0].body
+        )
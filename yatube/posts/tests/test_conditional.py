@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor1')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.user, group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'TestAuthor1'}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def revalidate(self, url, response):
+        return self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+
+    def test_not_modified(self):
+        """Повторный визит на неизмененную страницу - один запрос и 304."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('Cookie', response['Vary'])
+                self.assertIn('max-age=0', response['Cache-Control'])
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.revalidate(url, response)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(len(queries), 1)
+
+    def test_modified_after_edit(self):
+        """Изменение поста или новый комментарий меняют ETag."""
+        responses = {url: self.client.get(url) for url in self.urls}
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Измененный пост'
+        post.save()
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                response = self.revalidate(url, response)
+                self.assertEqual(response.status_code, 200)
+        url = self.urls[-1]
+        response = self.client.get(url)
+        Comment.objects.create(post=post, author=self.user, text='Ответ')
+        self.assertContains(self.revalidate(url, response), 'Ответ')
+
+    def test_etag_depends_on_user(self):
+        """Страница, полученная гостем, не подходит авторизованному."""
+        url = self.urls[0]
+        response = self.client.get(url)
+        self.client.force_login(self.user)
+        response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
@@ -0,0 +1,102 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+
+from ..forms import PostForm
+from ..models import AuthorStats, Comment, Group, Post
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor1')
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    @staticmethod
+    def stats(user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_post_and_comment_counters(self):
+        """Создание поста и комментария обновляет счетчики."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Тестовый пост', 'group': self.group.pk}
+        )
+        post = Post.objects.get(text='Тестовый пост')
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            data={'text': 'Комментарий'}
+        )
+        self.assertEqual(self.stats(self.user).posts_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_follow_counters(self):
+        """Подписка и отписка обновляют счетчики подписок."""
+        url = reverse('posts:profile_follow', args=[self.reader])
+        self.authorized_client.get(url)
+        self.assertEqual(self.stats(self.user).following_count, 1)
+        self.assertEqual(self.stats(self.reader).followers_count, 1)
+        url = reverse('posts:profile_unfollow', args=[self.reader])
+        self.authorized_client.get(url)
+        self.assertEqual(self.stats(self.reader).followers_count, 0)
+
+    def test_edit_keeps_concurrent_comment(self):
+        """Комментарий, добавленный во время правки поста, учтен."""
+        post = Post.objects.create(text='Тестовый пост', author=self.user)
+        clean = PostForm.clean
+
+        def comment_then_clean(form):
+            # Пост уже загружен представлением
+            Comment.objects.create(
+                post=post, author=self.reader, text='Комментарий'
+            )
+            return clean(form)
+
+        for number, url in enumerate((
+                reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+                reverse('api:post_edit', args=[post.pk])), start=1):
+            with self.subTest(url=url), mock.patch.object(
+                    PostForm, 'clean', comment_then_clean):
+                self.authorized_client.post(url, data={'text': 'Правка'})
+                post.refresh_from_db()
+                self.assertEqual(post.text, 'Правка')
+                self.assertEqual(post.comments_count, number)
+
+    def test_group_save_keeps_posts_count(self):
+        """Сохранение загруженной раньше группы не сбрасывает счетчик."""
+        group = Group.objects.get(pk=self.group.pk)
+        Post.objects.create(
+            text='Тестовый пост', author=self.user, group=self.group
+        )
+        group.title = 'Новое название'
+        group.save()
+        group.refresh_from_db()
+        self.assertEqual(group.title, 'Новое название')
+        self.assertEqual(group.posts_count, 1)
+
+    def test_reconcile_counters(self):
+        """Команда reconcile_counters исправляет счетчики."""
+        Post.objects.create(text='Тестовый пост', author=self.user)
+        AuthorStats.objects.filter(pk=self.user.pk).update(posts_count=7)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(self.stats(self.user).posts_count, 1)
@@ -0,0 +1,123 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..feed import feed_posts
+from ..utils import CURSOR_NEXT, CURSOR_PREVIOUS
+from ..models import AuthorStats, FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor1')
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.old_post = Post.objects.create(
+            text='Пост до подписки', author=cls.author
+        )
+
+    def test_follow_backfills_feed(self):
+        """Подписка добавляет в ленту прежние посты автора."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(list(feed_posts(self.reader)), [self.old_post])
+
+    def test_new_post_fanned_out(self):
+        """Новый пост попадает в ленты подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+
+    def test_unfollow_prunes_feed(self):
+        """Отписка убирает посты автора из ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(list(feed_posts(self.reader)), [])
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_popular_author_read_on_demand(self):
+        """Посты популярного автора читаются без развертки."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(
+            list(feed_posts(self.reader)), [post, self.old_post]
+        )
+
+    def test_rebuild_feeds_command(self):
+        """Команда rebuild_feeds восстанавливает ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        FeedEntry.objects.all().delete()
+        call_command('rebuild_feeds', stdout=StringIO())
+        self.assertEqual(list(feed_posts(self.reader)), [self.old_post])
+
+
+@override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+class FanoutThresholdTests(TestCase):
+    """Автор с двумя подписчиками выше порога развертки (1)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.other = User.objects.create_user(username='TestOther')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.other, author=cls.author)
+
+    def fanout(self):
+        return AuthorStats.objects.get(user=self.author).feed_fanout
+
+    def test_crossing_up_disables_fanout(self):
+        self.assertFalse(self.fanout())
+        post = Post.objects.create(text='Пост', author=self.author)
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        self.assertEqual(list(feed_posts(self.reader)), [post])
+
+    def test_crossing_down_refills_feeds(self):
+        """Посты, опубликованные выше порога, раскладываются по лентам."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        Follow.objects.filter(user=self.other).delete()
+        self.assertTrue(self.fanout())
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertFalse(FeedEntry.objects.filter(user=self.other).exists())
+        self.assertEqual(list(feed_posts(self.reader)), [post])
+
+    def test_pages_merge_both_sources(self):
+        """Курсорные страницы сливают FeedEntry и посты без развертки."""
+        fanout_author = User.objects.create_user(username='TestAuthor2')
+        Follow.objects.create(user=self.reader, author=fanout_author)
+        posts = [
+            Post.objects.create(
+                text=f'Пост {number}',
+                author=fanout_author if number % 3 else self.author
+            )
+            for number in range(12)
+        ]
+        feed = feed_posts(self.reader)
+        self.assertEqual(feed.count(), 12)
+        pages = [feed[:5]]
+        while len(pages[-1]) == 5:
+            last = pages[-1][-1]
+            pages.append(feed.keyset(CURSOR_NEXT, last.pub_date, last.pk)[:5])
+        self.assertEqual(
+            [post for page in pages for post in page], posts[::-1]
+        )
+        first = pages[1][0]
+        self.assertEqual(
+            feed.keyset(CURSOR_PREVIOUS, first.pub_date, first.pk)[:5],
+            pages[0][::-1]
+        )
+
+    def test_rebuild_resets_fanout(self):
+        AuthorStats.objects.filter(user=self.author).update(feed_fanout=True)
+        call_command('rebuild_feeds', stdout=StringIO())
+        self.assertFalse(self.fanout())
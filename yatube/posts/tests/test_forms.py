@@ -12,6 +12,8 @@ from ..models import Comment, Post
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+# Картинка перекодируется и называется по хэшу содержимого
+IMAGE_NAME = r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$'
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -64,13 +66,9 @@ class PostCreateFormTest(TestCase):
             'posts:profile', kwargs={'username': self.user})
         )
         self.assertEqual(Post.objects.count(), posts_count + 1)
-        self.assertTrue(
-            Post.objects.filter(
-                text='Тестовый пост2',
-                author=self.user,
-                image='posts/small.gif'
-            ).exists()
-        )
+        post = Post.objects.get(text='Тестовый пост2', author=self.user)
+        self.assertRegex(post.image.name, IMAGE_NAME)
+        self.assertTrue(post.image.storage.exists(post.image.name))
 
     def test_post_edit(self):
         """Валидная форма редактирует запись в Post."""
@@ -101,13 +99,11 @@ class PostCreateFormTest(TestCase):
             'posts:post_detail', kwargs={'post_id': 1})
         )
         self.assertEqual(Post.objects.count(), posts_count)
-        self.assertTrue(
-            Post.objects.filter(
-                text='Тестовый редактируемый пост',
-                author=self.user,
-                image='posts/small2.gif'
-            ).exists()
+        post = Post.objects.get(
+            text='Тестовый редактируемый пост', author=self.user
         )
+        self.assertRegex(post.image.name, IMAGE_NAME)
+        self.assertTrue(post.image.storage.exists(post.image.name))
 
     def test_guest_no_create_post(self):
         """Не авторизованный пользователь не может создать пост
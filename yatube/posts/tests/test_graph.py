@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import graph
+from ..models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.authors = [
+            User.objects.create_user(username=f'TestAuthor{number}')
+            for number in range(3)
+        ]
+        for author in cls.authors[:2]:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_adjacency_sorted(self):
+        self.assertEqual(
+            list(graph.following_ids(self.reader.pk)),
+            sorted(author.pk for author in self.authors[:2])
+        )
+        self.assertEqual(
+            list(graph.follower_ids(self.authors[0].pk)), [self.reader.pk]
+        )
+
+    def test_is_following(self):
+        self.assertTrue(graph.is_following(self.reader.pk, self.authors[0].pk))
+        self.assertFalse(
+            graph.is_following(self.reader.pk, self.authors[2].pk)
+        )
+        self.assertFalse(graph.is_following(None, self.authors[0].pk))
+
+    def test_loaded_once(self):
+        """Повторные проверки не обращаются к базе."""
+        graph.is_following(self.reader.pk, self.authors[0].pk)
+        with self.assertNumQueries(0):
+            for author in self.authors:
+                graph.is_following(self.reader.pk, author.pk)
+            graph.following_count(self.reader.pk)
+
+    def test_following_among(self):
+        """Подписки на авторов страницы проверяются за один раз."""
+        author_ids = [author.pk for author in self.authors] * 2
+        with self.assertNumQueries(1):
+            following = graph.following_among(self.reader.pk, author_ids)
+        self.assertEqual(
+            following, {author.pk for author in self.authors[:2]}
+        )
+
+    def test_counts(self):
+        self.assertEqual(graph.following_count(self.reader.pk), 2)
+        self.assertEqual(graph.followers_count(self.authors[0].pk), 1)
+        self.assertEqual(graph.followers_count(self.authors[2].pk), 0)
+
+    def test_follow_changes_applied(self):
+        """Подписка и отписка сразу видны в графе."""
+        reader, author = self.reader.pk, self.authors[2].pk
+        self.assertFalse(graph.is_following(reader, author))
+        Follow.objects.create(user=self.reader, author=self.authors[2])
+        self.assertTrue(graph.is_following(reader, author))
+        self.assertEqual(graph.followers_count(author), 1)
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertFalse(graph.is_following(reader, author))
+        self.assertEqual(graph.following_count(reader), 0)
+
+    def test_unfollow_with_stale_graph(self):
+        """Отписка удаляет подписку, даже если граф в кэше устарел."""
+        author = self.authors[2]
+        client = Client()
+        client.force_login(self.reader)
+        for url in (reverse('posts:profile_unfollow', args=[author]),
+                    reverse('api:profile_unfollow', args=[author])):
+            with self.subTest(url=url):
+                self.assertFalse(
+                    graph.is_following(self.reader.pk, author.pk)
+                )
+                # bulk_create не посылает сигналов: граф остается прежним
+                Follow.objects.bulk_create(
+                    [Follow(user=self.reader, author=author)]
+                )
+                client.post(url)
+                self.assertFalse(
+                    Follow.objects.filter(
+                        user=self.reader, author=author
+                    ).exists()
+                )
@@ -0,0 +1,105 @@
+import re
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'План запроса в формате SQLite')
+@override_settings(NUMBER_POSTS_PAGE=2)
+class QueryPlanTests(TestCase):
+    """
+    Запросы страниц используют индексы, а не полный просмотр таблиц,
+    и не сортируют строки. Проверяются запросы, которые выполняют
+    сами страницы.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.popular = User.objects.create_user(username='TestPopular')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        for author in (cls.author, cls.popular):
+            Follow.objects.create(user=cls.user, author=author)
+            for number in range(3):
+                cls.post = Post.objects.create(
+                    text=f'Тестовый пост {number}',
+                    author=author,
+                    group=cls.group
+                )
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Комментарий'
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def plans(self, url):
+        """Планы SELECT-запросов, выполненных страницей url."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plans[query['sql']] = '\n'.join(
+                    row[-1] for row in cursor.fetchall()
+                )
+        self.assertTrue(plans)
+        return plans
+
+    def assertUsesIndexes(self, url):
+        for sql, plan in self.plans(url).items():
+            with self.subTest(url=url, sql=sql):
+                for line in plan.splitlines():
+                    if re.search(r'\bSCAN\b', line):
+                        self.assertIn('USING', line, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_post_lists_use_index(self):
+        """Главная, группа, профиль и лента подписок отдаются по индексу."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': self.author.username}
+            ),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls[:]:
+            # Вторая страница по номеру и по курсору
+            response = self.client.get(url)
+            cursor = re.search(r'\?cursor=[\w-]+', response.content.decode())
+            urls += [url + '?page=2', url + cursor.group()]
+        for url in urls:
+            self.assertUsesIndexes(url)
+
+    def test_follow_feed_with_on_demand_author(self):
+        """Посты автора без развертки читаются по индексу автора."""
+        with self.settings(FEED_FANOUT_MAX_FOLLOWERS=1):
+            Follow.objects.create(user=self.author, author=self.popular)
+            self.assertUsesIndexes(reverse('posts:follow_index'))
+
+    def test_post_detail_uses_index(self):
+        """Пост и его комментарии выбираются по индексам."""
+        self.assertUsesIndexes(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
@@ -0,0 +1,46 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..management.commands.loadtest import percentile
+from ..models import AuthorStats, FeedEntry, Follow, Post, PostTerm, User
+
+
+class GenerateDataTests(TestCase):
+    def test_generate_data(self):
+        """Команда generate_data создает данные и согласованные счетчики."""
+        call_command(
+            'generate_data', users=20, groups=2, posts=100, comments=50,
+            follows=40, stdout=StringIO()
+        )
+        self.assertEqual(
+            User.objects.filter(username__startswith='load_').count(), 20
+        )
+        self.assertEqual(Post.objects.count(), 100)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(FeedEntry.objects.exists())
+        self.assertTrue(PostTerm.objects.exists())
+        top_author = AuthorStats.objects.order_by('-posts_count').first()
+        self.assertEqual(
+            top_author.posts_count,
+            Post.objects.filter(author_id=top_author.pk).count()
+        )
+        # Даты постов разнесены по --days дням в порядке создания
+        dates = list(
+            Post.objects.order_by('pk').values_list('pub_date', flat=True)
+        )
+        self.assertEqual(dates, sorted(set(dates)))
+        self.assertGreater(dates[-1] - dates[0], timedelta(days=360))
+        entry = FeedEntry.objects.select_related('post').first()
+        self.assertEqual(entry.pub_date, entry.post.pub_date)
+
+
+class PercentileTests(TestCase):
+    def test_percentile(self):
+        """Перцентили считаются по ближайшему рангу."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
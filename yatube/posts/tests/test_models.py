@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
 
 
 from ..models import Group, Post
@@ -34,6 +35,18 @@ class PostModelTest(TestCase):
                 self.assertEqual(
                     str(model), str_object)
 
+    def test_absolute_url(self):
+        """Адреса моделей совпадают с адресами reverse()."""
+        post_id = self.post.pk
+        self.assertEqual(
+            self.post.get_absolute_url(),
+            reverse('posts:post_detail', args=[post_id])
+        )
+        self.assertEqual(
+            self.post.get_edit_url(),
+            reverse('posts:post_edit', args=[post_id])
+        )
+
     def test_verbose_name(self):
         """verbose_name в полях совпадает с ожидаемым."""
         post = PostModelTest.post
@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+
+from ..models import Post
+from ..utils import (CursorPaginator, next_cursor, page_window,
+                     previous_cursor)
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor1')
+        cls.client = Client()
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый пост {i}', author=cls.user)
+            for i in range(settings.NUMBER_POSTS_PAGE * 2 + 5)
+        )
+
+    def test_cursor_page_equals_offset_page(self):
+        """Страница по курсору совпадает со страницей по номеру."""
+        paginator = CursorPaginator(
+            Post.objects.all(), settings.NUMBER_POSTS_PAGE
+        )
+        first_page = paginator.page(1)
+        second_page = paginator.cursor_page(next_cursor(first_page))
+        self.assertEqual(second_page.number, 2)
+        self.assertEqual(list(second_page), list(paginator.page(2)))
+        self.assertTrue(second_page.has_previous())
+        self.assertTrue(second_page.has_next())
+
+    def test_cursor_last_and_previous_page(self):
+        """Последняя страница без следующей, назад - прежняя страница."""
+        paginator = CursorPaginator(
+            Post.objects.all(), settings.NUMBER_POSTS_PAGE
+        )
+        second_page = paginator.cursor_page(next_cursor(paginator.page(1)))
+        third_page = paginator.cursor_page(next_cursor(second_page))
+        self.assertEqual(len(third_page), 5)
+        self.assertFalse(third_page.has_next())
+        back_page = paginator.cursor_page(previous_cursor(third_page))
+        self.assertEqual(list(back_page), list(second_page))
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Поврежденный курсор ведет на первую страницу."""
+        response = self.client.get(
+            reverse('posts:index') + '?cursor=broken'
+        )
+        self.assertEqual(response.context['page_obj'].number, 1)
+
+    def test_count_limit(self):
+        """Приближенный подсчет не превышает count_limit."""
+        paginator = CursorPaginator(
+            Post.objects.all(), settings.NUMBER_POSTS_PAGE, count_limit=12
+        )
+        self.assertEqual(paginator.count, 12)
+        self.assertTrue(paginator.count_is_approximate)
+
+
+class PageWindowTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor1')
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый пост {i}', author=cls.user) for i in range(95)
+        )
+
+    def test_window_with_count(self):
+        """Окно вокруг текущей страницы, края и пропуски."""
+        paginator = CursorPaginator(Post.objects.all(), 5)
+        self.assertEqual(
+            page_window(paginator.page(10)),
+            [1, None, 8, 9, 10, 11, 12, None, 19]
+        )
+        self.assertEqual(page_window(paginator.page(1)), [1, 2, 3, None, 19])
+
+    def test_window_without_count(self):
+        """Без подсчета окно заканчивается следующей страницей."""
+        paginator = CursorPaginator(Post.objects.all(), 5, skip_count=True)
+        with self.assertNumQueries(1):
+            page = paginator.get_page(10)
+            self.assertEqual(page_window(page), [1, None, 8, 9, 10, 11])
+        last_page = paginator.get_page(19)
+        self.assertFalse(last_page.has_next())
+        self.assertEqual(page_window(last_page), [1, None, 17, 18, 19])
+
+    @override_settings(PAGINATOR_SKIP_COUNT=True)
+    def test_index_without_count(self):
+        """Главная без подсчета постов выводит только окно страниц."""
+        cache.clear()
+        response = Client().get(reverse('posts:index') + '?page=5')
+        self.assertTrue(response.context['page_obj'].paginator.skip_count)
+        self.assertNotContains(response, 'Последняя')
+        self.assertContains(response, '&hellip;')
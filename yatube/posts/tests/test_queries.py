@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Число запросов страниц не должно расти вместе с количеством
+    постов и комментариев.
+    """
+    # Запросы сессии и пользователя входят в бюджет, как и запрос
+    # валидаторов условного GET и загрузка подписок в пустой кэш
+    # (posts.graph)
+    BUDGETS = {
+        'posts:index': 5,
+        'posts:group_list': 5,
+        'posts:profile': 7,
+        'posts:post_detail': 5,
+        'posts:follow_index': 4,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        cls.author = cls.create_author('TestAuthor0')
+        cls.post = Post.objects.filter(author=cls.author).first()
+
+    @classmethod
+    def create_author(cls, username):
+        author = User.objects.create_user(username=username)
+        Follow.objects.create(user=cls.reader, author=author)
+        posts = [
+            Post.objects.create(
+                text=f'Тестовый пост {i}', author=author, group=cls.group
+            )
+            for i in range(3)
+        ]
+        for post in posts:
+            Comment.objects.bulk_create(
+                Comment(text=f'Комментарий {i}', author=author, post=post)
+                for i in range(3)
+            )
+        return author
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def urls(self):
+        return {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}
+            ),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': self.author.username}
+            ),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}
+            ),
+            'posts:follow_index': reverse('posts:follow_index'),
+        }
+
+    def count_queries(self):
+        counts = {}
+        for name, url in self.urls().items():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            counts[name] = len(queries)
+        return counts
+
+    def test_query_budget_does_not_grow(self):
+        """Число запросов не зависит от объема данных."""
+        small = self.count_queries()
+        for number in range(1, 5):
+            self.create_author(f'TestAuthor{number}')
+        Comment.objects.bulk_create(
+            Comment(text=f'Комментарий {i}', author=self.reader,
+                    post=self.post)
+            for i in range(20)
+        )
+        large = self.count_queries()
+        for name, budget in self.BUDGETS.items():
+            with self.subTest(view=name):
+                self.assertEqual(large[name], small[name])
+                self.assertLessEqual(large[name], budget)
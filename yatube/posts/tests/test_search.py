@@ -0,0 +1,68 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+
+from ..admin import PostAdmin
+from ..models import Post, PostTerm
+from ..search import ranked_posts, stem
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor1')
+        cls.cat_post = Post.objects.create(
+            text='Кошки любят рыбу. Кошка спит.', author=cls.user
+        )
+        cls.dog_post = Post.objects.create(
+            text='Собаки любят кошку', author=cls.user
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def search(self, query):
+        return [row['post'] for row in ranked_posts(query)]
+
+    def test_stem(self):
+        """Разные формы слова приводятся к одной основе."""
+        self.assertEqual(stem('кошки'), stem('кошкой'))
+        self.assertEqual(stem('любят'), stem('любит'))
+
+    def test_ranking(self):
+        """Пост с большим числом вхождений слова выше в результатах."""
+        self.assertEqual(
+            self.search('кошка'), [self.cat_post.pk, self.dog_post.pk]
+        )
+        self.assertEqual(self.search('кошки собаки'), [self.dog_post.pk])
+        self.assertEqual(self.search('попугай'), [])
+
+    def test_index_follows_post_changes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        post = Post.objects.get(pk=self.dog_post.pk)
+        post.text = 'Попугай поет'
+        post.save()
+        self.assertEqual(self.search('попугаи'), [post.pk])
+        self.assertEqual(self.search('собака'), [])
+        post.delete()
+        self.assertFalse(PostTerm.objects.filter(post_id=post.pk).exists())
+
+    def test_search_page(self):
+        """Страница поиска выводит найденные посты карточками."""
+        response = self.client.get(reverse('posts:search'), {'q': 'рыба'})
+        self.assertTemplateUsed(response, 'posts/includes/post_card.html')
+        self.assertEqual(list(response.context['page_obj']), [self.cat_post])
+
+    def test_admin_search(self):
+        """Поиск в админке идет через индекс."""
+        queryset, _ = PostAdmin(Post, admin.site).get_search_results(
+            None, Post.objects.all(), 'рыба'
+        )
+        self.assertEqual(list(queryset), [self.cat_post])
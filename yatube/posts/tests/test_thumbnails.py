@@ -0,0 +1,70 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+
+from ..models import Post
+from ..thumbnails import generate_thumbnail
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_ASYNC=True)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor1')
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.user,
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=small_gif,
+                content_type='image/gif'
+            )
+        )
+        cls.url = reverse('posts:profile', args=[cls.user.username])
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_original_image_until_thumbnail_ready(self):
+        """До создания миниатюры показывается исходная картинка."""
+        with mock.patch('posts.thumbnails._submit') as submit:
+            response = self.client.get(self.url)
+        submit.assert_called_once_with(self.post.pk, self.post.image.name)
+        self.assertContains(response, self.post.image.url)
+
+    def test_thumbnail_shown_when_ready(self):
+        """Готовая миниатюра сразу заменяет картинку в карточке."""
+        with mock.patch('posts.thumbnails._submit'):
+            self.client.get(self.url)
+        generate_thumbnail(self.post.pk, self.post.image.name)
+        with mock.patch('posts.thumbnails._submit') as submit:
+            response = self.client.get(self.url)
+        submit.assert_not_called()
+        self.assertNotContains(response, self.post.image.url)
+        self.assertContains(response, settings.MEDIA_URL + 'cache/')
@@ -0,0 +1,115 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(size, mode='RGB', image_format='JPEG', **params):
+    buffer = BytesIO()
+    Image.new(mode, size, 'red').save(buffer, image_format, **params)
+    return buffer.getvalue()
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POST_IMAGE_MAX_SIDE=100,
+    POST_IMAGE_MAX_PIXELS=1000 * 1000,
+)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestAuthor1')
+        cls.url = reverse('posts:post_create')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def upload(self, content, name='image.jpg'):
+        return self.client.post(self.url, {
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile(name, content),
+        })
+
+    def stored_image(self):
+        post = Post.objects.latest('pk')
+        return post.image.name, Image.open(post.image.path)
+
+    def test_image_reencoded(self):
+        """Картинка уменьшается и пересохраняется без метаданных."""
+        exif = Image.Exif()
+        exif[0x010f] = 'Camera'
+        response = self.upload(make_image((400, 200), exif=exif))
+        self.assertEqual(response.status_code, 302)
+        name, image = self.stored_image()
+        self.assertTrue(name.endswith('.jpg'))
+        self.assertEqual(image.format, 'JPEG')
+        self.assertEqual(image.size, (100, 50))
+        self.assertTrue(image.info.get('progressive'))
+        self.assertNotIn('exif', image.info)
+
+    def test_transparency_kept(self):
+        """Картинка с прозрачностью сохраняет альфа-канал."""
+        self.upload(make_image((10, 10), 'RGBA', 'PNG'), 'image.png')
+        name, image = self.stored_image()
+        self.assertEqual(image.mode, 'RGBA')
+        self.assertIn(image.format, ('WEBP', 'PNG'))
+
+    def test_identical_uploads_share_file(self):
+        """Одинаковые картинки хранятся одним файлом."""
+        content = make_image((20, 20))
+        self.upload(content)
+        self.upload(content, 'copy.jpg')
+        names = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+
+    def test_not_image_rejected(self):
+        """Файл не с сигнатурой картинки отклоняется."""
+        response = self.upload(b'<?php echo 1; ?>', 'image.gif')
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(
+            response, 'form', 'image',
+            'Загрузите картинку в формате JPEG, PNG, GIF или WebP.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(FILE_UPLOAD_MAX_BYTES=1024)
+    def test_upload_size_limited(self):
+        """Загрузка больше FILE_UPLOAD_MAX_BYTES отклоняется."""
+        content = make_image((300, 300), quality=100)
+        self.assertGreater(len(content), 1024)
+        response = self.upload(content)
+        self.assertFormError(
+            response, 'form', 'image',
+            'Размер файла не должен превышать 1,0\xa0КБ.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_resolution_limited(self):
+        """Картинка с чрезмерным разрешением отклоняется до декодирования."""
+        response = self.upload(
+            make_image((2000, 1000), 'L', 'PNG'), 'image.png'
+        )
+        self.assertFormError(
+            response, 'form', 'image',
+            'Слишком большое разрешение картинки: 2000×1000.'
+        )
+        self.assertFalse(Post.objects.exists())
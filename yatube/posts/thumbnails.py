@@ -0,0 +1,94 @@
+"""
+Миниатюры картинок постов вне цикла запроса.
+
+Шаблоны берут только готовую миниатюру из хранилища ключей sorl,
+а до ее появления показывают исходную картинку. Миниатюры создает
+фоновая задача (core.tasks): после сохранения поста (post_create,
+post_edit), при первом показе поста без миниатюры и командой
+warm_thumbnails.
+Готовая миниатюра сбрасывает версию поста, и карточка перерисовывается.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from sorl.thumbnail import base, default
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from core.perf import timed
+from core.tasks import task
+
+from .cache import invalidate_post
+
+POST_THUMBNAIL_GEOMETRY = '960x339'
+POST_THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+class ThumbnailBackend(base.ThumbnailBackend):
+    """Бэкенд sorl, умеющий искать миниатюру без ее создания."""
+
+    def get_cached_thumbnail(self, file_, geometry_string, **options):
+        """Возвращает готовую миниатюру или None."""
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+@task(unique=True)
+def generate_thumbnail(post_id, image_name):
+    """Создает миниатюру картинки поста и сбрасывает кэш его карточки."""
+    default.backend.get_thumbnail(
+        image_name, POST_THUMBNAIL_GEOMETRY, **POST_THUMBNAIL_OPTIONS
+    )
+    invalidate_post(post_id)
+
+
+def _submit(post_id, image_name):
+    if not settings.THUMBNAIL_ASYNC:
+        generate_thumbnail(post_id, image_name)
+        return
+    # Пока задача ждет в очереди, показы поста не ставят ее повторно:
+    # блокировка в кэше избавляет их от запроса к базе, а unique -
+    # от дубля, когда блокировка истекла раньше выполнения задачи
+    if cache.add(
+        f'thumbnail:queued:{image_name}', 1, settings.TASKS_LEASE_SECONDS
+    ):
+        generate_thumbnail.enqueue(post_id, image_name)
+
+
+def schedule_thumbnail(post):
+    """Ставит создание миниатюры в очередь после фиксации транзакции."""
+    if post.image:
+        image_name = post.image.name
+        transaction.on_commit(lambda: _submit(post.pk, image_name))
+
+
+@timed('thumbnail')
+def post_thumbnail(post):
+    """
+    Возвращает готовую миниатюру картинки поста или None.
+
+    Если миниатюры еще нет, ставит ее создание в очередь, а при
+    выключенном THUMBNAIL_ASYNC создает ее сразу.
+    """
+    if not post.image:
+        return None
+    thumbnail = default.backend.get_cached_thumbnail(
+        post.image.name, POST_THUMBNAIL_GEOMETRY, **POST_THUMBNAIL_OPTIONS
+    )
+    if thumbnail is None and not settings.THUMBNAIL_ASYNC:
+        return default.backend.get_thumbnail(
+            post.image.name, POST_THUMBNAIL_GEOMETRY, **POST_THUMBNAIL_OPTIONS
+        )
+    if thumbnail is None:
+        _submit(post.pk, post.image.name)
+    return thumbnail
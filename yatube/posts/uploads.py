@@ -0,0 +1,93 @@
+"""
+Картинки постов.
+
+Загруженная картинка не сохраняется как есть: она уменьшается
+до POST_IMAGE_MAX_SIDE по большей стороне и перекодируется без
+метаданных (EXIF с координатами и прочего) в прогрессивный JPEG,
+а картинки с прозрачностью - в WebP (PNG, если Pillow собран без
+WebP). Файл называется по хэшу содержимого, поэтому одинаковые
+загрузки хранятся на диске один раз.
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+UPLOAD_DIR = 'posts'
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+
+
+def _encode(image):
+    """Байты и расширение перекодированной картинки."""
+    buffer = BytesIO()
+    if not _has_alpha(image):
+        image.convert('RGB').save(
+            buffer, 'JPEG',
+            quality=settings.POST_IMAGE_QUALITY,
+            optimize=True,
+            progressive=True
+        )
+        return buffer.getvalue(), 'jpg'
+    image = image.convert('RGBA')
+    if features.check('webp'):
+        image.save(
+            buffer, 'WEBP', quality=settings.POST_IMAGE_QUALITY, method=6
+        )
+        return buffer.getvalue(), 'webp'
+    image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue(), 'png'
+
+
+def _check_size(image):
+    width, height = image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Слишком большое разрешение картинки: %(width)s×%(height)s.',
+            code='too_many_pixels',
+            params={'width': width, 'height': height},
+        )
+
+
+def reencode(file):
+    """
+    Перекодирует загруженную картинку. Размеры читаются из заголовка
+    до декодирования: слишком большая картинка отклоняется сразу.
+    Возвращает ContentFile с именем по хэшу содержимого.
+    """
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            _check_size(image)
+            # Для анимации берется первый кадр
+            image.seek(0)
+            image = ImageOps.exif_transpose(image)
+            side = settings.POST_IMAGE_MAX_SIDE
+            image.thumbnail((side, side), Image.LANCZOS)
+            content, extension = _encode(image)
+    except OSError as error:
+        raise ValidationError(
+            'Не удалось прочитать картинку.', code='invalid_image'
+        ) from error
+    digest = hashlib.sha256(content).hexdigest()
+    return ContentFile(content, name=f'{digest}.{extension}')
+
+
+def store(content):
+    """
+    Сохраняет перекодированную картинку и возвращает ее имя
+    в хранилище. Если такая картинка уже есть, файл не пишется.
+    """
+    digest = content.name.split('.')[0]
+    name = f'{UPLOAD_DIR}/{digest[:2]}/{digest[2:4]}/{content.name}'
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, content)
@@ -11,6 +11,7 @@ urlpatterns = [
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path('search/', views.search, name='search'),
     path('create/', views.post_create, name='post_create'),
     path(
         'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'
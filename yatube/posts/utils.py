@@ -1,9 +1,289 @@
+import base64
+import binascii
+
 from django.conf import settings
-from django.core.paginator import Paginator
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+# Направления перехода по курсору
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+
+
+def encode_key(direction, pub_date, pk, number):
+    """Упаковывает ключ (pub_date, pk) в непрозрачный токен."""
+    raw = f'{direction}|{pub_date.isoformat()}|{pk}|{number}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def encode_cursor(direction, obj, number):
+    """Упаковывает ключ (pub_date, pk) объекта в непрозрачный токен."""
+    return encode_key(direction, obj.pub_date, obj.pk, number)
+
+
+def decode_cursor(cursor):
+    """
+    Распаковывает токен курсора.
+    Возвращает (direction, pub_date, pk, number) или None,
+    если токен поврежден.
+    """
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        direction, pub_date, pk, number = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk, number = int(pk), int(number)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or pub_date is None:
+        return None
+    return direction, pub_date, pk, max(number, 1)
+
+
+def next_cursor(page):
+    """
+    Курсор страницы, следующей за page, или None, если страница
+    получена не курсорным пагинатором.
+    """
+    if not isinstance(page.paginator, CursorPaginator):
+        return None
+    if not page.has_next() or not len(page):
+        return None
+    return encode_cursor(CURSOR_NEXT, page[-1], page.number + 1)
+
+
+def previous_cursor(page):
+    """Курсор страницы, предшествующей page, или None."""
+    if not isinstance(page.paginator, CursorPaginator):
+        return None
+    if not page.has_previous() or not len(page):
+        return None
+    return encode_cursor(CURSOR_PREVIOUS, page[0], page.number - 1)
+
+
+def keyset_filter(queryset, direction, pub_date, pk,
+                  fields=('pub_date', 'pk')):
+    """
+    Объекты после ключа (pub_date, pk) в направлении direction,
+    упорядоченные по удалению от ключа. fields - поля, в которых
+    хранится ключ.
+    """
+    if not isinstance(queryset, QuerySet):
+        # Составной список (posts.feed.FeedPosts) выбирает страницу сам
+        return queryset.keyset(direction, pub_date, pk)
+    date_field, pk_field = fields
+    # Условие записано как диапазон по pub_date с исключением
+    # совпадающего ключа: с OR вместо диапазона SQLite сканирует
+    # индекс с начала.
+    if direction == CURSOR_NEXT:
+        return queryset.filter(
+            Q(**{f'{date_field}__lte': pub_date}),
+            ~Q(**{date_field: pub_date, f'{pk_field}__gte': pk})
+        ).order_by(f'-{date_field}', f'-{pk_field}')
+    return queryset.filter(
+        Q(**{f'{date_field}__gte': pub_date}),
+        ~Q(**{date_field: pub_date, f'{pk_field}__lte': pk})
+    ).order_by(date_field, pk_field)
+
+
+class CursorPage(Page):
+    """
+    Страница, полученная по курсору или без подсчета объектов.
+    Наличие соседних страниц известно без подсчета всех объектов.
+    """
+
+    def __init__(self, object_list, number, paginator,
+                 has_next, has_previous):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    def start_index(self):
+        if not len(self):
+            return 0
+        return (self.paginator.per_page * (self.number - 1)) + 1
+
+    def end_index(self):
+        return self.start_index() + len(self) - 1 if len(self) else 0
+
+
+class CursorPaginator(Paginator):
+    """
+    Пагинатор по ключу (pub_date, pk).
+    Номер страницы (?page=N) по-прежнему работает через OFFSET,
+    а переход по курсору (?cursor=...) выполняет запрос
+    WHERE (pub_date, pk) < (...) LIMIT N, стоимость которого
+    не зависит от глубины страницы.
+    count_limit включает приближенный подсчет: COUNT(*) выполняется
+    не более чем по count_limit строкам. Если количество уже известно
+    (из денормализованного счетчика), его передают в known_count.
+    С skip_count=True объекты не считаются вовсе: страница выбирается
+    с одной лишней строкой, по которой определяется has_next.
+    """
+
+    def __init__(self, object_list, per_page, count_limit=None,
+                 known_count=None, skip_count=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_limit = count_limit
+        self.known_count = known_count
+        self.skip_count = skip_count
+
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            return self.known_count
+        # Список, который не является QuerySet (лента), считает себя сам
+        if self.count_limit is None or not isinstance(
+                self.object_list, QuerySet):
+            return super().count
+        return self.object_list[:self.count_limit].count()
+
+    @property
+    def count_is_approximate(self):
+        return (
+            self.known_count is None
+            and self.count_limit is not None
+            and self.count >= self.count_limit
+        )
+
+    def validate_number(self, number):
+        if not self.skip_count:
+            return super().validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы не является числом')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def get_page(self, number):
+        if not self.skip_count:
+            return super().get_page(number)
+        try:
+            number = self.validate_number(number)
+        except (PageNotAnInteger, EmptyPage):
+            number = 1
+        return self.page(number)
+
+    def page(self, number):
+        if not self.skip_count:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(
+            self.object_list[bottom:bottom + self.per_page + 1]
+        )
+        return CursorPage(
+            object_list[:self.per_page], number, self,
+            has_next=len(object_list) > self.per_page,
+            has_previous=number > 1
+        )
+
+    def cursor_page(self, cursor):
+        """Возвращает страницу по курсору или первую, если курсор неверен."""
+        decoded = decode_cursor(cursor)
+        if decoded is None:
+            return self.page(1)
+        direction, pub_date, pk, number = decoded
+        object_list = keyset_filter(
+            self.object_list, direction, pub_date, pk
+        )
+        object_list = list(object_list[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if direction == CURSOR_NEXT:
+            return CursorPage(
+                object_list, number, self,
+                has_next=has_more, has_previous=number > 1
+            )
+        object_list.reverse()
+        return CursorPage(
+            object_list, number, self,
+            has_next=True, has_previous=has_more and number > 1
+        )
+
+
+def page_window(page, on_each_side=2, on_ends=1):
+    """
+    Номера страниц для навигации: окно вокруг текущей страницы
+    и края диапазона, пропуски обозначены None. Без подсчета объектов
+    (skip_count) последняя страница неизвестна, и окно заканчивается
+    следующей страницей.
+    """
+    number = page.number
+    skip_count = getattr(page.paginator, 'skip_count', False)
+    if skip_count:
+        last = number + 1 if page.has_next() else number
+    else:
+        last = page.paginator.num_pages
+    numbers = set(range(
+        max(number - on_each_side, 1), min(number + on_each_side, last) + 1
+    ))
+    numbers.update(range(1, min(on_ends, last) + 1))
+    if not skip_count:
+        numbers.update(range(max(last - on_ends + 1, 1), last + 1))
+    window = []
+    previous = 0
+    for current in sorted(numbers):
+        if current - previous > 1:
+            window.append(None)
+        window.append(current)
+        previous = current
+    return window
+
+
+def comment_page(request, comment_list):
+    """
+    Порция комментариев по возрастанию даты и курсор следующей порции.
+    Порция после курсора ?comments=... выбирается по ключу последнего
+    показанного комментария, и ее стоимость не зависит от числа
+    комментариев перед ней.
+    """
+    per_page = settings.NUMBER_COMMENTS_PAGE
+    decoded = decode_cursor(request.GET.get('comments', ''))
+    if decoded is not None and decoded[0] == CURSOR_PREVIOUS:
+        _, pub_date, pk, number = decoded
+        comment_list = keyset_filter(
+            comment_list, CURSOR_PREVIOUS, pub_date, pk
+        )
+    else:
+        number = 1
+        comment_list = comment_list.order_by('pub_date', 'pk')
+    comments = list(comment_list[:per_page + 1])
+    if len(comments) <= per_page:
+        return comments, None
+    comments = comments[:per_page]
+    return comments, encode_cursor(CURSOR_PREVIOUS, comments[-1], number + 1)
 
 
-def paginator_post(request, post_list):
-    paginator = Paginator(post_list, settings.NUMBER_POSTS_PAGE)
+def paginator_post(request, post_list, count=None):
+    paginator = CursorPaginator(
+        post_list,
+        settings.NUMBER_POSTS_PAGE,
+        count_limit=settings.PAGINATOR_COUNT_LIMIT,
+        known_count=count,
+        skip_count=count is None and settings.PAGINATOR_SKIP_COUNT
+    )
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return paginator.cursor_page(cursor)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
@@ -1,17 +1,30 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from core.cache import versioned_cache_page
+from core.sqlite import write_transaction
+from core.streaming import stream_template
 
+from . import graph
+from .cache import INDEX_PAGE
+from .conditional import (conditional_page, group_state, index_state,
+                          post_state, profile_state)
+from .feed import feed_posts
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
-from .utils import paginator_post
+from .models import AuthorStats, Follow, Group, Post, User
+from .search import search_page
+from .thumbnails import schedule_thumbnail
+from .utils import comment_page, paginator_post
 
 
-@cache_page(20, key_prefix='index_page')
+@conditional_page(index_state)
+@versioned_cache_page(60 * 5, key_prefix=INDEX_PAGE)
 def index(request):
     template = 'posts/index.html'
-    post_list = Post.objects.select_related('group')
+    post_list = Post.objects.for_feed()
     page_obj = paginator_post(request, post_list)
     context = {
         'page_obj': page_obj
@@ -19,11 +32,12 @@ def index(request):
     return render(request, template, context)
 
 
+@conditional_page(group_state)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.group_posts.all()
-    page_obj = paginator_post(request, post_list)
+    post_list = group.group_posts.for_feed()
+    page_obj = paginator_post(request, post_list, count=group.posts_count)
     context = {
         'group': group,
         'page_obj': page_obj
@@ -31,32 +45,62 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@conditional_page(profile_state)
 def profile(request, username):
     template = 'posts/profile.html'
     author = get_object_or_404(User, username=username)
-    profile_list = author.posts.select_related('group')
-    page_obj = paginator_post(request, profile_list)
-    following = False
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user, author=author).exists()
+    author_stats = AuthorStats.for_user(author)
+    profile_list = author.posts.for_feed()
+    page_obj = paginator_post(
+        request, profile_list, count=author_stats.posts_count
+    )
+    following = graph.is_following(request.user.pk, author.pk)
     context = {
         'author': author,
+        'author_stats': author_stats,
         'page_obj': page_obj,
         'following': following
     }
     return render(request, template, context)
 
 
+@conditional_page(post_state)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.for_detail(), pk=post_id)
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
-        'comments': post.comments.all(),
+        'author_stats': AuthorStats.for_user(post.author),
         'form': form
     }
+    comments = post.comments.for_thread()
+    if request.GET.get('comments') == 'all':
+        # Вся ветка отдается потоком: страница с постом уходит
+        # клиенту сразу, комментарии - по мере чтения из базы
+        return stream_template(
+            request, template, context, comments.order_by('pub_date', 'pk'),
+            'posts/includes/comment_list.html',
+            settings.COMMENTS_STREAM_CHUNK, chunk_name='comments'
+        )
+    context['comments'], context['next_comments'] = comment_page(
+        request, comments
+    )
+    return render(request, template, context)
+
+
+def search(request):
+    """Полнотекстовый поиск по постам."""
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    page_obj = search_page(
+        query, request.GET.get('page'), settings.NUMBER_POSTS_PAGE
+    )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&'
+    }
     return render(request, template, context)
 
 
@@ -70,7 +114,9 @@ def post_create(request):
     author = request.user
     post = form.save(commit=False)
     post.author = request.user
-    post.save()
+    with write_transaction():
+        post.save()
+        schedule_thumbnail(post)
     return redirect('posts:profile', username=author)
 
 
@@ -96,7 +142,9 @@ def post_edit(request, post_id):
         return render(request, template, context)
 
     post = form.save(commit=False)
-    post.save()
+    with write_transaction():
+        post.save()
+        schedule_thumbnail(post)
     return redirect('posts:post_detail', post_id)
 
 
@@ -109,7 +157,8 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with write_transaction():
+            comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
@@ -117,7 +166,7 @@ def add_comment(request, post_id):
 def follow_index(request):
     """Просмотр списка постов подписок."""
     template = 'posts/follow.html'
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = feed_posts(request.user)
     page_obj = paginator_post(request, post_list)
     context = {
         'page_obj': page_obj
@@ -130,7 +179,8 @@ def profile_follow(request, username):
     """Подписаться на автора."""
     author = get_object_or_404(User, username=username)
     if request.user != author:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        with write_transaction():
+            Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:profile', username=username)
 
 
@@ -138,7 +188,8 @@ def profile_follow(request, username):
 def profile_unfollow(request, username):
     """Отписаться от автора."""
     author = get_object_or_404(User, username=username)
-    if request.user != author and Follow.objects.filter(
-            user=request.user, author=author).exists():
+    # Удаление не зависит от графа подписок в кэше: устаревший граф
+    # не должен превращать отписку в пустую операцию
+    with write_transaction():
         Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
@@ -15,6 +15,13 @@ import os
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+
+def _env_seconds(name, default):
+    """Число секунд из окружения; пустое значение или None - без предела."""
+    value = os.getenv(name, str(default)).strip()
+    return None if value in ('', 'None') else int(value)
+
+
 # Путь к дирректории с шаблонами.
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
@@ -42,6 +49,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -52,23 +60,45 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
+# Профиль шаблонов для боевого окружения. TEMPLATE_CACHE: шаблоны
+# читаются и разбираются один раз на процесс (cached loader), изменения
+# на диске видны только после перезапуска. TEMPLATE_INLINE: шаблоны
+# с подставленными {% include %}, подготовленные при развертывании
+# командой inline_templates, берутся из TEMPLATES_INLINED_DIR.
+TEMPLATE_CACHE = os.getenv('TEMPLATE_CACHE', str(not DEBUG)) == 'True'
+TEMPLATE_INLINE = os.getenv('TEMPLATE_INLINE', 'False') == 'True'
+TEMPLATES_INLINED_DIR = os.path.join(BASE_DIR, 'templates_inlined')
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if TEMPLATE_CACHE:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
+        'BACKEND': 'core.backends.DjangoTemplates',
+        'DIRS': (
+            [TEMPLATES_INLINED_DIR] if TEMPLATE_INLINE else []
+        ) + [TEMPLATES_DIR],
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -86,12 +116,69 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Сколько секунд держать подключение к базе открытым между запросами
+# (0 - закрывать после каждого запроса, None - не закрывать)
+CONN_MAX_AGE = _env_seconds('DB_CONN_MAX_AGE', 60)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+    },
+    # Реплика только для чтения (путь к копии базы - в DB_REPLICA_NAME).
+    # В тестах это отдельный файл, не получающий записей основной базы.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv(
+            'DB_REPLICA_NAME', os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'TEST': {'NAME': os.path.join(BASE_DIR, 'test_replica.sqlite3')},
+    },
+    # Общий кэш процессов (core.backends.DatabaseCache) в отдельном
+    # файле: его записи не ждут записей основной базы
+    'cache': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'TEST': {
+            'NAME': os.path.join(BASE_DIR, 'test_cache.sqlite3'),
+            'DEPENDENCIES': [],
+        },
+    },
+}
+# Алиас базы с таблицей кэша
+CACHE_DATABASE = 'cache'
+# Алиасы баз, между которыми распределяются чтения
+DATABASE_REPLICAS = ['replica'] if os.getenv('DB_REPLICA_NAME') else []
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+# Сколько секунд после записи сессия читает из основной базы. Должно
+# быть больше отставания реплики; None закрепляет сессию до ее конца,
+# и активный автор больше не читает из реплик.
+REPLICA_PIN_SECONDS = _env_seconds('REPLICA_PIN_SECONDS', 5)
+# Прагмы SQLite, применяемые к каждому новому подключению
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение - размер в КиБ
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
 }
+# Записи в базу внутри процесса выполняются по одному (core.sqlite):
+# транзакции записи и запросы на запись вне транзакций
+SQLITE_SERIALIZE_WRITES = True
+
+# Сессии читаются из общего кэша (L2, минуя L1: запись сессии не должна
+# сбрасывать L1 других процессов), а при промахе - из базы, куда они
+# записываются вместе с кэшем. Просроченные сессии удаляет команда
+# purge_sessions.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'shared'
+# Время жизни пользователя запроса в кэше (core.auth), сек. Запись
+# удаляется при сохранении пользователя.
+AUTH_USER_CACHE_TIMEOUT = 60 * 60
 
 
 # Password validation
@@ -134,13 +221,54 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+# Сборка статики для боевого окружения (collectstatic): имена файлов
+# с хэшем содержимого, манифест и сжатые копии .gz/.br (core.storage).
+# Раздает их core.static.StaticFilesApplication из yatube/wsgi.py.
+# В режиме отладки статика отдается из STATICFILES_DIRS без сборки.
+STATIC_ROOT = os.path.join(BASE_DIR, 'static_collected')
+STATIC_MANIFEST = os.getenv('STATIC_MANIFEST', str(not DEBUG)) == 'True'
+if STATIC_MANIFEST:
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# Время кэширования статики в браузере, сек.: файлов с хэшем в имени
+# (не меняются никогда) и остальных
+STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+STATIC_MAX_AGE = 60
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загрузки пишутся во временный файл с проверкой сигнатуры и размера
+FILE_UPLOAD_HANDLERS = ['core.uploads.ImageUploadHandler']
+# Больший файл не дочитывается и отклоняется формой
+FILE_UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+# Картинки постов (posts.uploads): наибольшая сторона после
+# перекодирования, наибольшее число пикселей исходной картинки
+# и качество JPEG/WebP
+POST_IMAGE_MAX_SIDE = 2048
+POST_IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+POST_IMAGE_QUALITY = 85
+
 # Количество постов на странице
 NUMBER_POSTS_PAGE = 10
+# Приближенный подсчет постов в пагинаторе: COUNT(*) не более чем
+# по указанному числу строк (None - точный подсчет)
+PAGINATOR_COUNT_LIMIT = None
+# Пагинатор без подсчета постов: навигация знает только о наличии
+# следующей страницы (для лент без денормализованного счетчика)
+PAGINATOR_SKIP_COUNT = False
+# Количество комментариев на странице поста
+NUMBER_COMMENTS_PAGE = 50
+# Сколько комментариев читается из базы и отправляется клиенту за раз
+# при потоковой выдаче всей ветки (?comments=all)
+COMMENTS_STREAM_CHUNK = 500
 # Количество символов текста поста при вызове __str__(Post)
 NUMBER_SYMBOL_TEXT_POST = 15
+# Посты авторов, у которых подписчиков больше этого числа, не раскладываются
+# по лентам при публикации, а подмешиваются в ленту при чтении
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+# Время жизни массивов подписок и подписчиков в кэше (posts.graph), сек.
+# Актуальность массивов обеспечивают версии в ключе.
+FOLLOW_GRAPH_CACHE_TIMEOUT = 60 * 60
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -153,9 +281,79 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 # константа для переопределения функции для ошибки 403
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
-# кэш
+# кэш: память процесса (L1) перед общим для процессов кэшем (L2).
+# L2 - таблица в базе CACHE_DATABASE (создается командой
+# python manage.py createcachetable --database cache); вместо нее
+# можно подключить Redis. В режиме отладки (и в тестах) процесс один,
+# и L2 тоже хранится в его памяти.
+SHARED_CACHE = {
+    'BACKEND': 'core.backends.DatabaseCache',
+    'LOCATION': 'yatube_cache',
+    'OPTIONS': {'MAX_ENTRIES': 100000, 'CULL_EVERY': 100},
+}
 CACHES = {
     'default': {
+        'BACKEND': 'core.backends.TieredCache',
+        'LOCATION': 'default',
+        'OPTIONS': {
+            'L2': 'shared',
+            'L1_TIMEOUT': 5,
+            'L1_MAX_ENTRIES': 1000,
+        },
+    },
+    'shared': SHARED_CACHE if not DEBUG else {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'LOCATION': 'shared',
+    },
+}
+# Время жизни закэшированной карточки поста, сек. Актуальность карточки
+# обеспечивают версии поста, автора и группы в ключе.
+POST_CARD_CACHE_TIMEOUT = 60 * 60
+
+# Бэкенд sorl.thumbnail, умеющий искать готовые миниатюры без их создания
+THUMBNAIL_BACKEND = 'posts.thumbnails.ThumbnailBackend'
+# Миниатюры создаются фоновой задачей; в режиме отладки (и в тестах)
+# они создаются сразу при выводе страницы
+THUMBNAIL_ASYNC = not DEBUG
+# Количество потоков команды warm_thumbnails
+THUMBNAIL_WORKERS = 2
+
+# Фоновые задачи (core.tasks) выполняются сразу, без очереди и команды
+# run_tasks
+TASKS_EAGER = DEBUG
+# Адрес сайта для ссылок в письмах, которые отправляют фоновые задачи
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
+# Количество потоков или процессов команды run_tasks
+TASKS_WORKERS = 4
+# Через сколько секунд задачу незавершившегося исполнителя можно забрать
+TASKS_LEASE_SECONDS = 300
+
+# Доля запросов, которые сравниваются с самыми медленными запросами
+# своего view для страницы /perf/
+PERF_SAMPLE_RATE = 0.1
+# Сколько самых медленных запросов хранится для каждого view
+PERF_SLOWEST_PER_VIEW = 20
+
+# Замеры запросов (core.perf, по строке JSON на запрос) пишутся в файл
+# PERF_LOG_FILE; остальное логирование - как в Django по умолчанию
+PERF_LOG_FILE = os.getenv('PERF_LOG_FILE', os.path.join(BASE_DIR, 'perf.log'))
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'perf_file': {
+            'level': 'INFO',
+            # Переоткрывает файл после ротации внешним logrotate
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': PERF_LOG_FILE,
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'core.perf': {
+            'handlers': ['perf_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
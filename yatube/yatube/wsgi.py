@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Статика из STATIC_ROOT отдается здесь же, без view Django
+from core.static import StaticFilesApplication  # noqa: E402
+
+application = StaticFilesApplication(application)